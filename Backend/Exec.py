@@ -6,9 +6,13 @@ import joblib
 import supabase
 import os
 import wiv
-from DataProcessing import calculate_accels
-import json
+from ticker_sync import TickerSync
+from enrichment import MarketDataEnricher
+from metadata_cache import MetadataCache
+import config
 from stocktwits.process_supervisor import run_supervised_scraping, MonitoringConfig, ScrapingConfig
+from stocktwits.ticker_scheduler import TickerScheduler, fetch_history_rows
+from stocktwits.scroll_controller import ScrollHistory
 
 # Should make this cleaner
 url = os.environ.get("SUPABASE_URL")
@@ -24,107 +28,58 @@ def load_joblib(path):
     return {k.lower(): v for k, v in file.items()}
 
 def update_ticker(ticker, datas, supabase_client, database_name="full_data_with_accel"):
-    if not isinstance(datas, dict):
-        print(f"Skipping {ticker} as it is not a dictionary.")
-        return
-
-    # Check if the ticker already exists in the table
-    response = supabase_client.table(database_name) \
-        .select("*") \
-        .filter("ticker", "eq", ticker) \
-        .execute()
-
-    if not response.data:  # If no data is returned, insert new data
-        mentions_total_full = [0] * 30
-        mentions_total_full[0] = datas["total_mentions"]
-        likes_total_full = [0] * 30
-        likes_total_full[0] = datas["total_likes"]
-        iv_total_full = [0] * 30
-        iv_total_full[0] = datas["wiv"]
-        scores = [0] * 30
-        scores[0] = datas['daily_score']
-        
-        # Prepare the data to insert, including the ticker
-        data_with_ticker = {
-            "ticker": ticker,
-            "mentions_hourly": json.dumps(datas["hours"]),
-            "likes_hourly": json.dumps(datas["likes"]),
-            "mentions_daily": json.dumps(mentions_total_full),
-            "likes_daily": json.dumps(likes_total_full),
-            "stock_price": json.dumps(datas["stock_price"]),
-            "market_cap": json.dumps(datas["market_cap"]),
-            "wiv": json.dumps(iv_total_full),
-            "daily_score": json.dumps(datas['daily_score']),
-            "daily_scores": json.dumps(scores),
-            "daily_scores_acceleration": json.dumps([0] * 30)
-        }
-        supabase_client.table(database_name).insert(data_with_ticker).execute()
-        print(f"Inserted new data for {ticker}")
-        
-    else:
-        # # Update mentions_total and likes_total (pop last, push new)
-        old_mentions_total = json.loads(response.data[0].get("mentions_daily"))
-        old_likes_total = json.loads(response.data[0].get("likes_daily"))
-        old_wiv = json.loads(response.data[0].get("wiv"))
-        old_daily_scores = json.loads(response.data[0].get("daily_score"))
-        old_daily_scores_accel = json.loads(response.data[0].get("daily_scores_acceleration"))
-        
-        old_mentions_total.pop()
-        old_mentions_total.insert(0, datas["total_mentions"])
-        
-        old_likes_total.pop()
-        old_likes_total.insert(0, datas["total_likes"])
-
-        old_wiv.pop()
-        old_wiv.insert(0, datas["wiv"])
-        
-        old_daily_scores.pop()
-        old_daily_scores.insert(0, datas['daily_score'])
-        
-        # Calculate score acceleration
-        old_daily_scores_accel = calculate_accels(old_daily_scores)
-        
-        # Update the existing record with new data
-        supabase_client.table(database_name).update({
-            "mentions_hourly": json.dumps(datas["hours"]),
-            "likes_hourly": json.dumps(datas["likes"]),
-            "mentions_daily": json.dumps(old_mentions_total),
-            "likes_daily": json.dumps(old_likes_total),
-            "stock_price": json.dumps(datas["stock_price"]),
-            "market_cap": json.dumps(datas["market_cap"]),
-            "wiv": json.dumps(old_wiv),
-            "daily_score": json.dumps(datas['daily_score']),
-            "daily_scores": json.dumps(old_daily_scores),
-            "daily_scores_acceleration": json.dumps(old_daily_scores_accel)
-        }).eq("ticker", ticker).execute()
+    # Single ticker version of the bulk sync in run()
+    TickerSync(supabase_client, table=database_name).sync({ticker: datas})
 
 def run_stocktwits_scrape():
     
     # Configuration
     monitoring_config = MonitoringConfig(
-        max_file_age=120,
+        max_heartbeat_age=120,
         min_runtime=60,
         max_restarts=5
     )
     
     scraping_config = ScrapingConfig(
         hours_back=24,
-        max_retries=2
+        max_retries=2,
+        scroll_history_path="stocktwits_scroll_history.joblib",
+        resource_policy=config.STOCKTWITS_RESOURCE_POLICY,
+        profile_dir=config.STOCKTWITS_PROFILE_DIR,
+        cookie_jar_path=config.STOCKTWITS_COOKIE_JAR,
+        missing_symbols_path=config.STOCKTWITS_MISSING_SYMBOLS,
+        spans_path=config.STOCKTWITS_SPANS
     )
     
     with open('tickers.txt', 'r') as f:
         tickers = [line.strip().lower() for line in f if line.strip()]
+    
+    # Busiest and most volatile tickers first, dead ones rarely
+    scheduler = TickerScheduler.load(config.STOCKTWITS_SCHEDULE_PATH)
+    try:
+        scheduler.seed_from_rows(fetch_history_rows(supabase.create_client(url, key)))
+    except Exception as e:
+        print(f"Scheduling from local history only, could not read full_data_with_accel: {e}")
+    plan = scheduler.plan(["NKE", "AMD", "AACG", "AAPL", "TSLA"],
+                          scroll_history=ScrollHistory.load(scraping_config.scroll_history_path))
+    scraping_config.scroll_budgets = plan.scroll_budgets
+    print(f"Top {config.STOCKTWITS_TOP_N} tickers expected within "
+          f"{plan.estimated_seconds(config.STOCKTWITS_TOP_N, workers=config.STOCKTWITS_BROWSERS) / 60:.0f} minutes")
         
     # Run supervised scraping
-    run_supervised_scraping(
+    outcome = run_supervised_scraping(
         username=os.getenv("STOCK_USER"),
         password=os.getenv("STOCK_PASS"),
-        tickers= ["NKE", "AMD", "AACG", "AAPL", "TSLA"],
+        tickers=plan.tickers,
         output_file="supervised_results.joblib",
         monitoring_config=monitoring_config,
-        scraping_config=scraping_config
+        scraping_config=scraping_config,
+        num_browsers=config.STOCKTWITS_BROWSERS
     )
     
+    scheduler.record_run(load_joblib("supervised_results.joblib"), outcome["completed"] | outcome["failed"])
+    scheduler.save()
+    
     return 0
 
 def estimation_for_empty_hours(ticker_data):
@@ -198,6 +153,24 @@ def run():
             a + b for a, b in zip(combined.get(ticker, (0, 0)), values)
         )
     
+    # Hourly bars for every ticker in a few multi-ticker downloads, price and market cap are read from them
+    try:
+        wiv.load_hourly_bars(list(map2), chunk_size=config.WIV_DOWNLOAD_CHUNK)
+    except Exception as e:
+        print(f"Bulk hourly download failed, fetching prices per ticker: {e}")
+    
+    # Market data for every ticker at once, a failed call leaves that ticker's field at its default
+    enricher = MarketDataEnricher(max_workers=config.ENRICHMENT_WORKERS,
+                                  requests_per_second=config.ENRICHMENT_REQUESTS_PER_SECOND,
+                                  call_timeout=config.ENRICHMENT_TIMEOUT)
+    wiv.metadata_cache = MetadataCache.load(config.WIV_METADATA_CACHE)
+    wiv.hourly_limiter = enricher.limiter()
+    enrichment = enricher.enrich(list(map2))
+    try:
+        wiv.metadata_cache.save()
+    except Exception as e:
+        print(f"Could not save metadata cache: {e}")
+    
     # only adds to supabase if ticker also in map2 (map2 will contain all NYSE tickers)
     for ticker_data, data in map2.items():
         # Get combined total likes/mentions
@@ -207,26 +180,22 @@ def run():
         # Get score
         data['daily_score'] = calculate_function([data['total_mentions'], data['total_likes']])
         
-        # Add IV_sum, daily value
-        try:
-            data['wiv'] = int(wiv.calculate_iv_sum(ticker_data))
-        except Exception as e:
-            print(f"Error calculating WIV for {ticker_data}: {e}")
-            data['wiv'] = 0
-
-        # Adding hourly stock price data from market open to close
-        data['stock_price'] = wiv.get_stockprice_last_day(ticker_data)
-        
-        # Adding market cap, hourly
-        data['market_cap'] = wiv.get_marketcap_last_day(ticker_data)
+        # Add IV_sum (daily value), hourly stock price data from market open to close and hourly market cap
+        record = enrichment[ticker_data]
+        for name, error in record.errors.items():
+            print(f"Error getting {name} for {ticker_data}: {error}")
+        data['wiv'] = record.values['wiv']
+        data['stock_price'] = record.values['stock_price']
+        data['market_cap'] = record.values['market_cap']
 
     # Uploading to Supabase
     supabase_client = supabase.create_client(url, key)
 
-    # Will transition to batch upsert later
-    for ticker, datas in map2.items():
-        update_ticker(ticker, datas, supabase_client)
-        print(f"Updated {ticker} in Supabase")
+    # A few paged reads and chunked upserts instead of a select and a write per ticker
+    report = TickerSync(supabase_client, batch_size=config.SUPABASE_BATCH_SIZE).sync(map2)
+    print(f"Updated {report.rows} tickers in Supabase at {report.rows_per_second:.0f} rows/s")
+    if report.failed_tickers:
+        print(f"Failed to update {len(report.failed_tickers)} tickers: {report.failed_tickers}")
         
     return 0
 
@@ -1,4 +1,5 @@
 import praw
+from praw.models import MoreComments
 import logging
 from datetime import datetime, timedelta, timezone
 import os
@@ -6,10 +7,29 @@ from dotenv import load_dotenv
 import time
 import config
 import csv
+import hashlib
+import heapq
+import itertools
+import math
+import joblib
+import pickle
+import re
+import threading
+from collections import deque, Counter, defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+from contextlib import ExitStack
 
 # Define fthe logger so functions don't give errors when run alone
 logger = None
 
+# Runs of alphanumeric characters, i.e. the same word boundaries str.isalnum() gives the Trie
+TOKEN_PATTERN = re.compile(r"([^\W_]+)")
+# A '$' and the token after it, e.g. '$meta'
+CASHTAG_PATTERN = re.compile(r"\$([^\W_]+)")
+NON_ASCII_PATTERN = re.compile(r"[^\x00-\x7f]")
+# ASCII characters that aren't alphanumeric mapped to a space, for bytes.translate
+SEPARATOR_BYTES = bytes(byte if byte >= 0x80 or chr(byte).isalnum() else ord(" ") for byte in range(256))
+
 # Trie class for tickers
 class TrieNode:
     def __init__(self):
@@ -19,9 +39,11 @@ class TrieNode:
 class Trie:
     def __init__(self):
         self.root = TrieNode()
+        self.max_pattern_length = 0
 
     def insert(self, ticker):
         """Inserts a word into the trie"""
+        self.max_pattern_length = max(self.max_pattern_length, len(ticker))
         node = self.root
         for char in ticker:
             if char not in node.children:
@@ -60,6 +82,327 @@ class Trie:
         return mentioned_tickers
 
 
+# Aho-Corasick automaton for tickers and company names
+class AhoCorasick:
+    """
+    Multi-pattern matcher that finds every ticker/company in a single pass over the text.
+    Uses the same word-boundary rules as Trie.search_and_count, so both give identical counts.
+    """
+    def __init__(self, patterns=()):
+        # State 0 is the root. goto[s] maps a character to the next state, fail[s] is the
+        # failure link and outputs[s] holds the lengths of every pattern ending in state s
+        self.goto = [{}]
+        self.fail = [0]
+        self.outputs = [()]
+        self.patterns = []
+        self.max_pattern_length = 0
+        for pattern in patterns:
+            self.insert(pattern)
+        self.build()
+
+    def insert(self, pattern):
+        """Adds a pattern to the keyword tree. build() must be called afterwards"""
+        if not pattern:
+            return
+        state = 0
+        for char in pattern:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append(())
+            state = next_state
+        if len(pattern) not in self.outputs[state]:
+            self.outputs[state] = self.outputs[state] + (len(pattern),)
+            self.patterns.append(pattern)
+            self.max_pattern_length = max(self.max_pattern_length, len(pattern))
+
+    def build(self):
+        """Computes failure links breadth first and merges the outputs along them"""
+        queue = deque()
+        for state in self.goto[0].values():
+            self.fail[state] = 0
+            queue.append(state)
+
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                # Longest pattern first, shorter suffix patterns after
+                self.outputs[next_state] = self.outputs[next_state] + self.outputs[self.fail[next_state]]
+
+    def search_and_count(self, text, dict_with_ticker_rm_and_upvotes, company_to_ticker: dict):
+        """Counts appearances of a ticker, and adds raw mentions to dictionary. Returns a set of tickers mentioned"""
+        mentioned_tickers = set()
+        goto = self.goto
+        fail = self.fail
+        outputs = self.outputs
+        text_length = len(text)
+        state = 0
+
+        for end, char in enumerate(text, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            if not outputs[state]:
+                continue
+            # A match has to end on a word boundary
+            if end < text_length and text[end].isalnum():
+                continue
+
+            for length in outputs[state]:
+                start = end - length
+                if start == 0 or not text[start-1].isalnum():
+                    detected_ticker = text[start:end]
+                    if detected_ticker in company_to_ticker:
+                        detected_ticker = company_to_ticker[detected_ticker]
+                    dict_with_ticker_rm_and_upvotes[detected_ticker][0] += 1
+                    mentioned_tickers.add(detected_ticker)
+        return mentioned_tickers
+
+
+# Token based matcher for tickers and company names
+class TokenMatcher:
+    """
+    Tokenizes the text once on alphanumeric boundaries and looks tokens up in hash tables.
+    Single-token patterns live in a frozen set, cashtags (e.g. '$meta') in a set of the tokens after
+    the '$', and multi-word names (e.g. 'bank of america') in an n-gram prefix table keyed by their
+    first two tokens. Names with more than one character after their first token (e.g. 'wang & lee',
+    'guess?') are in the same table with an empty second token, matching a longer separator in the text.
+    The few other patterns, punctuation before a token (e.g. '#meta') or no token at all (e.g. '&'),
+    are looked for in the text itself when they can be there.
+    Gives the same counts as Trie.search_and_count.
+    """
+    def __init__(self, patterns=()):
+        single_tokens = set()
+        cashtags = set()
+        affix_table = {}
+        ngram_table = {}
+        separator_patterns = set()
+        self.max_pattern_length = 0
+        for pattern in set(patterns):
+            if not pattern:
+                continue
+            self.max_pattern_length = max(self.max_pattern_length, len(pattern))
+            # Separators at even indexes, tokens at odd indexes
+            pieces = TOKEN_PATTERN.split(pattern)
+            if len(pieces) < 3:
+                separator_patterns.add(pattern)
+            elif len(pieces) == 3 and not pieces[0] and not pieces[2]:
+                single_tokens.add(pattern)
+            elif len(pieces) == 3 and pieces[0] == "$" and not pieces[2]:
+                cashtags.add(pieces[1])
+            elif len(pieces) == 3 and not pieces[2]:
+                affix_table.setdefault(pieces[1], []).append(pattern)
+            else:
+                # Parts of the text (see search_and_count) the pattern starts with, and how far ahead of the first
+                # token the pattern starts
+                second = pieces[3] if len(pieces) > 3 and len(pieces[2]) == 1 else ""
+                ngram_table.setdefault((pieces[1], second), []).append((len(pieces[0]), pattern))
+
+        self.single_tokens = frozenset(single_tokens)
+        self.cashtags = frozenset(cashtags)
+        self.affix_table = {token: tuple(candidates) for token, candidates in affix_table.items()}
+        self.ngram_table = {ngram: tuple(candidates) for ngram, candidates in ngram_table.items()}
+        self.separator_patterns = tuple(separator_patterns)
+
+    def search_and_count(self, text, dict_with_ticker_rm_and_upvotes, company_to_ticker: dict):
+        """Counts appearances of a ticker, and adds raw mentions to dictionary. Returns a set of tickers mentioned"""
+        mentioned_tickers = set()
+
+        # Tokenize once: with every separator character turned into a space, splitting on spaces gives the tokens
+        # plus an empty string for each separator character after the first. Two tokens one character apart
+        # are next to each other, and a part's offset in the text is the length of the parts before it plus one each
+        parts = separators_to_spaces(text).split(" ")
+
+        detected = list(filter(self.single_tokens.__contains__, parts))
+        if self.cashtags and "$" in text:
+            detected.extend(self._check_cashtags(text))
+        ngram_hits = [i for i, ngram in enumerate(zip(parts, parts[1:])) if ngram in self.ngram_table]
+        if ngram_hits:
+            detected.extend(self._check_ngrams(text, parts, ngram_hits))
+
+        # Affix patterns are only searched for when their first token is in the text
+        for token in self.affix_table.keys() & parts:
+            for pattern in self.affix_table[token]:
+                detected.extend(self._find_all(text, pattern))
+        for pattern in self.separator_patterns:
+            detected.extend(self._find_all(text, pattern))
+
+        for pattern, occurrences in Counter(detected).items():
+            detected_ticker = company_to_ticker.get(pattern, pattern)
+            dict_with_ticker_rm_and_upvotes[detected_ticker][0] += occurrences
+            mentioned_tickers.add(detected_ticker)
+        return mentioned_tickers
+
+    def _check_cashtags(self, text):
+        """Yields the cashtag patterns in the text, a '$' that starts a word followed by a known token"""
+        for match in CASHTAG_PATTERN.finditer(text):
+            start = match.start()
+            if (start == 0 or not text[start-1].isalnum()) and match.group(1) in self.cashtags:
+                yield match.group()
+
+    def _check_ngrams(self, text, parts, ngram_hits):
+        """Yields the multi-word patterns that match the text where their first two tokens were found"""
+        offset = last = 0
+        for i in ngram_hits:
+            offset += sum(map(len, parts[last:i])) + i - last
+            last = i
+            for lead, pattern in self.ngram_table[parts[i], parts[i+1]]:
+                start = offset - lead
+                if start >= 0 and text.startswith(pattern, start) and on_word_boundaries(text, start, start + len(pattern)):
+                    yield pattern
+
+    @staticmethod
+    def _find_all(text, pattern):
+        """Yields the pattern for every occurrence of it on word boundaries in the text, overlapping ones included"""
+        position = text.find(pattern)
+        while position != -1:
+            if on_word_boundaries(text, position, position + len(pattern)):
+                yield pattern
+            position = text.find(pattern, position + 1)
+
+
+def on_word_boundaries(text, start, end):
+    """True if text[start:end] isn't preceded or followed by an alphanumeric character, as the Trie checks"""
+    return (start == 0 or not text[start-1].isalnum()) and (end == len(text) or not text[end].isalnum())
+
+
+def separators_to_spaces(text):
+    """text with every character that isn't alphanumeric replaced by a space, same length"""
+    if not text.isascii():
+        text = NON_ASCII_PATTERN.sub(lambda match: match.group() if match.group().isalnum() else " ", text)
+    # Bytes from 0x80 up are parts of the alphanumeric characters kept above
+    return text.encode("utf-8").translate(SEPARATOR_BYTES).decode("utf-8")
+
+
+# Streaming search over chunks of text
+def search_and_count_chunks(matcher, chunks, dict_with_ticker_rm_and_upvotes, company_to_ticker: dict):
+    """
+    Same as matcher.search_and_count(" ".join(chunks).lower(), ...) without building the joined string.
+    Each chunk is lowercased and matched as it comes in, with the last max_pattern_length characters of
+    the previous chunks kept so names spanning two chunks are still found. Matches that end in that
+    carried-over tail were already counted, so they are counted on the tail alone and subtracted.
+    Returns a set of tickers mentioned
+    """
+    mentioned_tickers = set()
+    overlap = matcher.max_pattern_length
+    tail = None
+
+    for chunk in chunks:
+        chunk = chunk.lower()
+        window = chunk if tail is None else tail + " " + chunk
+
+        window_counts = defaultdict(lambda: [0, 0])
+        matcher.search_and_count(window, window_counts, company_to_ticker)
+        if tail:
+            tail_counts = defaultdict(lambda: [0, 0])
+            matcher.search_and_count(tail + " ", tail_counts, company_to_ticker)
+            for ticker, counts in tail_counts.items():
+                window_counts[ticker][0] -= counts[0]
+
+        for ticker, counts in window_counts.items():
+            if counts[0] > 0:
+                dict_with_ticker_rm_and_upvotes[ticker][0] += counts[0]
+                mentioned_tickers.add(ticker)
+
+        tail = window[-overlap:] if overlap else ""
+    return mentioned_tickers
+
+
+# Scrape state kept between runs so posts and comments are only counted once
+class RedditScrapeState:
+    """
+    Remembers what previous runs already counted: the newest post seen in every subreddit (the
+    high-water mark) and, for each recent post, the comment IDs processed, the tickers it mentioned
+    and the upvotes already credited. Counted posts are only fetched again for new comments while they
+    are younger than revisit_hours, after that just their IDs are kept, for forget_days. Posts never
+    counted are fetched whatever their age. In a "new" listing every post no newer than the
+    high-water mark was counted, other listings can bring up older posts no run has seen.
+    Stored as a joblib file next to config.JOBLIB_PATH_REDDIT.
+    """
+    def __init__(self, path=None, revisit_hours=24, forget_days=30):
+        self.path = path
+        self.revisit_hours = revisit_hours
+        self.forget_days = forget_days
+        self.subreddits = {}
+        self.posts = {}
+        # Posts counted but too old to revisit, post ID -> created_utc
+        self.counted = {}
+
+    @classmethod
+    def load(cls, path, revisit_hours=24):
+        """Loads the state from path, or returns an empty state if there is none yet"""
+        state = cls(path, revisit_hours)
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'rb') as f:
+                    saved = joblib.load(f)
+                state.subreddits = saved.get("subreddits", {})
+                state.posts = saved.get("posts", {})
+                state.counted = saved.get("counted", {})
+            except Exception as e:
+                if logger:
+                    logger.warning(f"Could not load Reddit scrape state from {path}, starting fresh: {e}")
+        return state
+
+    def save(self):
+        """Keeps only the IDs of posts that won't be revisited and writes the state to disk"""
+        if not self.path:
+            return
+        cutoff = self.cutoff_utc()
+        for post_id, record in self.posts.items():
+            if record["created_utc"] < cutoff:
+                self.counted[post_id] = record["created_utc"]
+        self.posts = {post_id: record for post_id, record in self.posts.items() if record["created_utc"] >= cutoff}
+        forget_cutoff = time.time() - self.forget_days * 86400
+        self.counted = {post_id: created_utc for post_id, created_utc in self.counted.items() if created_utc >= forget_cutoff}
+        with open(self.path, 'wb') as f:
+            joblib.dump({"subreddits": self.subreddits, "posts": self.posts, "counted": self.counted}, f)
+
+    def cutoff_utc(self):
+        """Posts created before this timestamp are not revisited"""
+        return time.time() - self.revisit_hours * 3600
+
+    def is_stale(self, post):
+        """True if the post is too old to be worth fetching again for new comments"""
+        return post.created_utc < self.cutoff_utc()
+
+    def is_counted(self, subreddit_name, post):
+        """
+        True if a previous run counted the post: it is recorded, or in a "new" listing, no newer than
+        the subreddit's high-water mark
+        """
+        if post.id in self.posts or post.id in self.counted:
+            return True
+        if config.POST_TYPE != "new":
+            return False
+        mark = self.subreddits.get(subreddit_name)
+        return mark is not None and post.created_utc <= mark["last_post_created_utc"]
+
+    def get_post(self, post):
+        """Returns what previous runs recorded for a post, or None if it is new"""
+        return self.posts.get(post.id)
+
+    def record_post(self, subreddit_name, post, comment_ids, mentioned_tickers):
+        """Records a processed post and moves the subreddit's high-water mark forward"""
+        record = self.posts.setdefault(post.id, {"created_utc": post.created_utc, "comment_ids": set(), "tickers": set(), "ups": 0})
+        record["comment_ids"].update(comment_ids)
+        record["tickers"].update(mentioned_tickers)
+        record["ups"] = post.ups
+
+        mark = self.subreddits.get(subreddit_name)
+        if mark is None or post.created_utc > mark["last_post_created_utc"]:
+            self.subreddits[subreddit_name] = {"last_post_id": post.id, "last_post_created_utc": post.created_utc}
+
+
 #======================================= Setup Functions =======================================
 def setup_logger():
     """Set up the logger"""
@@ -132,50 +475,358 @@ def setup_trie(tickers, companies):
         trie.insert(company)
     return trie
 
+def setup_automaton(tickers, companies, cache_path=config.AUTOMATON_CACHE_PATH):
+    """
+    Set up the Aho-Corasick automaton for tickers and companies.
+    The compiled automaton is pickled to cache_path and reused as long as the patterns don't change.
+    """
+    patterns = sorted(set(tickers) | set(companies))
+    digest = hashlib.sha256("\n".join(patterns).encode("utf-8")).hexdigest()
+
+    if cache_path and not os.path.isabs(cache_path):
+        cache_path = os.path.join(os.path.dirname(__file__), cache_path)
+
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'rb') as f:
+                cached_digest, automaton = pickle.load(f)
+            if cached_digest == digest:
+                return automaton
+        except Exception as e:
+            if logger:
+                logger.warning(f"Could not load cached automaton, rebuilding: {e}")
+
+    automaton = AhoCorasick(patterns)
+
+    if cache_path:
+        try:
+            with open(cache_path, 'wb') as f:
+                pickle.dump((digest, automaton), f, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError as e:
+            if logger:
+                logger.warning(f"Could not cache automaton to {cache_path}: {e}")
+
+    return automaton
+
+def setup_token_matcher(tickers, companies):
+    """Set up the token matcher for tickers and companies"""
+    return TokenMatcher(list(tickers) + list(companies))
+
+def setup_matcher(tickers, companies, engine=config.MATCHER_ENGINE):
+    """
+    Set up the matching engine chosen in config.MATCHER_ENGINE.
+    All engines expose search_and_count(text, data_dict, company_to_ticker) and give the same counts.
+    """
+    if engine == "trie":
+        return setup_trie(tickers, companies)
+    elif engine == "automaton":
+        return setup_automaton(tickers, companies)
+    elif engine == "token":
+        return setup_token_matcher(tickers, companies)
+    raise ValueError(f"Invalid matcher engine '{engine}'. Must be 'trie', 'automaton' or 'token'.")
+
 
 
 
 #======================================= Functions to fetch data from a subreddit =======================================
-def get_data(subreddit_name, reddit, data_dict, trie, company_to_ticker):
+def get_posts(subreddit_name, reddit):
+    """
+    Returns the listing of posts for a subreddit given by config.POST_TYPE and config.POST_LIMIT
+    Raises:
+        ValueError: If config.POST_TYPE is not a valid listing
+    """
+    subreddit = reddit.subreddit(subreddit_name)
+
+    if hasattr(subreddit, config.POST_TYPE):
+        return getattr(subreddit, config.POST_TYPE)(limit=config.POST_LIMIT)
+
+    raise ValueError(f"Invalid post_type '{config.POST_TYPE}'. Must be 'hot', 'new', 'rising', etc.")
+
+def expand_comments(post):
+    """
+    Expands the comment tree of a post and returns it as a flat list of comments, along with its coverage
+    In "full" mode every MoreComments is replaced. In "budgeted" mode expansion stops after
+    config.REDDIT_MAX_EXPANSIONS MoreComments or config.REDDIT_MAX_EXPANSION_SECONDS seconds.
+    """
+    if config.REDDIT_EXPANSION_MODE == "full":
+        post.comments.replace_more(limit=None)
+        return post.comments.list(), {"partial": False, "expansions": None, "skipped": 0, "calls_saved": 0}
+    elif config.REDDIT_EXPANSION_MODE == "budgeted":
+        return expand_comments_budgeted(post, config.REDDIT_MAX_EXPANSIONS, config.REDDIT_MAX_EXPANSION_SECONDS)
+    raise ValueError(f"Invalid expansion mode '{config.REDDIT_EXPANSION_MODE}'. Must be 'full' or 'budgeted'.")
+
+def expand_comments_budgeted(post, max_expansions, max_seconds):
+    """
+    Expands at most max_expansions MoreComments of a post, for at most max_seconds, highest scored branches first
+    Returns:
+        list: Flat list of the comments fetched
+        dict: Coverage of the post: whether it is partial, MoreComments expanded and skipped, and an
+            estimate of the API calls a full expansion would still have made
+    """
+    start = time.time()
+    comments = []
+    seen_ids = set()
+    # Score of every comment (and the post itself) so MoreComments can be ranked by their parent's score
+    scores = {post.fullname: post.score}
+    queue = []
+    order = itertools.count()
+
+    def add(items):
+        more_comments = []
+        for item in items:
+            if isinstance(item, MoreComments):
+                more_comments.append(item)
+            elif item.id not in seen_ids:
+                seen_ids.add(item.id)
+                comments.append(item)
+                scores[item.fullname] = item.score
+        for more in more_comments:
+            heapq.heappush(queue, (-scores.get(more.parent_id, 0), -more.count, next(order), more))
+
+    add(post.comments.list())
+    expansions = 0
+    while queue and expansions < max_expansions and time.time() - start < max_seconds:
+        more = heapq.heappop(queue)[-1]
+        new_items = []
+        for item in more.comments():
+            new_items.append(item)
+            # "Continue this thread" returns nested comments, morechildren returns them flat
+            if not isinstance(item, MoreComments):
+                new_items.extend(item.replies.list())
+        add(new_items)
+        expansions += 1
+
+    # Every skipped MoreComments is at least one request, morechildren takes up to 100 IDs at a time
+    calls_saved = sum(max(1, math.ceil(len(more.children) / 100)) for *_, more in queue)
+    coverage = {"partial": bool(queue), "expansions": expansions, "skipped": len(queue), "calls_saved": calls_saved}
+    return comments, coverage
+
+def count_comment_batch(matcher, company_to_ticker, batch):
+    """
+    Matches every comment in a batch on its own and credits the comment's score to the tickers it mentions
+    Args:
+        batch (list): (body, score) pairs
+    Returns:
+        dict: Tickers mentioned in the batch with their [raw mentions, likes]
+    """
+    batch_dict = defaultdict(lambda: [0, 0])
+    for body, score in batch:
+        for mentioned_ticker in matcher.search_and_count(body.lower(), batch_dict, company_to_ticker):
+            batch_dict[mentioned_ticker][1] += score
+    return dict(batch_dict)
+
+# Matcher for the processes of the comment matching pool, set once per process by init_match_worker()
+_worker_matcher = None
+_worker_company_to_ticker = None
+
+def init_match_worker(matcher, company_to_ticker):
+    """Initializer for the comment matching process pool"""
+    global _worker_matcher, _worker_company_to_ticker
+    _worker_matcher = matcher
+    _worker_company_to_ticker = company_to_ticker
+
+def count_comment_batch_in_worker(batch):
+    """count_comment_batch() with the matcher of the current pool process"""
+    return count_comment_batch(_worker_matcher, _worker_company_to_ticker, batch)
+
+def count_comment_mentions(comments, data_dict, matcher, company_to_ticker, pool=None, batch_size=config.REDDIT_COMMENT_BATCH_SIZE):
+    """
+    Credits each comment's own score to the tickers it mentions
+    Threads longer than one batch are matched in parallel batches when a process pool set up with
+    init_match_worker() is given. Returns a set of tickers mentioned
+    """
+    batches = [[(comment.body, comment.score) for comment in comments[i:i+batch_size]]
+               for i in range(0, len(comments), batch_size)]
+    if pool and len(batches) > 1:
+        results = pool.map(count_comment_batch_in_worker, batches)
+    else:
+        results = (count_comment_batch(matcher, company_to_ticker, batch) for batch in batches)
+
+    mentioned_tickers = set()
+    for batch_dict in results:
+        for mentioned_ticker, (mentions, likes) in batch_dict.items():
+            data_dict[mentioned_ticker][0] += mentions
+            data_dict[mentioned_ticker][1] += likes
+            if mentions:
+                mentioned_tickers.add(mentioned_ticker)
+    return mentioned_tickers
+
+def count_post_mentions(post, comments, data_dict, matcher, company_to_ticker, state=None, subreddit_name=None, pool=None):
+    """
+    Matches tickers in a post and its comments and updates data_dict with raw mentions and upvotes
+    In "post" attribution mode every ticker mentioned anywhere in the thread gets the post's upvotes.
+    In "comment" mode the post's upvotes only go to tickers in the title and text, and every comment
+    credits its own score to the tickers it mentions (see count_comment_mentions()).
+    With a RedditScrapeState only content that previous runs haven't counted is matched, and upvotes
+    are credited as the change since the last run, so data_dict holds this run's deltas.
+    """
+    record = state.get_post(post) if state else None
+    if record:
+        comments = [comment for comment in comments if comment.id not in record["comment_ids"]]
+        post_chunks = ()
+    else:
+        post_chunks = (post.title, post.selftext)
+
+    # Update data_dict with raw mentions and upvotes for mentioned tickers, streaming the text chunk by chunk
+    if config.REDDIT_ATTRIBUTION_MODE == "comment":
+        ups_tickers = search_and_count_chunks(matcher, post_chunks, data_dict, company_to_ticker)
+        mentioned_tickers = ups_tickers | count_comment_mentions(comments, data_dict, matcher, company_to_ticker, pool)
+    elif config.REDDIT_ATTRIBUTION_MODE == "post":
+        chunks = itertools.chain(post_chunks, (comment.body for comment in comments))
+        ups_tickers = mentioned_tickers = search_and_count_chunks(matcher, chunks, data_dict, company_to_ticker)
+    else:
+        raise ValueError(f"Invalid attribution mode '{config.REDDIT_ATTRIBUTION_MODE}'. Must be 'post' or 'comment'.")
+
+    if record:
+        ups_delta = post.ups - record["ups"]
+        for mentioned_ticker in record["tickers"]:
+            data_dict[mentioned_ticker][1] += ups_delta
+        for mentioned_ticker in ups_tickers - record["tickers"]:
+            data_dict[mentioned_ticker][1] += post.ups
+    else:
+        for mentioned_ticker in ups_tickers:
+            data_dict[mentioned_ticker][1] += post.ups
+
+    if state:
+        state.record_post(subreddit_name, post, [comment.id for comment in comments], ups_tickers)
+    return mentioned_tickers
+
+def iter_posts_to_fetch(subreddit_name, reddit, state=None):
+    """
+    Yields the posts of a subreddit that need fetching: every post previous runs haven't counted,
+    and the counted ones still young enough to be revisited for new comments
+    """
+    for post in get_posts(subreddit_name, reddit):
+        if state and state.is_counted(subreddit_name, post):
+            if post.id in state.posts and not state.is_stale(post):
+                yield post
+            # "new" listings are newest first, everything after a counted post too old to revisit is the same
+            elif config.POST_TYPE == "new" and state.is_stale(post):
+                break
+            continue
+        yield post
+
+def get_data(subreddit_name, reddit, data_dict, matcher, company_to_ticker, state=None):
     """
     Fetch data from a subreddit
     Args:  
         subreddit_name (str): Name of the subreddit to fetch data from
         reddit (praw.Reddit): Reddit instance given by setup_reddit()
-        tickers (list): List of tickers
         data_dict (dict): Dictionary with tickers as keys and a list of mentions and upvotes as values
+        matcher (Trie | AhoCorasick | TokenMatcher): Matcher given by setup_matcher()
+        company_to_ticker (dict): Mapping of company names to tickers
+        state (RedditScrapeState): Optional state of previous runs, only new content is counted
     """
     logger.info(f"Fetching data for subreddit: {subreddit_name}")
 
     # Fetch data from the subreddit
     try:
-        subreddit = reddit.subreddit(subreddit_name)
-        
-        if hasattr(subreddit, config.POST_TYPE):
-            posts = getattr(subreddit, config.POST_TYPE)(limit=config.POST_LIMIT)
-
-        else:
-            raise ValueError(f"Invalid post_type '{config.POST_TYPE}'. Must be 'hot', 'new', 'rising', etc.")
-
-        for post in posts:
-            post_title = post.title
-            post_text = post.selftext
-
-            # Fetch comments
-            post.comments.replace_more(limit=None)
-            comments_text = " ".join(comment.body for comment in post.comments.list())
-            post_and_comments_text = (post_title + " " + post_text + " " + comments_text).lower()
-
-            # Update data_dict with raw mentions and upvotes for mentioned tickers
-            mentioned_tickers = trie.search_and_count(post_and_comments_text, data_dict, company_to_ticker)
-            for mentioned_ticker in mentioned_tickers:
-                data_dict[mentioned_ticker][1] += post.ups
+        for post in iter_posts_to_fetch(subreddit_name, reddit, state):
+            comments, _ = expand_comments(post)
+            count_post_mentions(post, comments, data_dict, matcher, company_to_ticker, state, subreddit_name)
 
     except ValueError as ve:
         logger.error(f"Configuration error: {ve}")
     except Exception as e:
         logger.error(f"Unexpected error while fetching data from {subreddit_name}: {e}")
 
+def get_data_pipelined(subreddit_names, reddit, data_dict, matcher, company_to_ticker, max_workers=config.REDDIT_FETCH_WORKERS, state=None, reddit_factory=None):
+    """
+    Fetch data from several subreddits, overlapping comment expansion with matching
+    A producer walks the post listings of every subreddit, a bounded thread pool expands comment
+    trees (replace_more) concurrently and the calling thread runs the matcher on finished posts.
+    A praw.Reddit instance isn't thread safe, so every worker thread builds its own with reddit_factory
+    and fetches the post again through it, by ID, before expanding it (a listing's posts are fetched
+    again for their comments anyway). Without a reddit_factory comments are expanded on the calling
+    thread with reddit, one post at a time.
+    Each instance runs PRAW's rate limiter, which paces requests by the X-Ratelimit-Remaining and
+    X-Ratelimit-Reset headers of the responses. The limit is per client ID, so every instance sees
+    the same shrinking budget and waits once it runs low, and at most max_workers + 1 requests
+    (the workers and the listing) are in flight at a time.
+    Args:
+        subreddit_names (list): Names of the subreddits to fetch data from
+        reddit (praw.Reddit): Reddit instance given by setup_reddit()
+        data_dict (dict): Dictionary with tickers as keys and a list of mentions and upvotes as values
+        matcher (Trie | AhoCorasick | TokenMatcher): Matcher given by setup_matcher()
+        company_to_ticker (dict): Mapping of company names to tickers
+        max_workers (int): Number of posts whose comments are expanded at the same time
+        state (RedditScrapeState): Optional state of previous runs, only new content is counted
+        reddit_factory (callable): Returns a new praw.Reddit with the same credentials as reddit, called once per worker thread
+    Returns:
+        dict: Number of posts processed and failed, elapsed seconds, posts per second, MoreComments
+            expanded and skipped, API calls saved versus full expansion and the coverage of every post
+    """
+    stats = {"posts": 0, "failed_posts": 0, "elapsed": 0.0, "posts_per_sec": 0.0,
+             "expansions": 0, "skipped": 0, "calls_saved": 0, "partial_posts": 0, "coverage": {}}
+    start = time.time()
+
+    worker = threading.local()
+
+    def expand_in_worker(post):
+        # Every worker thread gets its own Reddit instance and refetches the post through it
+        if not hasattr(worker, "reddit"):
+            worker.reddit = reddit_factory()
+        return expand_comments(worker.reddit.submission(id=post.id))
+
+    def expand_inline(post):
+        future = Future()
+        try:
+            future.set_result(expand_comments(post))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def consume(subreddit_name, post, future):
+        try:
+            comments, coverage = future.result()
+            count_post_mentions(post, comments, data_dict, matcher, company_to_ticker, state, subreddit_name, match_pool)
+            stats["posts"] += 1
+            stats["coverage"][post.id] = coverage
+            stats["expansions"] += coverage["expansions"] or 0
+            stats["skipped"] += coverage["skipped"]
+            stats["calls_saved"] += coverage["calls_saved"]
+            stats["partial_posts"] += coverage["partial"]
+        except Exception as e:
+            stats["failed_posts"] += 1
+            logger.error(f"Unexpected error while processing post {getattr(post, 'id', None)} from {subreddit_name}: {e}")
+
+    with ExitStack() as stack:
+        # Long threads are matched comment by comment in parallel batches when attributing per comment
+        match_pool = None
+        if config.REDDIT_ATTRIBUTION_MODE == "comment" and config.REDDIT_MATCH_PROCESSES > 1:
+            match_pool = stack.enter_context(ProcessPoolExecutor(
+                max_workers=config.REDDIT_MATCH_PROCESSES,
+                initializer=init_match_worker,
+                initargs=(matcher, company_to_ticker)
+            ))
+
+        # At most 2 * max_workers posts are in flight so the producer can't run far ahead of the matcher
+        pool = stack.enter_context(ThreadPoolExecutor(max_workers=max_workers))
+        in_flight = deque()
+        for subreddit_name in subreddit_names:
+            logger.info(f"Fetching data for subreddit: {subreddit_name}")
+            try:
+                for post in iter_posts_to_fetch(subreddit_name, reddit, state):
+                    future = pool.submit(expand_in_worker, post) if reddit_factory else expand_inline(post)
+                    in_flight.append((subreddit_name, post, future))
+                    while len(in_flight) >= 2 * max_workers:
+                        consume(*in_flight.popleft())
+            except ValueError as ve:
+                logger.error(f"Configuration error: {ve}")
+            except Exception as e:
+                logger.error(f"Unexpected error while fetching data from {subreddit_name}: {e}")
+
+        while in_flight:
+            consume(*in_flight.popleft())
+
+    stats["elapsed"] = time.time() - start
+    stats["posts_per_sec"] = stats["posts"] / stats["elapsed"] if stats["elapsed"] > 0 else 0.0
+    logger.info(f"Processed {stats['posts']} posts ({stats['failed_posts']} failed) in {stats['elapsed']:.1f}s, {stats['posts_per_sec']:.2f} posts/sec")
+    if config.REDDIT_EXPANSION_MODE == "budgeted":
+        logger.info(f"Expanded {stats['expansions']} MoreComments, skipped {stats['skipped']} on {stats['partial_posts']} partially covered posts, "
+                    f"saving at least {stats['calls_saved']} API calls versus full expansion")
+    return stats
+
 
 # Driver Function
 def run_reddit_scrape():
@@ -184,24 +835,34 @@ def run_reddit_scrape():
     Args:
         subreddit_name (str): Name of the subreddit to fetch data from
     Returns:
-        data (dict): A dictionary with tickers as keys and a list of mentions and upvotes as values
+        data (dict): A dictionary with tickers as keys and a list of mentions and upvotes as values.
+            With config.REDDIT_INCREMENTAL (the default) these are this run's deltas, the mentions in
+            posts and comments no earlier run counted and the upvotes gained since, not totals
     """
     # Run setup fumctions
     setup_logger()
-    reddit = setup_reddit(load_env_vars())
+    env_vars = load_env_vars()
+    reddit = setup_reddit(env_vars)
     company_to_ticker = setup_company_to_ticker()
     tickers = list(set(company_to_ticker.values()))
     companies = list(company_to_ticker.keys())
-    trie = setup_trie(tickers, companies)
+    matcher = setup_matcher(tickers, companies)
 
 
     # Create a dictionary to store the data
     data_dict = {ticker : [0, 0] for ticker in tickers}
 
+    # Only count what previous runs haven't, so data_dict holds this run's deltas
+    state = None
+    if config.REDDIT_INCREMENTAL:
+        state = RedditScrapeState.load(config.REDDIT_STATE_PATH, config.REDDIT_REVISIT_HOURS)
+
     # Get the damn data
-    subreddit_names = config.SUBREDDIT_NAMES
-    for subreddit_name in subreddit_names:
-        get_data(subreddit_name, reddit, data_dict, trie, company_to_ticker)
+    get_data_pipelined(config.SUBREDDIT_NAMES, reddit, data_dict, matcher, company_to_ticker, state=state,
+                       reddit_factory=lambda: setup_reddit(env_vars))
+
+    if state:
+        state.save()
 
     # Puts tickers with most raw mentions at end of dictionary for debugging purposes
     sorted_data_dict = dict(sorted(data_dict.items(), key=lambda item: item[1][0]))
@@ -0,0 +1,97 @@
+# benchmarks/reddit_matchers.py compares the ticker matchers used by RedditAPI on a synthetic comment corpus
+# Run from Backend/: python benchmarks/reddit_matchers.py
+
+import gc
+import os
+import sys
+import time
+import random
+import contextlib
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from RedditAPI import setup_company_to_ticker, setup_trie, setup_automaton, setup_token_matcher
+
+# Filler vocabulary roughly shaped like r/stocks comments
+COMMON_WORDS = (
+    "the to and a of i it is that you for in this on my be was have with but not just they are so "
+    "if at what like would buy sell calls puts market stock shares price earnings guidance today "
+    "week year long short hold bought sold dip rally crash bull bear money think going up down "
+    "growth revenue margin valuation cash debt dividend split yolo options expiry chart support "
+    "resistance volume news fed rates inflation cpi jobs report analyst upgrade downgrade target"
+).split()
+PUNCTUATION = ["", "", "", "", ",", ".", "!", "?", ":"]
+
+
+def build_corpus(company_to_ticker, num_comments=2000, seed=7):
+    """Builds a list of comments with occasional ticker and company mentions mixed into filler words"""
+    rng = random.Random(seed)
+    tickers = sorted(set(company_to_ticker.values()))
+    companies = sorted(company_to_ticker.keys())
+    comments = []
+    for _ in range(num_comments):
+        words = []
+        for _ in range(rng.randint(5, 120)):
+            roll = rng.random()
+            if roll < 0.03:
+                word = rng.choice(tickers).upper() if rng.random() < 0.5 else "$" + rng.choice(tickers)
+            elif roll < 0.05:
+                word = rng.choice(companies).title()
+            else:
+                word = rng.choice(COMMON_WORDS)
+            words.append(word + rng.choice(PUNCTUATION))
+        comments.append(" ".join(words))
+    return comments
+
+
+def time_matcher(matcher, text, tickers, company_to_ticker, repeats):
+    """Returns the best wall-clock time over repeats and the resulting mention counts"""
+    best = float("inf")
+    data_dict = None
+    # Garbage collections set off by earlier allocations otherwise land in random runs
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            data_dict = {ticker: [0, 0] for ticker in tickers}
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                start = time.perf_counter()
+                matcher.search_and_count(text, data_dict, company_to_ticker)
+                best = min(best, time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return best, data_dict
+
+
+def main(num_comments=2000, repeats=7):
+    company_to_ticker = setup_company_to_ticker()
+    tickers = list(set(company_to_ticker.values()))
+    companies = list(company_to_ticker.keys())
+
+    start = time.perf_counter()
+    trie = setup_trie(tickers, companies)
+    trie_build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    automaton = setup_automaton(tickers, companies, cache_path=None)
+    automaton_build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    token_matcher = setup_token_matcher(tickers, companies)
+    token_build = time.perf_counter() - start
+
+    text = " ".join(build_corpus(company_to_ticker, num_comments)).lower()
+    print(f"Corpus: {num_comments} comments, {len(text):,} characters")
+    print(f"Build time - Trie: {trie_build:.3f}s, AhoCorasick: {automaton_build:.3f}s, TokenMatcher: {token_build:.3f}s")
+
+    trie_time, trie_counts = time_matcher(trie, text, tickers, company_to_ticker, repeats)
+    automaton_time, automaton_counts = time_matcher(automaton, text, tickers, company_to_ticker, repeats)
+    token_time, token_counts = time_matcher(token_matcher, text, tickers, company_to_ticker, repeats)
+
+    print(f"Trie:         {trie_time:.3f}s ({len(text) / trie_time / 1e6:.2f} M chars/s)")
+    print(f"AhoCorasick:  {automaton_time:.3f}s ({len(text) / automaton_time / 1e6:.2f} M chars/s), {trie_time / automaton_time:.1f}x")
+    print(f"TokenMatcher: {token_time:.3f}s ({len(text) / token_time / 1e6:.2f} M chars/s), {trie_time / token_time:.1f}x")
+    print(f"Identical counts: {trie_counts == automaton_counts == token_counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# benchmarks/reddit_memory.py compares peak memory of matching a thread as one joined string versus streaming its chunks
+# Run from Backend/: python benchmarks/reddit_memory.py
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from RedditAPI import setup_company_to_ticker, setup_matcher, search_and_count_chunks
+from reddit_matchers import build_corpus
+
+
+def joined(matcher, title, selftext, comments, data_dict, company_to_ticker):
+    """How get_data used to build the text of a post"""
+    comments_text = " ".join(comments)
+    post_and_comments_text = (title + " " + selftext + " " + comments_text).lower()
+    return matcher.search_and_count(post_and_comments_text, data_dict, company_to_ticker)
+
+
+def streamed(matcher, title, selftext, comments, data_dict, company_to_ticker):
+    chunks = [title, selftext] + comments
+    return search_and_count_chunks(matcher, iter(chunks), data_dict, company_to_ticker)
+
+
+def measure(function, *args):
+    """Returns the peak memory allocated while function runs and the time it took"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    function(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, elapsed
+
+
+def main(thread_sizes=(500, 2000, 8000)):
+    company_to_ticker = setup_company_to_ticker()
+    tickers = list(set(company_to_ticker.values()))
+    matcher = setup_matcher(tickers, list(company_to_ticker.keys()))
+
+    print(f"{'comments':>8} {'thread size':>12} {'joined peak':>12} {'streamed peak':>14} {'joined time':>12} {'streamed time':>14}")
+    for num_comments in thread_sizes:
+        comments = build_corpus(company_to_ticker, num_comments)
+        size = sum(len(comment) for comment in comments)
+        results = []
+        for function in (joined, streamed):
+            data_dict = {ticker: [0, 0] for ticker in tickers}
+            results.append(measure(function, matcher, "Daily discussion", "", comments, data_dict, company_to_ticker))
+        (joined_peak, joined_time), (streamed_peak, streamed_time) = results
+        print(f"{num_comments:>8} {size / 1e6:>10.2f}MB {joined_peak / 1e6:>10.2f}MB {streamed_peak / 1e6:>12.2f}MB "
+              f"{joined_time:>11.3f}s {streamed_time:>13.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# benchmarks/stocktwits_parsing.py compares parsing a final StockTwits page the old way (BeautifulSoup, one parse per
+# question) with a single lxml parse_page call
+# Run from Backend/: python benchmarks/stocktwits_parsing.py [saved_page.html ...]
+# Without saved pages, synthetic pages from tests/fake_stocktwits.py are used
+
+import os
+import sys
+import time
+import logging
+from datetime import datetime, timedelta
+import pytz
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "stocktwits")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "tests")))
+
+from html_parsing import StockTwitsHTMLParser
+from fake_stocktwits import build_page
+
+
+def old_flow(parser, html, target_datetime):
+    """What scrape_ticker did with the final HTML before parse_page: a parse per call"""
+    parser.check_earliest_post_date(html, target_datetime)
+    metrics = parser.parse_posts_to_metrics(html, "AAPL", target_datetime)
+    posts = parser.parse_posts_to_list(html, "AAPL", target_datetime)
+    return metrics, posts
+
+
+def new_flow(parser, html, target_datetime):
+    parser.check_earliest_post_date(html, target_datetime)
+    page = parser.parse_page(html, "AAPL", target_datetime)
+    return page.metrics, page.posts
+
+
+def best_time(function, *args, repeats=3):
+    best = float("inf")
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(paths=()):
+    logging.disable(logging.WARNING)
+    target_datetime = datetime.now(pytz.UTC) - timedelta(hours=24)
+    soup_parser = StockTwitsHTMLParser(backend="bs4")
+    lxml_parser = StockTwitsHTMLParser(backend="lxml")
+
+    if paths:
+        pages = []
+        for path in paths:
+            with open(path, "r", encoding="utf-8") as f:
+                pages.append((os.path.basename(path), f.read()))
+    else:
+        # Roughly a quiet ticker, a busy one and an AAPL/TSLA sized infinite scroll
+        pages = [(f"{n} posts", build_page(n, minutes_apart=max(1, 1440 // n))) for n in (100, 1000, 4000)]
+
+    print(f"{'page':>14} {'size':>9} {'bs4 old flow':>13} {'lxml parse_page':>16} {'speedup':>8} {'same result':>12}")
+    for name, html in pages:
+        old_time, old_result = best_time(old_flow, soup_parser, html, target_datetime)
+        new_time, new_result = best_time(new_flow, lxml_parser, html, target_datetime)
+        print(f"{name:>14} {len(html) / 1e6:>7.2f}MB {old_time:>12.3f}s {new_time:>15.3f}s {old_time / new_time:>7.1f}x "
+              f"{str(old_result == new_result):>12}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
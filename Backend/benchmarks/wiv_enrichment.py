@@ -0,0 +1,98 @@
+# benchmarks/wiv_enrichment.py times the market data enrichment of Exec.run against a stubbed yfinance, serially (what
+# Exec.run did) and over MarketDataEnricher pools of increasing size
+# Run from Backend/: python benchmarks/wiv_enrichment.py [tickers] [seconds per request]
+# The stub sleeps for every request yfinance would make, the real wiv.py functions run on top of it
+
+import os
+import sys
+import time
+import logging
+from collections import namedtuple
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import wiv
+from enrichment import MarketDataEnricher, default_calls
+
+OptionChain = namedtuple("OptionChain", ["calls", "puts"])
+
+
+class StubTicker:
+    """The parts of yfinance.Ticker wiv.py uses, each request costing latency seconds"""
+
+    def __init__(self, symbol, latency):
+        self.symbol = symbol
+        self.latency = latency
+
+    @property
+    def options(self):
+        time.sleep(self.latency)
+        today = datetime.today()
+        return tuple((today + timedelta(days=d)).strftime("%Y-%m-%d") for d in (7, 14, 30, 60))
+
+    def option_chain(self, date):
+        time.sleep(self.latency)
+        strikes = np.arange(80.0, 121.0, 2.5)
+        chain = lambda: pd.DataFrame({"strike": strikes, "impliedVolatility": np.full(len(strikes), 0.4),
+                                      "openInterest": np.arange(len(strikes)) * 10})
+        return OptionChain(chain(), chain())
+
+    def history(self, period="1d", interval="1d", auto_adjust=True):
+        time.sleep(self.latency)
+        hours = 7 if interval == "60m" else 1
+        index = pd.date_range("2025-06-11 09:30", periods=hours, freq="h", name="Datetime")
+        return pd.DataFrame({"Close": np.linspace(100, 101, hours)}, index=index)
+
+    @property
+    def info(self):
+        time.sleep(self.latency)
+        return {"sharesOutstanding": 1_000_000}
+
+
+class StubYFinance:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def Ticker(self, symbol):
+        return StubTicker(symbol, self.latency)
+
+
+def serial(tickers):
+    """What Exec.run did before the enrichment stage"""
+    for ticker in tickers:
+        int(wiv.calculate_iv_sum(ticker))
+        wiv.get_stockprice_last_day(ticker)
+        wiv.get_marketcap_last_day(ticker)
+
+
+def main(num_tickers=40, latency=0.05):
+    logging.disable(logging.WARNING)
+    wiv.yf = StubYFinance(latency)
+    tickers = [f"T{i}" for i in range(num_tickers)]
+
+    # No batch, so every ticker's hourly bars are fetched on their own (once, then shared by price and market cap)
+    wiv.load_hourly_bars([])
+    start = time.perf_counter()
+    serial(tickers)
+    serial_time = time.perf_counter() - start
+    print(f"{num_tickers} tickers, {latency * 1000:.0f}ms a request, 5 requests a ticker (no bulk hourly download)")
+    print(f"{'workers':>8} {'seconds':>9} {'speedup':>8}")
+    print(f"{'serial':>8} {serial_time:>9.2f} {1.0:>7.1f}x")
+
+    for workers in (1, 2, 4, 8, 16, 32):
+        # No rate limit here, it would cap the scaling at requests_per_second
+        enricher = MarketDataEnricher(default_calls(), max_workers=workers, requests_per_second=1e6)
+        wiv.load_hourly_bars([])
+        start = time.perf_counter()
+        records = enricher.enrich(tickers)
+        elapsed = time.perf_counter() - start
+        assert all(record.ok for record in records.values())
+        print(f"{workers:>8} {elapsed:>9.2f} {serial_time / elapsed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 40, float(args[1]) if len(args) > 1 else 0.05)
@@ -0,0 +1,121 @@
+# benchmarks/wiv_iv_sum.py compares the per-strike loop calculate_iv_sum used to weight IVs with wiv.weighted_iv
+# Run from Backend/: python benchmarks/wiv_iv_sum.py
+# Uses the option chains in tests/fixtures/option_chains plus synthetic chains with more strikes
+
+import os
+import sys
+import json
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import wiv
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "..", "tests", "fixtures", "option_chains")
+
+
+def loop_weighted_iv(calls, puts, current_price):
+    """What calculate_iv_sum did with the chain before wiv.weighted_iv"""
+    calls = calls.copy()
+    puts = puts.copy()
+    calls['strike_diff'] = abs(calls['strike'] - current_price)
+    puts['strike_diff'] = abs(puts['strike'] - current_price)
+
+    # Sorted by 'strike_diff'
+    sorted_calls = calls.sort_values('strike_diff')
+    sorted_puts = puts.sort_values('strike_diff')
+
+    top_strikes = sorted_calls['strike'].unique()
+
+    sum_weighted_avg_iv = 0
+    count = 0  # strikes processed?
+    total_oi = 0
+
+    for strike in top_strikes:
+        call_option = calls[calls['strike'] == strike]
+        put_option = puts[puts['strike'] == strike]
+
+        if call_option.empty or put_option.empty:
+            continue
+
+        call_option = call_option.iloc[0]
+        put_option = put_option.iloc[0]
+
+        call_iv = call_option['impliedVolatility']
+        put_iv = put_option['impliedVolatility']
+
+        # NaN IVs not included
+        if np.isnan(call_iv) or np.isnan(put_iv):
+            continue
+
+        call_iv = abs(call_iv)
+        put_iv = abs(put_iv)
+
+        call_oi = call_option['openInterest']
+        put_oi = put_option['openInterest']
+
+        total_oi += call_oi + put_oi
+
+        if total_oi > 0:
+            weighted_avg_iv = (call_iv * call_oi + put_iv * put_oi)
+        else:
+            weighted_avg_iv = (call_iv + put_iv)
+
+        sum_weighted_avg_iv += weighted_avg_iv
+        count += 1
+
+        if count >= 5:
+            break
+
+    if total_oi == 0:
+        return 0
+    return sum_weighted_avg_iv / total_oi
+
+
+def load_fixture(name):
+    calls = pd.read_csv(os.path.join(FIXTURES, f"{name}_calls.csv"))
+    puts = pd.read_csv(os.path.join(FIXTURES, f"{name}_puts.csv"))
+    return calls, puts
+
+
+def synthetic_chain(num_strikes, current_price=100.0, seed=0):
+    """A chain with num_strikes strikes either side of current_price and a NaN IV here and there"""
+    rng = np.random.default_rng(seed)
+    strikes = np.round(current_price + (np.arange(num_strikes) - num_strikes / 2) * 0.5, 2)
+    def side():
+        iv = rng.uniform(0.2, 1.5, num_strikes)
+        iv[rng.random(num_strikes) < 0.05] = np.nan
+        return pd.DataFrame({"strike": strikes, "impliedVolatility": iv,
+                             "openInterest": rng.integers(0, 5000, num_strikes).astype(float)})
+    return side(), side()
+
+
+def best_time(function, *args, repeats=5):
+    best = float("inf")
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    with open(os.path.join(FIXTURES, "expected.json")) as f:
+        expected = json.load(f)
+    chains = [(name, *load_fixture(name), case["current_price"]) for name, case in expected.items()]
+    chains += [(f"{n} strikes", *synthetic_chain(n), 100.0) for n in (100, 1000, 5000)]
+
+    print(f"{'chain':>18} {'rows':>6} {'loop':>10} {'weighted_iv':>12} {'speedup':>8} {'same result':>12}")
+    for name, calls, puts, current_price in chains:
+        old_time, old_result = best_time(loop_weighted_iv, calls, puts, current_price)
+        new_time, new_result = best_time(wiv.weighted_iv, calls, puts, current_price)
+        same = bool(np.isclose(old_result, new_result, rtol=1e-12, atol=0))
+        print(f"{name:>18} {len(calls) + len(puts):>6} {old_time * 1000:>8.2f}ms {new_time * 1000:>10.2f}ms "
+              f"{old_time / new_time:>7.1f}x {str(same):>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,3 +9,29 @@ POST_TYPE = "new"  # Type of posts to fetch: "hot", "new", "random", "rising", o
 POST_LIMIT = 100  # Number osf posts to fetch per subreddit
 JOBLIB_PATH_STOCKTWITS = "6-11real.joblib"  # Path to the joblib file for storing scraped data
 JOBLIB_PATH_REDDIT = "reddit6-10.joblib"  # Path to the joblib file for storing scraped Reddit data
+AUTOMATON_CACHE_PATH = "ticker_automaton.pkl"  # Path to the pickled Aho-Corasick automaton used for Reddit ticker matching
+MATCHER_ENGINE = "trie"  # Engine used to find tickers in Reddit text: "trie", "automaton" or "token" (same counts as the trie, about 4-5x faster)
+REDDIT_FETCH_WORKERS = 4  # Number of Reddit posts whose comment trees are expanded concurrently
+REDDIT_INCREMENTAL = True  # Only count Reddit posts/comments that previous runs haven't counted. run_reddit_scrape then returns per-run deltas (new mentions, upvotes gained since the last run) instead of totals; False for totals
+REDDIT_STATE_PATH = "reddit_state.joblib"  # Sidecar to JOBLIB_PATH_REDDIT with the last seen posts and processed comment IDs
+REDDIT_REVISIT_HOURS = 24  # Posts older than this are not fetched again for new comments
+REDDIT_EXPANSION_MODE = "full"  # How comment trees are expanded: "full" (replace_more(limit=None)) or "budgeted" (opt in, large threads are only partly counted)
+REDDIT_MAX_EXPANSIONS = 32  # MoreComments expanded per post in budgeted mode, highest scored branches first
+REDDIT_MAX_EXPANSION_SECONDS = 15  # Time spent expanding comments per post in budgeted mode
+REDDIT_ATTRIBUTION_MODE = "post"  # Upvotes credited to mentioned tickers: "post" (post.ups for the whole thread) or "comment" (each comment's own score)
+REDDIT_MATCH_PROCESSES = 4  # Processes matching comment batches in parallel in "comment" attribution mode
+REDDIT_COMMENT_BATCH_SIZE = 500  # Comments per batch sent to a matching process
+STOCKTWITS_BROWSERS = 4  # Logged in browsers scraping StockTwits in parallel, each pulling tickers from a shared work-stealing queue
+STOCKTWITS_RESOURCE_POLICY = "full"  # Requests StockTwits browsers block: "full" (images, media, fonts, trackers), "trackers" or "none"
+STOCKTWITS_PROFILE_DIR = "stocktwits_profiles"  # Persistent browser profiles (one per browser) so StockTwits logins survive browser restarts
+STOCKTWITS_COOKIE_JAR = "stocktwits_cookies.bin"  # Encrypted StockTwits session cookies (key: STOCKTWITS_COOKIE_KEY or STOCK_PASS), skips the login form on new browsers
+STOCKTWITS_SCHEDULE_PATH = "stocktwits_schedule.joblib"  # Per-ticker daily mentions from earlier runs, used to order tickers and spot dead ones
+STOCKTWITS_TOP_N = 100  # Tickers whose coverage time is estimated and logged before each run
+STOCKTWITS_MISSING_SYMBOLS = "stocktwits_missing_symbols.joblib"  # Tickers with no StockTwits symbol page, skipped until their entry expires
+STOCKTWITS_SPANS = "stocktwits_spans.jsonl"  # Timing of every scrape phase as JSON lines, appended to each run
+SUPABASE_BATCH_SIZE = 500  # Rows per upsert when syncing a run's results to full_data_with_accel
+ENRICHMENT_WORKERS = 8  # Threads fetching WIV, hourly price and market cap from Yahoo Finance in parallel
+ENRICHMENT_REQUESTS_PER_SECOND = 5  # Requests a second allowed to each market data host
+ENRICHMENT_TIMEOUT = 30  # Seconds before a single market data call is abandoned
+WIV_DOWNLOAD_CHUNK = 200  # Tickers per multi-ticker yf.download of hourly bars
+WIV_METADATA_CACHE = "wiv_metadata.joblib"  # Shares outstanding and option expiries by ticker, refreshed when their TTL runs out (python metadata_cache.py refreshes all)
@@ -0,0 +1,246 @@
+# enrichment.py fetches each ticker's market data (weighted IV, hourly price and market cap from wiv.py) for Exec.run
+# over a bounded thread pool, with a rate limit and circuit breaker per host and a timeout per call
+
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+YAHOO_HOST = "query2.finance.yahoo.com"
+
+
+class CircuitOpenError(Exception):
+    """A call skipped because its host's circuit breaker is open"""
+
+
+@dataclass
+class EnrichmentCall:
+    fetch: Callable[[str], Any]
+    default: Any  # the value a ticker gets when the call fails
+    host: str = YAHOO_HOST
+    requests: int = 1  # HTTP requests one call makes, what it costs against the host's rate limit
+
+
+def default_calls() -> Dict[str, EnrichmentCall]:
+    """The wiv.py calls Exec.run made one after another for every ticker"""
+    import wiv
+    return {
+        # option expiries, the chain and today's price
+        "wiv": EnrichmentCall(lambda ticker: int(wiv.calculate_iv_sum(ticker)), default=0, requests=3),
+        # hourly prices come from the wiv.load_hourly_bars batch, market cap only needs the shares outstanding. A ticker
+        # missing from the batch is fetched once for both, charged against wiv.hourly_limiter
+        "stock_price": EnrichmentCall(wiv.get_stockprice_last_day, default=[], requests=0),
+        "market_cap": EnrichmentCall(wiv.get_marketcap_last_day, default=[], requests=1),
+    }
+
+
+@dataclass
+class EnrichmentRecord:
+    ticker: str
+    values: Dict[str, Any] = field(default_factory=dict)  # call name -> result, the call's default if it failed
+    errors: Dict[str, str] = field(default_factory=dict)  # call name -> why it failed
+    seconds: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+class RateLimiter:
+    """Token bucket: rate requests a second on average, at most burst at once"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, cost: float = 1) -> float:
+        """Block until cost tokens are free, returns the seconds waited"""
+        cost = min(cost, self.burst)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= cost:
+                    self.tokens -= cost
+                    return waited
+                delay = (cost - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class CircuitBreaker:
+    """Stops calls to a host after failure_threshold failures in a row, lets one through again after cooldown seconds"""
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 60):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_running = False
+        self.trips = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.cooldown else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self.trial_running:
+                self.trial_running = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self.trial_running = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    self.trips += 1
+                self.opened_at = time.monotonic()
+
+
+def is_host_failure(error: BaseException) -> bool:
+    """Errors that say the host is struggling (timeouts, connection errors, rate limiting, 5xx), as opposed to a
+    ticker with no options or no price data, which says nothing about the next ticker"""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    try:
+        import requests
+        if isinstance(error, requests.RequestException):
+            return True
+    except ImportError:
+        pass
+    name = type(error).__name__
+    return "RateLimit" in name or "Timeout" in name or "Connection" in name
+
+
+class MarketDataEnricher:
+    """Runs every call for every ticker over max_workers threads and returns a record per ticker.
+
+    A failing call only fails that field of that ticker (it gets the call's default). Calls are paced per host
+    by a token bucket (requests_per_second, each call costing its number of requests), a call running longer
+    than call_timeout is abandoned, and after breaker_threshold host failures in a row the host's remaining
+    calls fail straight away until breaker_cooldown has passed.
+    """
+
+    def __init__(self,
+                 calls: Optional[Dict[str, EnrichmentCall]] = None,
+                 max_workers: int = 8,
+                 requests_per_second: float = 5,
+                 call_timeout: float = 30,
+                 breaker_threshold: int = 5,
+                 breaker_cooldown: float = 60,
+                 logger: Optional[logging.Logger] = None):
+        self.calls = calls if calls is not None else default_calls()
+        self.max_workers = max_workers
+        self.requests_per_second = requests_per_second
+        self.call_timeout = call_timeout
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.logger = logger or logging.getLogger(__name__)
+
+        self.limiters: Dict[str, RateLimiter] = {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, host: str = YAHOO_HOST) -> RateLimiter:
+        """The host's rate limiter, for requests made outside a call's own cost"""
+        return self._host_state(host)[0]
+
+    def _host_state(self, host: str) -> tuple[RateLimiter, CircuitBreaker]:
+        with self._lock:
+            if host not in self.limiters:
+                self.limiters[host] = RateLimiter(self.requests_per_second)
+                self.breakers[host] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+            return self.limiters[host], self.breakers[host]
+
+    def _run_call(self, ticker: str, name: str, started: Dict[tuple, float]) -> Any:
+        call = self.calls[name]
+        limiter, breaker = self._host_state(call.host)
+        if not breaker.allow():
+            raise CircuitOpenError(f"circuit open for {call.host}")
+
+        limiter.acquire(call.requests)
+        # The timeout only counts from here, time spent queued or rate limited isn't the host's fault
+        started[(ticker, name)] = time.monotonic()
+        try:
+            result = call.fetch(ticker)
+        except Exception as e:
+            if is_host_failure(e):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            raise
+        breaker.record_success()
+        return result
+
+    def enrich(self, tickers: List[str]) -> Dict[str, EnrichmentRecord]:
+        records = {ticker: EnrichmentRecord(ticker) for ticker in tickers}
+        started: Dict[tuple, float] = {}
+        start = time.time()
+
+        pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            pending = {
+                pool.submit(self._run_call, ticker, name, started): (ticker, name)
+                for ticker in tickers for name in self.calls
+            }
+            while pending:
+                done, _ = wait(pending, timeout=min(1.0, self.call_timeout), return_when=FIRST_COMPLETED)
+                for future in done:
+                    ticker, name = pending.pop(future)
+                    self._finish(records[ticker], name, future, started)
+
+                now = time.monotonic()
+                for future, (ticker, name) in list(pending.items()):
+                    call_start = started.get((ticker, name))
+                    if call_start is not None and now - call_start > self.call_timeout:
+                        # The thread can't be stopped, its result is ignored when it does return
+                        del pending[future]
+                        self._breaker(name).record_failure()
+                        self._fail(records[ticker], name, f"timed out after {self.call_timeout:.0f}s", now - call_start)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        failed = sum(1 for record in records.values() if not record.ok)
+        self.logger.info(f"Enriched {len(tickers)} tickers in {time.time() - start:.1f}s with {self.max_workers} workers, "
+                         f"{failed} with failed calls, circuit trips: {sum(b.trips for b in self.breakers.values())}")
+        return records
+
+    def _breaker(self, name: str) -> CircuitBreaker:
+        return self._host_state(self.calls[name].host)[1]
+
+    def _finish(self, record: EnrichmentRecord, name: str, future, started: Dict[tuple, float]) -> None:
+        call_start = started.get((record.ticker, name))
+        seconds = time.monotonic() - call_start if call_start is not None else 0.0
+        try:
+            record.values[name] = future.result()
+            record.seconds[name] = seconds
+        except Exception as e:
+            self._fail(record, name, f"{type(e).__name__}: {e}", seconds)
+
+    def _fail(self, record: EnrichmentRecord, name: str, error: str, seconds: float) -> None:
+        record.values[name] = self.calls[name].default
+        record.errors[name] = error
+        record.seconds[name] = seconds
+        self.logger.warning(f"{name} failed for {record.ticker}: {error}")
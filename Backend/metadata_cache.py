@@ -0,0 +1,138 @@
+# metadata_cache.py keeps yfinance values that rarely change (shares outstanding, option expiry dates) on disk so wiv.py
+# doesn't fetch them for every ticker on every run
+# Refresh every ticker's entries ahead of a run from Backend/: python metadata_cache.py [--force] [--fields options ...]
+
+import os
+import sys
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+from concurrent.futures import ThreadPoolExecutor
+
+DAY = 24 * 3600
+# Seconds each field stays fresh. Share counts move with quarterly filings, expiries when one passes or a weekly is listed
+DEFAULT_TTLS = {
+    "shares_outstanding": 7 * DAY,
+    "options": 1 * DAY,
+}
+
+
+class MetadataCache:
+    """Per-ticker metadata with a TTL per field, saved as a joblib dict {ticker: {field: (value, fetched_at)}}.
+
+    None is cached like any other value, so a ticker without shares outstanding (an ETF) isn't asked again
+    until its entry expires. Safe to use from the enrichment threads.
+    """
+
+    def __init__(self,
+                 path: Optional[str] = None,
+                 ttls: Optional[Dict[str, float]] = None,
+                 logger: Optional[logging.Logger] = None):
+        self.path = path
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.logger = logger or logging.getLogger(__name__)
+        self.tickers: Dict[str, Dict[str, tuple]] = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: Optional[str], **kwargs) -> "MetadataCache":
+        cache = cls(path, **kwargs)
+        if path and os.path.exists(path):
+            try:
+                import joblib
+                with open(path, 'rb') as f:
+                    cache.tickers = joblib.load(f)
+            except Exception as e:
+                cache.logger.warning(f"Could not load metadata cache from {path}: {e}")
+        return cache
+
+    def lookup(self, ticker: str, field: str, now: Optional[float] = None) -> tuple[bool, Any]:
+        """(True, value) if the field is cached and fresh, else (False, None)"""
+        now = now if now is not None else time.time()
+        with self._lock:
+            entry = self.tickers.get(ticker.upper(), {}).get(field)
+        if entry is None or now - entry[1] >= self.ttls.get(field, DAY):
+            return False, None
+        return True, entry[0]
+
+    def set(self, ticker: str, field: str, value: Any, now: Optional[float] = None) -> None:
+        with self._lock:
+            self.tickers.setdefault(ticker.upper(), {})[field] = (value, now if now is not None else time.time())
+
+    def get_or_fetch(self, ticker: str, field: str, fetch: Callable[[], Any]) -> Any:
+        found, value = self.lookup(ticker, field)
+        if found:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = fetch()
+        self.set(ticker, field, value)
+        return value
+
+    def refresh(self,
+                tickers: Iterable[str],
+                fetchers: Dict[str, Callable[[str], Any]],
+                max_workers: int = 8,
+                force: bool = False) -> Dict[str, int]:
+        """Fetch every expired (with force, every) field of every ticker, max_workers at a time"""
+        todo = [(ticker, field) for ticker in tickers for field in fetchers
+                if force or not self.lookup(ticker, field)[0]]
+        failed = 0
+
+        def fetch(item):
+            ticker, field = item
+            try:
+                self.set(ticker, field, fetchers[field](ticker))
+                return True
+            except Exception as e:
+                self.logger.warning(f"Could not refresh {field} for {ticker}: {e}")
+                return False
+
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for ok in pool.map(fetch, todo):
+                failed += not ok
+        self.logger.info(f"Refreshed {len(todo) - failed}/{len(todo)} metadata fields in {time.time() - start:.1f}s")
+        return {"refreshed": len(todo) - failed, "failed": failed}
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        import joblib
+        with self._lock:
+            tickers = {ticker: dict(fields) for ticker, fields in self.tickers.items()}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            joblib.dump(tickers, f)
+        os.replace(tmp_path, self.path)
+
+
+def main(argv=None):
+    import argparse
+    import config
+    import wiv
+
+    parser = argparse.ArgumentParser(description="Refresh the yfinance metadata cache wiv.py reads from")
+    parser.add_argument("--tickers-file", default="tickers.txt")
+    parser.add_argument("--cache", default=config.WIV_METADATA_CACHE)
+    parser.add_argument("--fields", nargs="+", choices=sorted(wiv.METADATA_FETCHERS), default=sorted(wiv.METADATA_FETCHERS))
+    parser.add_argument("--workers", type=int, default=config.ENRICHMENT_WORKERS)
+    parser.add_argument("--force", action="store_true", help="refetch fields that haven't expired too")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    with open(args.tickers_file, 'r') as f:
+        tickers = [line.strip() for line in f if line.strip()]
+
+    cache = MetadataCache.load(args.cache)
+    counts = cache.refresh(tickers, {field: wiv.METADATA_FETCHERS[field] for field in args.fields},
+                           max_workers=args.workers, force=args.force)
+    cache.save()
+    return 1 if counts["failed"] and not counts["refreshed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
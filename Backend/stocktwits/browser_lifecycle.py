@@ -0,0 +1,187 @@
+import os
+import time
+import signal
+import logging
+from typing import Dict, Iterable, List, Optional, Set
+
+# Process names a tracked PID must still have before it is killed, so a recycled PID is never hit
+BROWSER_PROCESS_NAMES = ("msedgedriver", "msedge", "microsoft-edge", "chromedriver", "chrome")
+
+
+def _read_proc(pid: int, name: str) -> Optional[str]:
+    try:
+        with open(f"/proc/{pid}/{name}", "rb") as f:
+            return f.read().decode(errors="replace")
+    except OSError:
+        return None
+
+
+def parent_pids() -> Dict[int, int]:
+    """pid -> parent pid for every process in /proc"""
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        stat = _read_proc(int(entry), "stat")
+        if stat:
+            # The name in brackets can contain spaces, the fields after it can't
+            fields = stat[stat.rfind(")") + 2:].split()
+            parents[int(entry)] = int(fields[1])
+    return parents
+
+
+def descendants(pid: int, parents: Optional[Dict[int, int]] = None) -> Set[int]:
+    parents = parents if parents is not None else parent_pids()
+    children: Dict[int, List[int]] = {}
+    for child, parent in parents.items():
+        children.setdefault(parent, []).append(child)
+
+    found, stack = set(), [pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            if child not in found:
+                found.add(child)
+                stack.append(child)
+    return found
+
+
+def is_browser_process(pid: int) -> bool:
+    cmdline = _read_proc(pid, "cmdline")
+    if not cmdline:
+        return False
+    program = os.path.basename(cmdline.split("\0")[0])
+    return any(name in program for name in BROWSER_PROCESS_NAMES)
+
+
+def rss_mb(pids: Iterable[int]) -> float:
+    """Resident memory of the processes in MB, processes that are gone count as 0"""
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    total = 0
+    for pid in pids:
+        statm = _read_proc(pid, "statm")
+        if statm:
+            total += int(statm.split()[1]) * page_size
+    return total / 1e6
+
+
+class BrowserLifecycle:
+    """Tracks the driver and browser processes one BrowserManager started, and decides when to recycle them.
+
+    The PIDs are written to pid_file, so the next run (after a crash or a supervisor restart) kills the
+    processes this browser left behind and nothing else; browsers running side by side stay untouched.
+    A browser is recycled once it has loaded max_pages pages or its processes use more than max_rss_mb.
+    """
+
+    def __init__(self,
+                 pid_file: Optional[str] = None,
+                 max_pages: Optional[int] = None,
+                 max_rss_mb: Optional[float] = None,
+                 logger: Optional[logging.Logger] = None):
+        self.pid_file = pid_file
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.logger = logger or logging.getLogger(__name__)
+
+        self.root_pid: Optional[int] = None
+        self.pids: Set[int] = set()
+        self.pages = 0
+        self.starts = 0
+        self.started_at: Optional[float] = None
+        self.first_ticker_latencies: List[float] = []  # seconds from each (re)start to its first finished ticker
+        self._awaiting_first_ticker = False
+
+    def track(self, root_pid: Optional[int]) -> None:
+        """Track the driver service process and every process under it"""
+        self.root_pid = root_pid
+        self.pages = 0
+        self.starts += 1
+        self.started_at = time.time()
+        self._awaiting_first_ticker = True
+        self.refresh()
+
+    def refresh(self) -> Set[int]:
+        """Pick up processes the browser started since (renderers, GPU, network service)"""
+        if self.root_pid is None:
+            return self.pids
+        try:
+            self.pids |= {self.root_pid} | descendants(self.root_pid)
+        except OSError as e:
+            self.logger.debug(f"Could not read process tree: {e}")
+        self._save()
+        return self.pids
+
+    def page_loaded(self) -> None:
+        self.pages += 1
+
+    def rss_mb(self) -> float:
+        return rss_mb(self.refresh())
+
+    def recycle_reason(self) -> Optional[str]:
+        if self.max_pages and self.pages >= self.max_pages:
+            return f"{self.pages} pages loaded"
+        if self.max_rss_mb:
+            memory = self.rss_mb()
+            if memory >= self.max_rss_mb:
+                return f"using {memory:.0f}MB"
+        return None
+
+    def ticker_finished(self) -> Optional[float]:
+        """Seconds since the browser (re)started if this is its first finished ticker, else None"""
+        if not self._awaiting_first_ticker or self.started_at is None:
+            return None
+        self._awaiting_first_ticker = False
+        latency = time.time() - self.started_at
+        self.first_ticker_latencies.append(latency)
+        return latency
+
+    def kill_tracked(self, grace: float = 3.0) -> int:
+        """Kill whatever tracked processes are still running, returns how many had to be killed"""
+        self.refresh()
+        killed = self._kill(self.pids, grace)
+        self.pids = set()
+        self.root_pid = None
+        self._save()
+        return killed
+
+    def kill_stale(self, grace: float = 3.0) -> int:
+        """Kill the processes an earlier run of this browser recorded in pid_file"""
+        if not self.pid_file or not os.path.exists(self.pid_file):
+            return 0
+        try:
+            with open(self.pid_file) as f:
+                stale = {int(line) for line in f if line.strip().isdigit()}
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Could not read {self.pid_file}: {e}")
+            return 0
+
+        killed = self._kill(stale - self.pids, grace)
+        if killed:
+            self.logger.info(f"Killed {killed} browser processes left by an earlier run")
+        self._save()
+        return killed
+
+    def _kill(self, pids: Set[int], grace: float) -> int:
+        running = {pid for pid in pids if is_browser_process(pid)}
+        alive = set(running)
+        for sig in (signal.SIGTERM, signal.SIGKILL):
+            for pid in alive:
+                try:
+                    os.kill(pid, sig)
+                except OSError:
+                    pass
+            deadline = time.time() + grace
+            while alive and time.time() < deadline:
+                alive = {pid for pid in alive if is_browser_process(pid)}
+                time.sleep(0.1)
+            if not alive:
+                break
+        return len(running - alive)
+
+    def _save(self) -> None:
+        if not self.pid_file:
+            return
+        try:
+            with open(self.pid_file, "w") as f:
+                f.write("".join(f"{pid}\n" for pid in sorted(self.pids)))
+        except OSError as e:
+            self.logger.debug(f"Could not write {self.pid_file}: {e}")
@@ -5,7 +5,6 @@ Separates browser management from scraping logic for better maintainability.
 
 import os
 import time
-import subprocess
 import logging
 from typing import Optional, List, Dict, Any
 from contextlib import contextmanager
@@ -18,6 +17,24 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException
 
+from resource_policy import ResourcePolicy
+from browser_lifecycle import BrowserLifecycle
+from cookie_jar import CookieJar
+
+# Resource timing keeps 250 entries by default, far fewer than a scrolled feed loads
+TIMING_BUFFER_SCRIPT = "performance.setResourceTimingBufferSize(100000);"
+
+# Bytes the page has transferred so far. Cross-origin responses without Timing-Allow-Origin report 0,
+# so this undercounts third-party content, blocked requests never show up at all
+TRANSFER_STATS_SCRIPT = """
+const entries = performance.getEntriesByType("navigation").concat(performance.getEntriesByType("resource"));
+let bytes = 0;
+for (const entry of entries) {
+    bytes += entry.transferSize || 0;
+}
+return {bytes: bytes, requests: entries.length};
+"""
+
 
 class BrowserManager:
     """
@@ -29,27 +46,62 @@ class BrowserManager:
                  headless: bool = True,
                  timeout: int = 10,
                  page_load_strategy: str = 'eager',
-                 logger: Optional[logging.Logger] = None):
+                 logger: Optional[logging.Logger] = None,
+                 kill_stale_processes: bool = True,
+                 resource_policy: Optional[ResourcePolicy] = None,
+                 profile_dir: Optional[str] = None,
+                 max_pages: Optional[int] = None,
+                 max_rss_mb: Optional[float] = None,
+                 cookie_jar: Optional[CookieJar] = None):
         self.headless = headless
         self.timeout = timeout
         self.page_load_strategy = page_load_strategy
+        # Only ever kills processes this profile's earlier runs left behind, so side by side browsers are safe
+        self.kill_stale_processes = kill_stale_processes
+        self.resource_policy = resource_policy or ResourcePolicy()
+        self.last_page_ready_seconds: Optional[float] = None
+        self.last_tab_switch_seconds: Optional[float] = None  # finding and clicking the Latest tab after the load
         self.logger = logger or logging.getLogger(__name__)
+        
+        # A persistent profile keeps the StockTwits session (cookies, local storage) across restarts
+        self.profile_dir = os.path.abspath(profile_dir) if profile_dir else None
+        self.lifecycle = BrowserLifecycle(
+            pid_file=self.profile_dir + ".pids" if self.profile_dir else None,
+            max_pages=max_pages,
+            max_rss_mb=max_rss_mb,
+            logger=self.logger
+        )
         self.driver: Optional[Edge] = None
         self._is_logged_in = False
+        self.cookie_jar = cookie_jar
+        self.restored_sessions = 0
         
     def create_driver(self) -> Edge:
-        self.kill_browser_processes()
+        if self.kill_stale_processes:
+            self.kill_browser_processes()
         self.logger.info("Creating new browser driver")
         
+        service = Service("/usr/local/bin/msedgedriver")
+        driver = Edge(service=service, options=self.create_options())
+        self.lifecycle.track(service.process.pid if service.process else None)
+        driver.set_page_load_timeout(self.timeout)
+        driver.implicitly_wait(10)
+        self.apply_resource_policy(driver)
+        
+        return driver
+    
+    def create_options(self) -> Options:
         options = Options()
         
-        prefs = {
-            "profile.managed_default_content_settings.images": 2  # Block images
-        }
-        # options.add_experimental_option("prefs", prefs)
+        prefs = self.resource_policy.prefs()
+        if prefs:
+            options.add_experimental_option("prefs", prefs)
         
         # Browser options
         options.use_chromium = True
+        if self.profile_dir:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            options.add_argument(f"--user-data-dir={self.profile_dir}")
         if self.headless:
             options.add_argument("--headless")
         options.add_argument("--disable-gpu")
@@ -61,12 +113,18 @@ class BrowserManager:
         options.page_load_strategy = self.page_load_strategy
         options.binary_location = "/usr/bin/microsoft-edge"
         
-        service = Service("/usr/local/bin/msedgedriver")
-        driver = Edge(service=service, options=options)
-        driver.set_page_load_timeout(self.timeout)
-        driver.implicitly_wait(10)
-        
-        return driver
+        return options
+    
+    def apply_resource_policy(self, driver) -> None:
+        """Block the policy's URL patterns for every page the driver loads, the driver still works if CDP fails"""
+        try:
+            patterns = self.resource_policy.blocked_url_patterns()
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+            driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": TIMING_BUFFER_SCRIPT})
+            self.logger.info(f"Blocking {len(patterns)} URL patterns")
+        except WebDriverException as e:
+            self.logger.warning(f"Could not apply resource policy: {e}")
     
     def start(self) -> None:
         if self.driver is None:
@@ -75,6 +133,8 @@ class BrowserManager:
     
     def stop(self) -> None:
         if self.driver:
+            # The browser's children are only reachable from the driver while it runs
+            self.lifecycle.refresh()
             try:
                 self.driver.quit()
                 self.logger.info("Browser driver stopped")
@@ -84,7 +144,10 @@ class BrowserManager:
                 self.driver = None
                 self._is_logged_in = False
         
-        self.kill_browser_processes()
+        # Whatever quit() left running
+        killed = self.lifecycle.kill_tracked()
+        if killed:
+            self.logger.warning(f"Killed {killed} browser processes that outlived the driver")
     
     def restart(self) -> None:
         self.logger.info("Restarting browser driver")
@@ -92,6 +155,26 @@ class BrowserManager:
         time.sleep(2)
         self.start()
     
+    def recycle_if_needed(self) -> bool:
+        """Restart the browser once it has loaded max_pages pages or grown past max_rss_mb, True if it was restarted"""
+        if not self.driver:
+            return False
+        
+        reason = self.lifecycle.recycle_reason()
+        if not reason:
+            return False
+        
+        self.logger.info(f"Recycling browser: {reason}")
+        self.restart()
+        return True
+    
+    def ticker_finished(self) -> Optional[float]:
+        """Mark a ticker done, returns the seconds since the browser (re)started if it was the first one"""
+        latency = self.lifecycle.ticker_finished()
+        if latency is not None:
+            self.logger.info(f"First ticker finished {latency:.1f}s after browser start")
+        return latency
+    
     @contextmanager
     def browser_session(self):
         try:
@@ -107,14 +190,19 @@ class BrowserManager:
         for attempt in range(max_retries):
             try:
                 self.logger.info(f"Loading page: {url} (attempt {attempt + 1})")
+                load_start = time.time()
                 self.driver.get(url)
                 
                 # Wait for page to load
                 WebDriverWait(self.driver, self.timeout).until(
                     lambda d: d.execute_script('return document.readyState') == 'complete'
                 )
+                self.last_page_ready_seconds = time.time() - load_start
+                self.lifecycle.page_loaded()
                 
+                self.last_tab_switch_seconds = None
                 if url != "https://stocktwits.com/signin":
+                    switch_start = time.time()
                     try:
 
                         element = self.driver.find_element(By.CSS_SELECTOR, '[data-testid="latestTabs-label-Latest"]')
@@ -127,6 +215,7 @@ class BrowserManager:
                         self.logger.info("Switched to latest posts")
                     except Exception as e:
                         self.logger.error(f"Error switching to latest posts, no latest tab found, scrolling normally.")
+                    self.last_tab_switch_seconds = time.time() - switch_start
 
                 return True
                 
@@ -174,6 +263,89 @@ class BrowserManager:
             return self.driver.page_source
         return None
     
+    def get_cookies(self) -> List[Dict[str, Any]]:
+        if self.driver:
+            return self.driver.get_cookies()
+        return []
+    
+    def inject_cookies(self, cookies: List[Dict[str, Any]]) -> bool:
+        """Set cookies in WebDriver.get_cookies format through CDP, which (unlike add_cookie) works before any navigation"""
+        if not self.driver:
+            return False
+        
+        cdp_cookies = []
+        for cookie in cookies:
+            cdp_cookie = {
+                "name": cookie["name"],
+                "value": cookie["value"],
+                "domain": cookie.get("domain") or ".stocktwits.com",
+                "path": cookie.get("path", "/"),
+                "secure": cookie.get("secure", False),
+                "httpOnly": cookie.get("httpOnly", False),
+            }
+            if cookie.get("expiry"):
+                cdp_cookie["expires"] = cookie["expiry"]
+            if cookie.get("sameSite") in ("Strict", "Lax", "None"):
+                cdp_cookie["sameSite"] = cookie["sameSite"]
+            cdp_cookies.append(cdp_cookie)
+        
+        try:
+            self.driver.execute_cdp_cmd("Network.setCookies", {"cookies": cdp_cookies})
+            return True
+        except WebDriverException as e:
+            self.logger.warning(f"Could not inject cookies: {e}")
+            return False
+    
+    def run_script(self, script: str, *args) -> Any:
+        """Run JavaScript in the page and return its result, None if there is no driver or the script fails"""
+        if not self.driver:
+            return None
+        
+        try:
+            return self.driver.execute_script(script, *args)
+        except WebDriverException as e:
+            self.logger.warning(f"Script failed: {e}")
+            return None
+    
+    def watch_added_nodes(self, selector: str) -> Optional[int]:
+        """Start a MutationObserver counting added elements that match (or contain) selector, returns the count so far"""
+        return self.run_script("""
+            const selector = arguments[0];
+            if (!window.__addedNodeCounter) {
+                const counter = window.__addedNodeCounter = {count: 0};
+                new MutationObserver((mutations) => {
+                    for (const mutation of mutations) {
+                        for (const node of mutation.addedNodes) {
+                            if (node.nodeType === 1 && (node.matches(selector) || node.querySelector(selector))) {
+                                counter.count++;
+                            }
+                        }
+                    }
+                }).observe(document.body, {childList: true, subtree: true});
+            }
+            return window.__addedNodeCounter.count;
+        """, selector)
+    
+    def wait_for_added_nodes(self, since: int, timeout: float, poll_interval: float = 0.1) -> Optional[bool]:
+        """Wait until the watch_added_nodes count passes since. None if the observer is not running"""
+        deadline = time.time() + timeout
+        while True:
+            count = self.run_script("return window.__addedNodeCounter ? window.__addedNodeCounter.count : null;")
+            if count is None:
+                return None
+            if count > since:
+                return True
+            if time.time() >= deadline:
+                return False
+            time.sleep(poll_interval)
+    
+    def page_transfer_stats(self) -> Optional[Dict[str, int]]:
+        """Bytes and requests the current page has transferred since it was loaded, None without a driver"""
+        stats = self.run_script(TRANSFER_STATS_SCRIPT)
+        if not stats:
+            return None
+        return {"bytes": int(stats.get("bytes") or 0), "requests": int(stats.get("requests") or 0)}
+    
     def is_page_valid(self, expected_url: Optional[str] = None) -> bool:
         if not self.driver:
             return False
@@ -195,15 +367,10 @@ class BrowserManager:
             return False
     
     def kill_browser_processes(self) -> None:
-        """Kill any existing browser processes"""
+        """Kill the browser processes this manager started and those an earlier run with the same profile left behind"""
         try:
-            processes = ['msedgedriver', 'msedge', 'chromedriver', 'chrome']
-            for process in processes:
-                subprocess.call(['pkill', '-f', process], 
-                              stdout=subprocess.DEVNULL, 
-                              stderr=subprocess.DEVNULL)
-            time.sleep(1)
-            self.logger.debug("Browser processes killed")
+            killed = self.lifecycle.kill_tracked() + self.lifecycle.kill_stale()
+            self.logger.debug(f"Killed {killed} browser processes")
         except Exception as e:
             self.logger.error(f"Error killing browser processes: {e}")
     
@@ -212,14 +379,28 @@ class BrowserManager:
             return True
         
         try:
+            if not self.driver:
+                self.start()
+            
+            # A cached session goes in before the first navigation, the signin page then redirects home
+            cookies = self.cookie_jar.load() if self.cookie_jar else None
+            restoring = bool(cookies) and self.inject_cookies(cookies)
+            
             if not self.get_page("https://stocktwits.com/signin"):
                 return False
                         
             # Check if already logged in
             if self.driver.current_url.rstrip('/') == "https://stocktwits.com":
                 self._is_logged_in = True
+                if restoring:
+                    self.restored_sessions += 1
+                    self.logger.info("StockTwits session restored from cookie jar")
+                self._save_session()
                 return True
             
+            if restoring:
+                self.logger.info("Cached StockTwits session is no longer valid, logging in with the form")
+            
             # Fill login form
             username_field = self.wait_for_element(By.CSS_SELECTOR, "[data-testid='log-in-username']")
             password_field = self.wait_for_element(By.CSS_SELECTOR, "[data-testid='log-in-password']")
@@ -242,6 +423,7 @@ class BrowserManager:
             if "stocktwits.com" in self.driver.current_url and "signin" not in self.driver.current_url:
                 self._is_logged_in = True
                 self.logger.info("StockTwits login successful")
+                self._save_session()
                 return True
             
         except Exception as e:
@@ -249,6 +431,13 @@ class BrowserManager:
         
         return False
     
+    def _save_session(self) -> None:
+        if self.cookie_jar:
+            try:
+                self.cookie_jar.save(self.driver.get_cookies())
+            except Exception as e:
+                self.logger.warning(f"Could not cache StockTwits cookies: {e}")
+    
     def is_logged_in(self) -> bool:
         return self._is_logged_in
     
@@ -258,6 +447,9 @@ class BrowserManager:
             "logged_in": self._is_logged_in,
             "current_url": self.driver.current_url if self.driver else None,
             "page_title": self.driver.title if self.driver else None,
+            "pages_loaded": self.lifecycle.pages,
+            "browser_starts": self.lifecycle.starts,
+            "restart_to_first_ticker_seconds": list(self.lifecycle.first_ticker_latencies),
         }
 
 
@@ -0,0 +1,95 @@
+import os
+import json
+import time
+import base64
+import logging
+from typing import Any, Dict, List, Optional
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+except ImportError:  # Without cryptography there is no cookie jar and every browser logs in with the form
+    Fernet = None
+
+MAGIC = b"STCJ1"
+SALT_SIZE = 16
+
+
+class CookieJar:
+    """StockTwits session cookies encrypted at rest, so new browsers and the stream client can skip the login form.
+
+    The file is MAGIC + a random salt + a Fernet token. The key is derived from secret (the STOCKTWITS_COOKIE_KEY
+    environment variable, or the account password) with PBKDF2, so the file is useless without it. Tokens older
+    than max_age_hours and cookies past their own expiry are ignored.
+    """
+
+    def __init__(self,
+                 path: str,
+                 secret: str,
+                 max_age_hours: float = 72,
+                 logger: Optional[logging.Logger] = None):
+        self.path = path
+        self.secret = secret
+        self.max_age_hours = max_age_hours
+        self.logger = logger or logging.getLogger(__name__)
+
+        if Fernet is None:
+            self.logger.warning("cryptography is not installed, StockTwits cookies will not be cached")
+
+    @property
+    def available(self) -> bool:
+        return Fernet is not None and bool(self.path) and bool(self.secret)
+
+    def _fernet(self, salt: bytes) -> "Fernet":
+        kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt, iterations=200_000)
+        return Fernet(base64.urlsafe_b64encode(kdf.derive(self.secret.encode())))
+
+    def save(self, cookies: List[Dict[str, Any]]) -> bool:
+        if not self.available or not cookies:
+            return False
+
+        salt = os.urandom(SALT_SIZE)
+        token = self._fernet(salt).encrypt(json.dumps(cookies).encode())
+        tmp_path = self.path + ".tmp"
+        try:
+            # Created private, the cookies are a logged in session
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(MAGIC + salt + token)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            self.logger.warning(f"Could not save cookie jar {self.path}: {e}")
+            return False
+
+        self.logger.info(f"Saved {len(cookies)} StockTwits cookies to {self.path}")
+        return True
+
+    def load(self) -> Optional[List[Dict[str, Any]]]:
+        """The cached cookies that have not expired, None if there are none or the jar can't be read"""
+        if not self.available or not os.path.exists(self.path):
+            return None
+
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+            if not data.startswith(MAGIC):
+                raise ValueError("not a cookie jar")
+            salt = data[len(MAGIC):len(MAGIC) + SALT_SIZE]
+            token = data[len(MAGIC) + SALT_SIZE:]
+            payload = self._fernet(salt).decrypt_at_time(token, int(self.max_age_hours * 3600), int(time.time()))
+            cookies = json.loads(payload)
+        except (OSError, ValueError, InvalidToken) as e:
+            # InvalidToken covers a wrong key, a tampered file and a jar older than max_age_hours
+            self.logger.info(f"Cookie jar {self.path} not usable: {type(e).__name__} {e}")
+            return None
+
+        now = time.time()
+        cookies = [cookie for cookie in cookies if not cookie.get("expiry") or cookie["expiry"] > now]
+        return cookies or None
+
+    def clear(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
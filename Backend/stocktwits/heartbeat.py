@@ -0,0 +1,44 @@
+import time
+import logging
+from typing import Optional
+from dataclasses import dataclass
+
+
+@dataclass
+class Heartbeat:
+    event: str  # "started", "scroll" or "finished"
+    ticker: str
+    timestamp: float
+    success: bool = False  # finished only: the ticker's result was saved
+    skipped: bool = False  # finished only: the ticker was already in the output file
+    posts: int = 0  # posts loaded/parsed so far
+    scroll_depth: int = 0  # scroll steps taken on the ticker page
+
+
+class HeartbeatReporter:
+    """Sends Heartbeats from the scraping process to ProcessSupervisor over a multiprocessing queue.
+
+    Without a queue every call is a no-op, so scrapers run the same with or without a supervisor.
+    """
+
+    def __init__(self, queue=None, logger: Optional[logging.Logger] = None):
+        self.queue = queue
+        self.logger = logger or logging.getLogger(__name__)
+
+    def send(self, event: str, ticker: str, **fields) -> None:
+        if self.queue is None:
+            return
+        try:
+            self.queue.put_nowait(Heartbeat(event=event, ticker=ticker, timestamp=time.time(), **fields))
+        except Exception as e:
+            # A full or closed queue must never stop the scrape
+            self.logger.debug(f"Could not send heartbeat for {ticker}: {e}")
+
+    def ticker_started(self, ticker: str) -> None:
+        self.send("started", ticker)
+
+    def scroll_progress(self, ticker: str, scroll_depth: int, posts: int) -> None:
+        self.send("scroll", ticker, scroll_depth=scroll_depth, posts=posts)
+
+    def ticker_finished(self, ticker: str, success: bool, posts: int = 0, skipped: bool = False) -> None:
+        self.send("finished", ticker, success=success, posts=posts, skipped=skipped)
@@ -3,8 +3,16 @@ from typing import List, Dict, Optional, Union
 from datetime import datetime, timedelta
 import pytz
 from bs4 import BeautifulSoup
+import json
 import logging
 
+try:
+    from lxml import html as lxml_html
+except ImportError:  # Falls back to BeautifulSoup
+    lxml_html = None
+
+PARSER_BACKENDS = ("lxml", "bs4")
+
 
 @dataclass
 class PostData:
@@ -27,17 +35,154 @@ class PostMetrics:
     reached_target_date: bool = False  # True if scraping reached the target date
 
 
+@dataclass
+class PostRecord:
+    # Compact post returned by the in-browser extractor, enough for PostMetrics without the page source
+    datetime_object: datetime
+    likes: int
+    message_len: int
+    post_id: Optional[str] = None  # href of the post's /message/ link, used to drop re-rendered posts
+
+
+@dataclass
+class ParsedPage:
+    # Everything the scraper needs from a page, built from a single parse
+    validation: Dict[str, Union[bool, str]]
+    posts: List[PostData]  # posts within the timeframe, in page order
+    metrics: PostMetrics
+    earliest_post_date: Optional[datetime]  # oldest post within the timeframe
+    latest_post_date: Optional[datetime]  # newest post within the timeframe
+    post_count: int  # post containers on the page, in or out of the timeframe
+
+
+class SoupBackend:
+    """Finds StockTwits elements in a BeautifulSoup html.parser tree"""
+    
+    def __init__(self, parser: "StockTwitsHTMLParser"):
+        self.parser = parser
+    
+    def parse(self, html: str):
+        return BeautifulSoup(html, 'html.parser')
+    
+    def post_elements(self, document) -> list:
+        return document.find_all('div', class_=self.parser.post_container_class)
+    
+    def has_feed(self, document) -> bool:
+        return bool(document.find(class_=self.parser.feed_container_class))
+    
+    def message_text(self, element) -> Optional[str]:
+        message_element = element.find('div', class_=self.parser.message_class)
+        return message_element.get_text(strip=True) if message_element else None
+    
+    def post_datetime(self, element) -> Optional[str]:
+        time_element = element.find('time')
+        if not time_element or 'datetime' not in time_element.attrs:
+            return None
+        return time_element['datetime']
+    
+    def like_texts(self, element) -> List[str]:
+        return [span.text for span in element.find_all('span', class_=self.parser.like_count_class)]
+
+
+class LxmlBackend:
+    """Finds StockTwits elements in an lxml tree with precompiled XPath, matching SoupBackend's results"""
+    
+    def __init__(self, parser: "StockTwitsHTMLParser"):
+        self.parser = parser
+        has_class = "contains(concat(' ', normalize-space(@class), ' '), ' {} ')"
+        self._post_elements = lxml_html.etree.XPath(f"//div[{has_class.format(parser.post_container_class)}]")
+        self._feed = lxml_html.etree.XPath(f"(//*[{has_class.format(parser.feed_container_class)}])[1]")
+        # BeautifulSoup matches a class string with spaces against the whole (whitespace normalized) attribute
+        self._message = lxml_html.etree.XPath("(.//div[normalize-space(@class)=$cls])[1]")
+        self._time = lxml_html.etree.XPath("(.//time)[1]")
+        self._like_spans = lxml_html.etree.XPath(".//span[normalize-space(@class)=$cls]")
+    
+    def parse(self, html: str):
+        if not html or not html.strip():
+            return None
+        return lxml_html.fromstring(html)
+    
+    def post_elements(self, document) -> list:
+        return self._post_elements(document) if document is not None else []
+    
+    def has_feed(self, document) -> bool:
+        return document is not None and bool(self._feed(document))
+    
+    def message_text(self, element) -> Optional[str]:
+        message_elements = self._message(element, cls=self.parser.message_class)
+        if not message_elements:
+            return None
+        return "".join(text.strip() for text in message_elements[0].itertext())
+    
+    def post_datetime(self, element) -> Optional[str]:
+        time_elements = self._time(element)
+        if not time_elements:
+            return None
+        return time_elements[0].get('datetime')
+    
+    def like_texts(self, element) -> List[str]:
+        return [span.text_content() for span in self._like_spans(element, cls=self.parser.like_count_class)]
+
+
+# Runs in the page through execute_script. Returns a record for every post container added since the last call on
+# this page, read the same way as extract_post_data, plus the number of containers now in the DOM.
+POST_RECORDS_SCRIPT = """
+const seen = window.__stocktwitsSeenPosts || (window.__stocktwitsSeenPosts = new WeakSet());
+const normalize = (value) => (value || "").trim().split(/\\s+/).join(" ");
+const containers = document.querySelectorAll("div." + %(post_container_class)s);
+const records = [];
+for (const container of containers) {
+    if (seen.has(container)) continue;
+    seen.add(container);
+    const message = Array.from(container.querySelectorAll("div"))
+        .find((div) => normalize(div.getAttribute("class")) === %(message_class)s);
+    if (!message) continue;
+    const time = container.querySelector("time");
+    if (!time || !time.hasAttribute("datetime")) continue;
+    const likeSpans = Array.from(container.querySelectorAll("span"))
+        .filter((span) => normalize(span.getAttribute("class")) === %(like_count_class)s);
+    let likes = 0;
+    if (likeSpans.length > 2 && likeSpans[2].textContent) {
+        const count = likeSpans[2].textContent.replace(/,/g, "").trim();
+        likes = /^[+-]?\\d+$/.test(count) ? parseInt(count, 10) : 0;
+    }
+    const link = container.querySelector('a[href*="/message/"]');
+    records.push({
+        datetime: time.getAttribute("datetime"),
+        likes: likes,
+        message_len: message.textContent.trim().length,
+        id: link ? link.getAttribute("href") : null
+    });
+}
+return {records: records, containers: containers.length};
+"""
+
+
 class StockTwitsHTMLParser:
     """
     Handles all HTML parsing logic for StockTwits pages.
     Separated from driver management for better testability and maintainability.
     """
     
-    def __init__(self, logger: Optional[logging.Logger] = None):
+    def __init__(self, logger: Optional[logging.Logger] = None, backend: str = "lxml"):
         self.logger = logger or logging.getLogger(__name__)
         self.post_container_class = "StreamMessage_container__omTCg"
+        self.feed_container_class = "SymbolStream_container__SRJQv"
         self.message_class = "RichTextMessage_body__4qUeP whitespace-pre-wrap"
         self.like_count_class = "StreamMessageLabelCount_labelCount__dWyPL mr-1 text-dark-grey-2 dark|text-stream-text"
+        
+        if backend not in PARSER_BACKENDS:
+            raise ValueError(f"Unknown parser backend {backend!r}, expected one of {PARSER_BACKENDS}")
+        if backend == "lxml" and lxml_html is None:
+            self.logger.warning("lxml is not installed, parsing with BeautifulSoup")
+            backend = "bs4"
+        self.backend_name = backend
+        self.backend = LxmlBackend(self) if backend == "lxml" else SoupBackend(self)
+        
+        self.post_records_script = POST_RECORDS_SCRIPT % {
+            name: json.dumps(getattr(self, name))
+            for name in ("post_container_class", "message_class", "like_count_class")
+        }
     
     def is_within_timeframe(self, target_datetime: datetime, post_datetime: datetime) -> bool:
         return target_datetime - post_datetime < timedelta(0)
@@ -45,25 +190,23 @@ class StockTwitsHTMLParser:
     def extract_post_data(self, twit_element) -> Optional[PostData]:
         try:
             # Extract message
-            message_element = twit_element.find('div', class_=self.message_class)
-            if not message_element:
+            message = self.backend.message_text(twit_element)
+            if message is None:
                 self.logger.warning("Message element not found")
                 return None
-            message = message_element.get_text(strip=True)
             
             # Extract date
-            time_element = twit_element.find('time')
-            if not time_element or 'datetime' not in time_element.attrs:
+            date_info = self.backend.post_datetime(twit_element)
+            if date_info is None:
                 self.logger.warning("Time element not found")
                 return None
-            date_info = time_element['datetime']
             
             # Extract likes
-            like_spans = twit_element.find_all('span', class_=self.like_count_class)
+            like_texts = self.backend.like_texts(twit_element)
             likes = 0
-            if len(like_spans) > 2 and like_spans[2].text:
+            if len(like_texts) > 2 and like_texts[2]:
                 try:
-                    likes = int(like_spans[2].text.replace(',', ''))
+                    likes = int(like_texts[2].replace(',', ''))
                 except ValueError:
                     likes = 0
             
@@ -83,48 +226,69 @@ class StockTwitsHTMLParser:
             self.logger.error(f"Error extracting post data: {e}")
             return None
     
+    def last_post_datetime(self, html: str) -> Optional[datetime]:
+        """Date of the last (oldest loaded) post on the page, None if there is none"""
+        document = self.backend.parse(html)
+        
+        twits = self.backend.post_elements(document)
+        if not twits:
+            return None
+        
+        date_info = self.backend.post_datetime(twits[-1])
+        if date_info is None:
+            return None
+        
+        date_of_post = datetime.strptime(date_info, "%Y-%m-%dT%H:%M:%SZ")
+        return pytz.UTC.localize(date_of_post)
+    
     def check_earliest_post_date(self, html: str, target_datetime: datetime) -> bool:
         try:
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            twits = soup.find_all('div', class_=self.post_container_class)
-            earliest_twit = twits[-1]
-
-            time_element = earliest_twit.find('time')
-            if not time_element or 'datetime' not in time_element.attrs:
+            date_of_post = self.last_post_datetime(html)
+            if date_of_post is None:
                 return False
             
-            date_of_post = datetime.strptime(time_element['datetime'], "%Y-%m-%dT%H:%M:%SZ")
-            date_of_post = pytz.UTC.localize(date_of_post)
-            
             return self.is_within_timeframe(target_datetime, date_of_post)
             
         except Exception as e:
             self.logger.error(f"Error checking earliest post date: {e}")
             return False
     
-    def parse_posts_to_metrics(self, html: str, ticker: str, target_datetime: datetime, reached_target_date: bool = False) -> PostMetrics:
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        # Find all post containers
-        twit_elements = soup.find_all('div', class_=self.post_container_class)
-        
-        if not twit_elements:
-            self.logger.warning(f"No posts found for ticker {ticker}")
-            return PostMetrics(
-                hours=[0] * 24,
-                likes=[0] * 24,
-                total_mentions=0,
-                total_likes=0,
-                ticker=ticker,
-                reached_target_date=reached_target_date
-            )
-        
-        # Initialize hourly arrays
-        hourly_posts = [0] * 24
-        hourly_likes = [0] * 24
-        
-        processed_posts = 0
+    def records_from_script(self, raw_records: List[Dict]) -> List[PostRecord]:
+        """PostRecords from the dicts POST_RECORDS_SCRIPT returns, skipping any with an unreadable date"""
+        records = []
+        for raw in raw_records:
+            try:
+                datetime_object = pytz.UTC.localize(datetime.strptime(raw["datetime"], "%Y-%m-%dT%H:%M:%SZ"))
+            except (KeyError, TypeError, ValueError) as e:
+                self.logger.error(f"Error extracting post record: {e}")
+                continue
+            records.append(PostRecord(
+                datetime_object=datetime_object,
+                likes=int(raw.get("likes") or 0),
+                message_len=int(raw.get("message_len") or 0),
+                post_id=raw.get("id")
+            ))
+        return records
+    
+    def metrics_from_records(self, records: List[Union[PostData, PostRecord]], ticker: str, target_datetime: datetime, reached_target_date: bool = False) -> PostMetrics:
+        """The PostMetrics parse_posts_to_metrics would give for the same posts"""
+        in_timeframe = [record for record in records if self.is_within_timeframe(target_datetime, record.datetime_object)]
+        metrics = self._metrics_from_posts(in_timeframe, ticker, reached_target_date)
+        self.logger.info(f"Processed {len(in_timeframe)} post records for {ticker}: {metrics.total_mentions} mentions, {metrics.total_likes} likes")
+        return metrics
+    
+    def date_range(self, posts: List[Union[PostData, PostRecord]], target_datetime: Optional[datetime] = None) -> tuple[Optional[datetime], Optional[datetime]]:
+        """Earliest and latest post dates, only counting posts within the timeframe if target_datetime is given"""
+        post_dates = [
+            post.datetime_object for post in posts
+            if target_datetime is None or self.is_within_timeframe(target_datetime, post.datetime_object)
+        ]
+        if not post_dates:
+            return None, None
+        return min(post_dates), max(post_dates)
+    
+    def _posts_within_timeframe(self, twit_elements: list, ticker: str, target_datetime: datetime) -> List[PostData]:
+        posts = []
         
         for twit_element in twit_elements:
             post_data = self.extract_post_data(twit_element)
@@ -135,63 +299,65 @@ class StockTwitsHTMLParser:
             if not self.is_within_timeframe(target_datetime, post_data.datetime_object):
                 continue
             
+            post_data.ticker = ticker
+            posts.append(post_data)
+        
+        return posts
+    
+    def _metrics_from_posts(self, posts: List[PostData], ticker: str, reached_target_date: bool) -> PostMetrics:
+        # Initialize hourly arrays
+        hourly_posts = [0] * 24
+        hourly_likes = [0] * 24
+        
+        for post_data in posts:
             # Add to hourly buckets
             hour = post_data.datetime_object.hour
             hourly_posts[hour] += 1
             hourly_likes[hour] += post_data.likes
-            processed_posts += 1
-        
-        total_mentions = sum(hourly_posts)
-        total_likes = sum(hourly_likes)
-        
-        self.logger.info(f"Processed {processed_posts} posts for {ticker}: {total_mentions} mentions, {total_likes} likes")
         
         return PostMetrics(
             hours=hourly_posts,
             likes=hourly_likes,
-            total_mentions=total_mentions,
-            total_likes=total_likes,
+            total_mentions=sum(hourly_posts),
+            total_likes=sum(hourly_likes),
             ticker=ticker,
             reached_target_date=reached_target_date
         )
     
-    def parse_posts_to_list(self, html: str, ticker: str, target_datetime: datetime) -> List[PostData]:
-        soup = BeautifulSoup(html, 'html.parser')
+    def parse_posts_to_metrics(self, html: str, ticker: str, target_datetime: datetime, reached_target_date: bool = False) -> PostMetrics:
+        # Find all post containers
+        twit_elements = self.backend.post_elements(self.backend.parse(html))
+        
+        if not twit_elements:
+            self.logger.warning(f"No posts found for ticker {ticker}")
+            return self._metrics_from_posts([], ticker, reached_target_date)
         
+        posts = self._posts_within_timeframe(twit_elements, ticker, target_datetime)
+        metrics = self._metrics_from_posts(posts, ticker, reached_target_date)
+        
+        self.logger.info(f"Processed {len(posts)} posts for {ticker}: {metrics.total_mentions} mentions, {metrics.total_likes} likes")
+        return metrics
+    
+    def parse_posts_to_list(self, html: str, ticker: str, target_datetime: datetime) -> List[PostData]:
         # Find all post containers
-        twit_elements = soup.find_all('div', class_=self.post_container_class)
+        twit_elements = self.backend.post_elements(self.backend.parse(html))
         
         if not twit_elements:
             self.logger.warning(f"No posts found for ticker {ticker}")
             return []
         
-        posts = []
-        
-        for twit_element in twit_elements:
-            post_data = self.extract_post_data(twit_element)
-            if not post_data:
-                continue
-                
-            # Check if post is within timeframe
-            if not self.is_within_timeframe(target_datetime, post_data.datetime_object):
-                continue
-            
-            post_data.ticker = ticker
-            posts.append(post_data)
+        posts = self._posts_within_timeframe(twit_elements, ticker, target_datetime)
         
         self.logger.info(f"Extracted {len(posts)} posts for {ticker}")
         return posts
     
-    def validate_page_content(self, html: str) -> Dict[str, Union[bool, str]]:
-
-        soup = BeautifulSoup(html, 'html.parser')
-        
+    def _validate(self, html: str, document, twit_elements: list) -> Dict[str, Union[bool, str]]:
         # Check for 404 page
         is_404 = "Page Not Found - 404 - Symbol Page" in html
         
         # Check for expected elements
-        has_feed = bool(soup.find(class_="SymbolStream_container__SRJQv"))
-        has_posts = bool(soup.find_all('div', class_=self.post_container_class))
+        has_feed = self.backend.has_feed(document)
+        has_posts = bool(twit_elements)
         
         # Check for login requirement
         needs_login = "Sign In" in html and not has_posts
@@ -205,6 +371,33 @@ class StockTwitsHTMLParser:
             "error_message": self._get_error_message(is_404, has_feed, has_posts, needs_login)
         }
     
+    def validate_page_content(self, html: str) -> Dict[str, Union[bool, str]]:
+        document = self.backend.parse(html)
+        return self._validate(html, document, self.backend.post_elements(document))
+    
+    def parse_page(self, html: str, ticker: str, target_datetime: datetime, reached_target_date: bool = False) -> ParsedPage:
+        """Validation, posts, metrics and date range of a page from one parse of its HTML"""
+        document = self.backend.parse(html)
+        twit_elements = self.backend.post_elements(document)
+        
+        posts = self._posts_within_timeframe(twit_elements, ticker, target_datetime)
+        metrics = self._metrics_from_posts(posts, ticker, reached_target_date)
+        earliest_post_date, latest_post_date = self.date_range(posts)
+        
+        if twit_elements:
+            self.logger.info(f"Processed {len(posts)} posts for {ticker}: {metrics.total_mentions} mentions, {metrics.total_likes} likes")
+        else:
+            self.logger.warning(f"No posts found for ticker {ticker}")
+        
+        return ParsedPage(
+            validation=self._validate(html, document, twit_elements),
+            posts=posts,
+            metrics=metrics,
+            earliest_post_date=earliest_post_date,
+            latest_post_date=latest_post_date,
+            post_count=len(twit_elements)
+        )
+    
     def _get_error_message(self, is_404: bool, has_feed: bool, has_posts: bool, needs_login: bool) -> Optional[str]:
         """Generate appropriate error message based on validation results"""
         if is_404:
@@ -3,12 +3,16 @@ import time
 import logging
 import multiprocessing
 import threading
+import queue
 from typing import Optional, Callable, Dict, Any, List
 from dataclasses import dataclass
 from enum import Enum
 from datetime import datetime, timedelta
 
 from stocktwits_scraper import StockTwitsScraper, ScrapingConfig
+from scraper_pool import StockTwitsScraperPool
+from heartbeat import Heartbeat, HeartbeatReporter
+import result_log
 from browser_manager import BrowserManager
 
 
@@ -23,28 +27,31 @@ class ProcessState(Enum):
 
 @dataclass
 class MonitoringConfig:
-    file_check_interval: int = 30  # seconds between file checks
-    max_file_age: int = 100  # seconds before file is considered stale
+    check_interval: int = 30  # seconds between heartbeat checks
+    max_heartbeat_age: int = 100  # seconds without any heartbeat before the process is considered hung
     min_runtime: int = 120  # minimum runtime before restart is allowed
     max_restarts: int = 10  # maximum restarts before giving up
     restart_delay: int = 5  # seconds to wait before restart
     health_check_interval: int = 30  # seconds between health checks
-    progress_timeout: int = 300  # seconds without progress before restart
+    progress_timeout: int = 300  # seconds without a ticker finishing before restart
     ticker_file: str = "tickers.txt"  # file containing target tickers
 
 
 @dataclass
 class ProcessHealth:
     state: ProcessState
-    last_file_update: Optional[datetime]
+    last_heartbeat: Optional[datetime]
     runtime: float
     restart_count: int
     last_error: Optional[str]
     progress_stalled: bool
-    file_exists: bool
+    current_ticker: Optional[str] = None
+    scroll_depth: int = 0
+    posts_parsed: int = 0
     tickers_completed: int = 0
     total_tickers: int = 0
     completion_rate: float = 0.0
+    restart_to_first_ticker: Optional[float] = None  # seconds from the latest (re)start to its first finished ticker
 
 
 class ProcessSupervisor:
@@ -61,18 +68,26 @@ class ProcessSupervisor:
         self.process: Optional[multiprocessing.Process] = None
         self.stop_event = multiprocessing.Event()
         self.restart_event = multiprocessing.Event()
+        self.heartbeat_queue: Optional[multiprocessing.Queue] = None
         
         # State tracking
         self.state = ProcessState.IDLE
         self.start_time: Optional[datetime] = None
         self.restart_count = 0
-        self.last_file_mtime: Optional[float] = None
+        self.last_heartbeat_time: Optional[datetime] = None
         self.last_progress_time: Optional[datetime] = None
         self.shutdown_requested = False
         
-        # Ticker completion tracking
+        # Ticker completion tracking, kept in memory from the worker's heartbeats
         self.target_tickers: set = set()
         self.completed_tickers: set = set()
+        self.failed_tickers: set = set()
+        self.current_ticker: Optional[str] = None
+        self.scroll_depth = 0
+        self.posts_parsed = 0
+        self.first_ticker_latencies: List[float] = []  # one per process start, how long it took to finish a ticker
+        self._awaiting_first_ticker = False
+        self._heartbeat_lock = threading.Lock()
         
         # Monitoring thread
         self.monitor_thread: Optional[threading.Thread] = None
@@ -83,7 +98,7 @@ class ProcessSupervisor:
                         target_tickers: List[str] = None,
                         target_args: tuple = (),
                         target_kwargs: Dict = None,
-                        monitor_file: Optional[str] = None) -> bool:
+                        result_log_path: Optional[str] = None) -> bool:
 
         if self.monitor_running:
             self.logger.warning("Monitoring already running")
@@ -93,7 +108,6 @@ class ProcessSupervisor:
             self.target_function = target_function
             self.target_args = target_args or ()
             self.target_kwargs = target_kwargs or {}
-            self.monitor_file = monitor_file
             
             # Set target tickers from parameter or load from file
             if target_tickers:
@@ -106,9 +120,16 @@ class ProcessSupervisor:
             self.shutdown_requested = False
             self.restart_count = 0
             self.completed_tickers.clear()
+            self.failed_tickers.clear()
+            self.posts_parsed = 0
             self.stop_event.clear()
             self.restart_event.clear()
             
+            # Tickers saved before a crash are read from the result log once, heartbeats cover the rest
+            if result_log_path:
+                self.completed_tickers.update(result_log.completed_tickers(result_log_path))
+                self.logger.info(f"Found {len(self.completed_tickers)} completed tickers in {result_log_path}")
+            
             # Start monitoring thread
             self.monitor_thread = threading.Thread(
                 target=self._monitoring_loop,
@@ -178,14 +199,14 @@ class ProcessSupervisor:
                     self._restart_process()
                 
                 # Log health status periodically
-                if self.restart_count % (self.config.health_check_interval // self.config.file_check_interval) == 0:
+                if self.restart_count % max(1, self.config.health_check_interval // self.config.check_interval) == 0:
                     self._log_health_status(health)
                 
-                time.sleep(self.config.file_check_interval)
+                time.sleep(self.config.check_interval)
                 
             except Exception as e:
                 self.logger.error(f"Error in monitoring loop: {e}")
-                time.sleep(self.config.file_check_interval)
+                time.sleep(self.config.check_interval)
         
         self.logger.info("Monitoring loop ended")
     
@@ -197,15 +218,22 @@ class ProcessSupervisor:
             self.stop_event = multiprocessing.Event()
             self.restart_event = multiprocessing.Event()
             
+            # A process killed mid-write can leave its queue unusable, so every process gets a new one
+            self._drain_heartbeats()
+            self.heartbeat_queue = multiprocessing.Queue()
+            
             self.process = multiprocessing.Process(
                 target=self.target_function,
-                args=self.target_args + (self.stop_event, self.restart_event),
+                args=self.target_args + (self.stop_event, self.restart_event, self.heartbeat_queue),
                 kwargs=self.target_kwargs
             )
             self.process.start()
             
             self.start_time = datetime.now()
+            self._awaiting_first_ticker = True
+            self.last_heartbeat_time = datetime.now()
             self.last_progress_time = datetime.now()
+            self.current_ticker = None
             self.state = ProcessState.RUNNING
             
             self.logger.info(f"Process started")
@@ -240,30 +268,59 @@ class ProcessSupervisor:
             self.logger.error(f"Failed to restart process: {e}")
             self.state = ProcessState.FAILED
     
-    def _check_process_health(self) -> ProcessHealth:
-        file_exists = False
-        last_file_update = None
-        progress_stalled = False
+    def _drain_heartbeats(self) -> int:
+        """Apply every heartbeat waiting in the queue, returns how many were read"""
+        if self.heartbeat_queue is None:
+            return 0
         
-        # Update completed tickers from joblib file
-        self._update_completed_tickers()
+        count = 0
+        with self._heartbeat_lock:
+            while True:
+                try:
+                    heartbeat = self.heartbeat_queue.get_nowait()
+                except queue.Empty:
+                    break
+                except Exception as e:
+                    self.logger.debug(f"Error reading heartbeat: {e}")
+                    break
+                self._apply_heartbeat(heartbeat)
+                count += 1
+        return count
+    
+    def _apply_heartbeat(self, heartbeat: Heartbeat) -> None:
+        ticker = heartbeat.ticker.lower() if heartbeat.ticker else None
+        self.last_heartbeat_time = datetime.fromtimestamp(heartbeat.timestamp)
         
-        # Check monitored file if specified
-        if self.monitor_file and os.path.exists(self.monitor_file):
-            file_exists = True
-            current_mtime = os.path.getmtime(self.monitor_file)
-            last_file_update = datetime.fromtimestamp(current_mtime)
-            
-            # Check if file has been updated
-            if self.last_file_mtime is not None and current_mtime != self.last_file_mtime:
-                self.last_progress_time = datetime.now()
-            
-            self.last_file_mtime = current_mtime
-            
-            # Check for stalled progress
-            if self.last_progress_time:
-                time_since_progress = (datetime.now() - self.last_progress_time).total_seconds()
-                progress_stalled = time_since_progress > self.config.progress_timeout
+        if heartbeat.event == "started":
+            self.current_ticker = ticker
+            self.scroll_depth = 0
+        elif heartbeat.event == "scroll":
+            self.current_ticker = ticker
+            self.scroll_depth = heartbeat.scroll_depth
+        elif heartbeat.event == "finished":
+            self.last_progress_time = self.last_heartbeat_time
+            self.posts_parsed += heartbeat.posts
+            if heartbeat.success:
+                if not heartbeat.skipped and self._awaiting_first_ticker and self.start_time:
+                    self._awaiting_first_ticker = False
+                    latency = (self.last_heartbeat_time - self.start_time).total_seconds()
+                    self.first_ticker_latencies.append(latency)
+                    self.logger.info(f"First ticker finished {latency:.1f}s after process start")
+                if ticker not in self.completed_tickers and not heartbeat.skipped:
+                    self.logger.info(f"Completed {ticker} ({heartbeat.posts} posts)")
+                self.completed_tickers.add(ticker)
+                self.failed_tickers.discard(ticker)
+            else:
+                self.failed_tickers.add(ticker)
+    
+    def _check_process_health(self) -> ProcessHealth:
+        self._drain_heartbeats()
+        
+        # Check for stalled progress
+        progress_stalled = False
+        if self.last_progress_time:
+            time_since_progress = (datetime.now() - self.last_progress_time).total_seconds()
+            progress_stalled = time_since_progress > self.config.progress_timeout
         
         # Calculate runtime
         runtime = (datetime.now() - self.start_time).total_seconds() if self.start_time else 0
@@ -275,15 +332,18 @@ class ProcessSupervisor:
         
         return ProcessHealth(
             state=self.state,
-            last_file_update=last_file_update,
+            last_heartbeat=self.last_heartbeat_time,
             runtime=runtime,
             restart_count=self.restart_count,
             last_error=None,
             progress_stalled=progress_stalled,
-            file_exists=file_exists,
+            current_ticker=self.current_ticker,
+            scroll_depth=self.scroll_depth,
+            posts_parsed=self.posts_parsed,
             tickers_completed=completed_tickers,
             total_tickers=total_tickers,
-            completion_rate=completion_rate
+            completion_rate=completion_rate,
+            restart_to_first_ticker=self.first_ticker_latencies[-1] if self.first_ticker_latencies else None
         )
     
     def _should_restart(self, health: ProcessHealth) -> bool:
@@ -302,13 +362,13 @@ class ProcessSupervisor:
             print("Process dead")
             return True
         
-        # Check file-based conditions
-        if self.monitor_file and health.file_exists and health.last_file_update:
-            file_age = (datetime.now() - health.last_file_update).total_seconds()
+        # Check the worker is still sending heartbeats
+        if health.last_heartbeat:
+            heartbeat_age = (datetime.now() - health.last_heartbeat).total_seconds()
             
-            # File too old and we've been running long enough
-            print(f"File age: {file_age} seconds")
-            if file_age > self.config.max_file_age and health.runtime > self.config.min_runtime:
+            # No heartbeat for too long and we've been running long enough
+            if heartbeat_age > self.config.max_heartbeat_age and health.runtime > self.config.min_runtime:
+                self.logger.warning(f"No heartbeat for {heartbeat_age:.1f} seconds")
                 return True
         
         # Check for stalled progress
@@ -322,12 +382,12 @@ class ProcessSupervisor:
         status_msg = f"Process Health - State: {health.state.value}, Runtime: {health.runtime:.1f}s, Restarts: {health.restart_count}"
         status_msg += f", Progress: {health.tickers_completed}/{health.total_tickers} ({health.completion_rate:.1%})"
         
-        if self.monitor_file:
-            if health.file_exists and health.last_file_update:
-                file_age = (datetime.now() - health.last_file_update).total_seconds()
-                status_msg += f", File age: {file_age:.1f}s"
-            else:
-                status_msg += ", File: not found"
+        if health.last_heartbeat:
+            heartbeat_age = (datetime.now() - health.last_heartbeat).total_seconds()
+            status_msg += f", Last heartbeat: {heartbeat_age:.1f}s ago"
+        if health.current_ticker:
+            status_msg += f", Current: {health.current_ticker} (scroll depth {health.scroll_depth})"
+        status_msg += f", Posts parsed: {health.posts_parsed}"
         
         if health.progress_stalled:
             status_msg += " [STALLED]"
@@ -350,13 +410,16 @@ class ProcessSupervisor:
             "runtime": health.runtime,
             "restart_count": self.restart_count,
             "max_restarts": self.config.max_restarts,
-            "file_monitored": self.monitor_file,
-            "file_exists": health.file_exists,
-            "last_file_update": health.last_file_update.isoformat() if health.last_file_update else None,
+            "last_heartbeat": health.last_heartbeat.isoformat() if health.last_heartbeat else None,
+            "current_ticker": health.current_ticker,
+            "scroll_depth": health.scroll_depth,
+            "posts_parsed": health.posts_parsed,
+            "failed_tickers": len(self.failed_tickers),
             "progress_stalled": health.progress_stalled,
             "tickers_completed": health.tickers_completed,
             "total_tickers": health.total_tickers,
             "completion_rate": health.completion_rate,
+            "restart_to_first_ticker_seconds": list(self.first_ticker_latencies),
             "remaining_tickers": len(self.get_remaining_tickers()),
             "all_completed": self._all_tickers_completed()
         }
@@ -384,29 +447,6 @@ class ProcessSupervisor:
             self.logger.error(f"Error loading target tickers: {e}")
             self.target_tickers = set()
     
-    def _update_completed_tickers(self) -> None:
-        """Update the set of completed tickers from the joblib file"""
-        try:
-            if self.monitor_file and os.path.exists(self.monitor_file):
-                import joblib
-                with open(self.monitor_file, 'rb') as f:
-                    results = joblib.load(f)
-                
-                # Extract ticker keys (they should be lowercase)
-                if isinstance(results, dict):
-                    completed = set(key.lower() for key in results.keys() if key is not None)
-                    
-                    # Check for new completions
-                    new_completions = completed - self.completed_tickers
-                    if new_completions:
-                        self.logger.info(f"New completions detected: {sorted(list(new_completions))}")
-                    
-                    self.completed_tickers = completed
-                else:
-                    self.logger.warning("Joblib file doesn't contain expected dictionary format")
-        except Exception as e:
-            self.logger.debug(f"Error updating completed tickers: {e}")
-    
     def _all_tickers_completed(self) -> bool:
         """Check if all target tickers have been completed"""
         if not self.target_tickers:
@@ -432,7 +472,8 @@ def run_supervised_scraping(username: str,
                           tickers: List[str],
                           output_file: str,
                           monitoring_config: Optional[MonitoringConfig] = None,
-                          scraping_config: Optional[ScrapingConfig] = None) -> None:
+                          scraping_config: Optional[ScrapingConfig] = None,
+                          num_browsers: int = 1) -> Dict[str, set]:
 
     # Set up logging
     logging.basicConfig(
@@ -452,10 +493,17 @@ def run_supervised_scraping(username: str,
         logger=logger
     )
     
-    def scraping_worker(stop_event, restart_event):
+    def scraping_worker(stop_event, restart_event, heartbeat_queue):
         """Worker function that runs the actual scraping"""
         try:
-            with StockTwitsScraper(config=scraping_config, logger=logger) as scraper:
+            heartbeat = HeartbeatReporter(heartbeat_queue, logger=logger)
+            if num_browsers > 1:
+                scraper = StockTwitsScraperPool(num_browsers=num_browsers, config=scraping_config, logger=logger,
+                                                heartbeat=heartbeat)
+            else:
+                scraper = StockTwitsScraper(config=scraping_config, logger=logger, heartbeat=heartbeat)
+            
+            with scraper:
                 if scraper.initialize(username, password):
                     # Check for stop event before starting scraping
                     if stop_event.is_set():
@@ -463,7 +511,10 @@ def run_supervised_scraping(username: str,
                         return
                     
                     # Use immediate saving by passing output_file parameter
-                    results = scraper.scrape_tickers(tickers, output_file=output_file)
+                    if num_browsers > 1:
+                        results = scraper.scrape_tickers(tickers, output_file=output_file, stop_event=stop_event)
+                    else:
+                        results = scraper.scrape_tickers(tickers, output_file=output_file)
                     logger.info("Scraping completed successfully")
                     supervisor.shutdown_requested = True
                 else:
@@ -477,7 +528,7 @@ def run_supervised_scraping(username: str,
         if supervisor.start_monitoring(
             target_function=scraping_worker,
             target_tickers=tickers,  # Pass the tickers to monitor
-            monitor_file=output_file
+            result_log_path=result_log.log_path_for(output_file)
         ):
             logger.info(f"Supervised scraping started for {len(tickers)} tickers.")
             
@@ -505,6 +556,16 @@ def run_supervised_scraping(username: str,
         logger.info("Shutdown requested by user")
     finally:
         supervisor.stop_monitoring()
+        
+        # The worker has stopped, so the log can be compacted into output_file for readers of the joblib.
+        # The log is kept for the next run to resume from unless every ticker is done.
+        try:
+            result_log.compact(output_file, remove_log=supervisor._all_tickers_completed(), logger=logger)
+        except Exception as e:
+            logger.error(f"Failed to compact results into {output_file}: {e}")
+    
+    # What the run got through, for the ticker scheduler's history
+    return {"completed": set(supervisor.completed_tickers), "failed": supervisor.failed_tickers - supervisor.completed_tickers}
 
 
 # Example usage
@@ -516,7 +577,7 @@ if __name__ == "__main__":
     
     # Configuration
     monitoring_config = MonitoringConfig(
-        max_file_age=120,
+        max_heartbeat_age=120,
         min_runtime=60,
         max_restarts=100
     )
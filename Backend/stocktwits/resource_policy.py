@@ -0,0 +1,72 @@
+from typing import Dict, List
+from dataclasses import dataclass, field
+
+IMAGE_PATTERNS = ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.ico"]
+MEDIA_PATTERNS = ["*.mp4", "*.webm", "*.m3u8", "*.mp3", "*.m4a"]
+FONT_PATTERNS = ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"]
+# Ads and analytics loaded by symbol pages, none of them are needed for the feed
+TRACKER_PATTERNS = [
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*googlesyndication.com*",
+    "*doubleclick.net*",
+    "*adservice.google.com*",
+    "*amazon-adsystem.com*",
+    "*connect.facebook.net*",
+    "*scorecardresearch.com*",
+    "*quantserve.com*",
+    "*quantcount.com*",
+    "*hotjar.com*",
+    "*segment.io*",
+    "*segment.com/analytics*",
+    "*taboola.com*",
+    "*outbrain.com*",
+    "*criteo.com*",
+    "*adnxs.com*",
+    "*rubiconproject.com*",
+    "*pubmatic.com*",
+    "*moatads.com*",
+    "*sentry.io*",
+]
+
+
+@dataclass
+class ResourcePolicy:
+    """Which requests a browser drops, applied with CDP Network.setBlockedURLs when the driver is created"""
+    block_images: bool = True
+    block_media: bool = True
+    block_fonts: bool = True
+    block_trackers: bool = True
+    extra_patterns: List[str] = field(default_factory=list)  # more Network.setBlockedURLs patterns, "*" is a wildcard
+
+    PRESETS = ("full", "trackers", "none")
+
+    @classmethod
+    def preset(cls, name: str, extra_patterns: List[str] = ()) -> "ResourcePolicy":
+        """Named policies for config: full blocks everything heavy, trackers only ads and analytics, none nothing"""
+        if name == "full":
+            return cls(extra_patterns=list(extra_patterns))
+        if name == "trackers":
+            return cls(block_images=False, block_media=False, block_fonts=False, extra_patterns=list(extra_patterns))
+        if name == "none":
+            return cls(block_images=False, block_media=False, block_fonts=False, block_trackers=False,
+                       extra_patterns=list(extra_patterns))
+        raise ValueError(f"Unknown resource policy {name!r}, expected one of {cls.PRESETS}")
+
+    def blocked_url_patterns(self) -> List[str]:
+        patterns = []
+        if self.block_images:
+            patterns += IMAGE_PATTERNS
+        if self.block_media:
+            patterns += MEDIA_PATTERNS
+        if self.block_fonts:
+            patterns += FONT_PATTERNS
+        if self.block_trackers:
+            patterns += TRACKER_PATTERNS
+        return patterns + list(self.extra_patterns)
+
+    def prefs(self) -> Dict[str, int]:
+        """Browser prefs that stop images being decoded at all, CSS background images included"""
+        if self.block_images:
+            return {"profile.managed_default_content_settings.images": 2}
+        return {}
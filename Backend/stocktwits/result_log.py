@@ -0,0 +1,155 @@
+import os
+import time
+import struct
+import pickle
+import zlib
+import logging
+import threading
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+# Every record is a 4 byte length and a 4 byte CRC32 of the payload, followed by the pickled (ticker, data) payload
+HEADER = struct.Struct(">II")
+
+
+def log_path_for(output_file: str) -> str:
+    """The result log written while scraping into output_file"""
+    return output_file + ".log"
+
+
+def _scan(path: str) -> Iterator[Tuple[int, Tuple[str, dict]]]:
+    """Yields (end offset, (ticker, data)) for every complete record, stopping at a record torn by a crash"""
+    if not os.path.exists(path):
+        return
+
+    end = 0
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                return
+            length, checksum = HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                return
+            end += HEADER.size + length
+            yield end, pickle.loads(payload)
+
+
+def read_records(path: str) -> Iterator[Tuple[str, dict]]:
+    for _, record in _scan(path):
+        yield record
+
+
+def valid_length(path: str) -> int:
+    """Number of bytes at the start of the log made of complete records"""
+    end = 0
+    for end, _ in _scan(path):
+        pass
+    return end
+
+
+def load_results(path: str) -> Dict[str, dict]:
+    """Results in the log keyed by lowercase ticker, a later record replaces an earlier one"""
+    return {ticker: data for ticker, data in read_records(path)}
+
+
+def completed_tickers(path: str) -> Set[str]:
+    return {ticker for ticker, _ in read_records(path)}
+
+
+def compact(output_file: str, remove_log: bool = True, logger: Optional[logging.Logger] = None) -> int:
+    """Atomically writes the results in output_file's log to the output_file joblib snapshot, then removes the log
+    if remove_log.
+
+    The snapshot is written to a temporary file, fsynced and renamed over output_file, so readers see either
+    the old snapshot or the new one. Returns the number of tickers in the snapshot.
+    """
+    import joblib
+
+    logger = logger or logging.getLogger(__name__)
+    path = log_path_for(output_file)
+    if not os.path.exists(path):
+        logger.info(f"No result log at {path}, keeping {output_file} as is")
+        return 0
+
+    results = load_results(path)
+    tmp_path = output_file + ".tmp"
+    with open(tmp_path, "wb") as f:
+        joblib.dump(results, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, output_file)
+    if remove_log:
+        os.remove(path)
+
+    logger.info(f"Compacted {len(results)} results from {path} into {output_file}")
+    return len(results)
+
+
+class ResultLog:
+    """Append-only log of per-ticker results.
+
+    Appends are flushed to the OS straight away, so a crashed process loses nothing, and fsynced in batches
+    of fsync_every records or every fsync_interval seconds. A record torn by a crash is cut off when the log
+    is opened again. Safe to share between the threads of a StockTwitsScraperPool.
+    """
+
+    def __init__(self,
+                 path: str,
+                 fsync_every: int = 25,
+                 fsync_interval: float = 5.0,
+                 logger: Optional[logging.Logger] = None):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._last_sync = time.time()
+        self.records_written = 0
+        self.fsyncs = 0
+
+        # Drop the tail of a record that was being written when the last run died
+        end = valid_length(path)
+        if os.path.exists(path) and os.path.getsize(path) > end:
+            self.logger.warning(f"Truncating torn record at the end of {path}")
+            with open(path, "r+b") as f:
+                f.truncate(end)
+
+        self._file = open(path, "ab")
+
+    def append(self, ticker: str, data: dict) -> None:
+        payload = pickle.dumps((ticker.lower(), data), protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._file.write(HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+            self._file.flush()
+            self.records_written += 1
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every or time.time() - self._last_sync >= self.fsync_interval:
+                self._sync()
+
+    def _sync(self) -> None:
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.time()
+        self.fsyncs += 1
+
+    def sync(self) -> None:
+        with self._lock:
+            if self._unsynced:
+                self._sync()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file.closed:
+                return
+            if self._unsynced:
+                self._sync()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
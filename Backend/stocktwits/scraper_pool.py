@@ -0,0 +1,226 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+from typing import List, Dict, Optional, Callable
+
+from stocktwits_scraper import StockTwitsScraper, ScrapingConfig, ScrapingResult
+from browser_manager import BrowserManager
+from resource_policy import ResourcePolicy
+from heartbeat import HeartbeatReporter
+from result_log import ResultLog, log_path_for
+from scroll_controller import ScrollHistory
+from symbol_cache import NegativeSymbolCache
+from spans import SpanRecorder
+
+
+class WorkStealingQueue:
+    """Ticker queue with one deque per worker.
+
+    Tickers are dealt round robin so every worker starts with an even share in the
+    original order. A worker takes from the front of its own deque and, once that is
+    empty, steals from the back of the longest other deque, so a browser stuck on a
+    slow ticker (AAPL, TSLA) hands its remaining work to the idle ones.
+    """
+
+    def __init__(self, tickers: List[str], num_workers: int):
+        self._deques = [deque() for _ in range(num_workers)]
+        for i, ticker in enumerate(tickers):
+            self._deques[i % num_workers].append(ticker)
+        self._lock = threading.Lock()
+        self.steals = 0
+
+    def get(self, worker_id: int) -> Optional[str]:
+        with self._lock:
+            own = self._deques[worker_id]
+            if own:
+                return own.popleft()
+
+            victim = max(self._deques, key=len)
+            if victim:
+                self.steals += 1
+                return victim.pop()
+
+            return None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(d) for d in self._deques)
+
+
+class StockTwitsScraperPool:
+    """Runs several StockTwitsScraper instances, each with its own logged in browser,
+    over a shared WorkStealingQueue and writes every result to one output file."""
+
+    def __init__(self,
+                 num_browsers: int = 2,
+                 config: Optional[ScrapingConfig] = None,
+                 logger: Optional[logging.Logger] = None,
+                 scraper_factory: Optional[Callable[[int], StockTwitsScraper]] = None,
+                 heartbeat: Optional[HeartbeatReporter] = None):
+
+        self.num_browsers = num_browsers
+        self.config = config or ScrapingConfig()
+        self.logger = logger or logging.getLogger(__name__)
+        # Shared by every browser, the multiprocessing queue behind it is safe to use from threads
+        self.heartbeat = heartbeat or HeartbeatReporter(logger=self.logger)
+        # One history for every browser, so whichever one scrapes a ticker starts from its last scroll rate
+        self.scroll_history = ScrollHistory.load(self.config.scroll_history_path, logger=self.logger)
+        # Likewise one set of missing symbols, a 404 seen by one browser is skipped by all of them
+        self.symbol_cache = NegativeSymbolCache.load(self.config.missing_symbols_path, logger=self.logger,
+                                                     ttl_days=self.config.missing_symbol_ttl_days)
+        # One span file and one summary for the whole run
+        self.spans = SpanRecorder(self.config.spans_path, logger=self.logger)
+        self.scraper_factory = scraper_factory or self._create_scraper
+
+        self.scrapers: List[StockTwitsScraper] = []
+        self.queue: Optional[WorkStealingQueue] = None
+        self._save_lock = threading.Lock()
+
+    def _create_scraper(self, worker_id: int) -> StockTwitsScraper:
+        # Each browser needs its own profile (a profile can only be open once), and only kills its own processes
+        profile_dir = os.path.join(self.config.profile_dir, f"browser-{worker_id}") if self.config.profile_dir else None
+        browser_manager = BrowserManager(headless=False, logger=self.logger,
+                                         resource_policy=ResourcePolicy.preset(self.config.resource_policy, self.config.blocked_urls),
+                                         profile_dir=profile_dir,
+                                         max_pages=self.config.recycle_after_pages,
+                                         max_rss_mb=self.config.recycle_above_rss_mb)
+        return StockTwitsScraper(config=self.config, browser_manager=browser_manager, logger=self.logger,
+                                 heartbeat=self.heartbeat, scroll_history=self.scroll_history,
+                                 symbol_cache=self.symbol_cache, spans=self.spans)
+
+    def initialize(self, username: str, password: str) -> bool:
+        scrapers = [self.scraper_factory(i) for i in range(self.num_browsers)]
+        logged_in = [False] * len(scrapers)
+
+        def login(i: int) -> None:
+            logged_in[i] = scrapers[i].initialize(username, password)
+
+        threads = [threading.Thread(target=login, args=(i,), daemon=True) for i in range(len(scrapers))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for scraper, ok in zip(scrapers, logged_in):
+            if ok:
+                self.scrapers.append(scraper)
+            else:
+                scraper.cleanup()
+
+        self.logger.info(f"Scraper pool initialized with {len(self.scrapers)}/{self.num_browsers} browsers")
+        return bool(self.scrapers)
+
+    def scrape_tickers(self,
+                       tickers: List[str],
+                       return_posts: bool = False,
+                       progress_callback: Optional[Callable] = None,
+                       output_file: Optional[str] = None,
+                       stop_event=None) -> List[ScrapingResult]:
+
+        if not self.scrapers:
+            raise RuntimeError("Scraper pool not initialized")
+
+        results = []
+        total_tickers = len(tickers)
+
+        completed = self.scrapers[0].load_completed_tickers(output_file)
+        pending = []
+        for ticker in tickers:
+            if ticker.lower() in completed:
+                results.append(ScrapingResult(ticker=ticker, success=True, data=None, processing_time=0.0))
+                self.heartbeat.ticker_finished(ticker, success=True, skipped=True)
+                if progress_callback:
+                    progress_callback(len(results), total_tickers, results[-1])
+            else:
+                pending.append(ticker)
+
+        self.logger.info(f"Starting pooled scraping for {len(pending)} tickers on {len(self.scrapers)} browsers "
+                         f"({total_tickers - len(pending)} already completed)")
+        self.queue = WorkStealingQueue(pending, len(self.scrapers))
+        # One log shared by every browser, appends are serialized inside it
+        result_log = ResultLog(log_path_for(output_file), logger=self.logger) if output_file else None
+
+        def worker(worker_id: int, scraper: StockTwitsScraper) -> None:
+            while stop_event is None or not stop_event.is_set():
+                ticker = self.queue.get(worker_id)
+                if ticker is None:
+                    break
+
+                self.logger.info(f"[browser {worker_id}] Scraping {ticker}")
+                skipped = None
+                try:
+                    skipped = scraper.skip_missing_symbol(ticker)
+                    result = skipped or scraper.scrape_ticker_with_retry(ticker, return_posts)
+                except Exception as e:
+                    result = ScrapingResult(ticker=ticker, success=False, data=None, error_message=str(e))
+
+                with self._save_lock:
+                    results.append(result)
+
+                    # Every browser writes into the same log
+                    saved = result.success
+                    if result_log and result.success and result.data:
+                        saved = scraper.save_result_to_log(result, result_log)
+                        if saved:
+                            self.logger.info(f"Saved {ticker} to {result_log.path}")
+
+                    self.heartbeat.ticker_finished(ticker, success=saved, posts=StockTwitsScraper.count_posts(result))
+
+                    if progress_callback:
+                        progress_callback(len(results), total_tickers, result)
+
+                # A cached missing symbol didn't request anything, so nothing to space out
+                if skipped is None:
+                    time.sleep(self.config.ticker_delay)
+
+        threads = [
+            threading.Thread(target=worker, args=(i, scraper), daemon=True)
+            for i, scraper in enumerate(self.scrapers)
+        ]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            if result_log:
+                result_log.close()
+            try:
+                self.scroll_history.save()
+            except Exception as e:
+                self.logger.warning(f"Could not save scroll history: {e}")
+            self.logger.info(f"Missing symbol cache saved {self.symbol_cache.skipped} page loads this run")
+            try:
+                self.symbol_cache.save()
+            except Exception as e:
+                self.logger.warning(f"Could not save missing symbols: {e}")
+            self.spans.log_summary()
+
+        self.logger.info(f"Pooled scraping completed. Success: {sum(1 for r in results if r.success)}/{total_tickers}, "
+                         f"steals: {self.queue.steals}")
+        return results
+
+    def get_scraping_stats(self) -> Dict[str, any]:
+        return {
+            "browsers": len(self.scrapers),
+            "steals": self.queue.steals if self.queue is not None else 0,
+            "remaining_tickers": len(self.queue) if self.queue is not None else 0,
+            "missing_symbols": self.symbol_cache.stats(),
+            "spans": self.spans.summary(),
+            "workers": [scraper.get_scraping_stats() for scraper in self.scrapers]
+        }
+
+    def cleanup(self) -> None:
+        for scraper in self.scrapers:
+            scraper.cleanup()
+        self.scrapers = []
+        self.spans.close()
+        self.logger.info("Scraper pool cleanup completed")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.cleanup()
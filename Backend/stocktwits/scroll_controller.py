@@ -0,0 +1,140 @@
+import os
+import math
+import time
+import logging
+import threading
+from typing import Dict, Optional
+from dataclasses import dataclass, asdict
+from datetime import datetime
+
+
+@dataclass
+class ScrollStats:
+    # What scrolling one ticker's feed cost, recorded in ScrollHistory for the next run
+    scrolls: int = 0
+    checks: int = 0  # times the loaded posts were read
+    seconds: float = 0.0
+    posts_loaded: int = 0
+    feed_seconds_per_scroll: Optional[float] = None  # how far back in time one scroll reaches
+    reached_target_date: bool = False
+    stop_reason: Optional[str] = None
+
+
+class ScrollController:
+    """Decides how many scrolls to make before reading the feed again, and when to stop.
+
+    Each read gives the oldest loaded post, so the feed time covered per scroll can be estimated and the
+    scrolls left until target_datetime predicted. Far from the target several scrolls are made between reads,
+    close to it only as many as predicted. Scrolling stops once the target is reached, the feed stops growing
+    or max_seconds is spent.
+    """
+
+    def __init__(self,
+                 target_datetime: datetime,
+                 max_seconds: float,
+                 max_batch: int = 8,
+                 feed_seconds_per_scroll: Optional[float] = None,
+                 smoothing: float = 0.5):
+        self.target_datetime = target_datetime
+        self.max_seconds = max_seconds
+        self.max_batch = max_batch
+        self.smoothing = smoothing
+        self.started = time.time()
+
+        self.oldest: Optional[datetime] = None
+        self.stats = ScrollStats(feed_seconds_per_scroll=feed_seconds_per_scroll)
+
+    @property
+    def done(self) -> bool:
+        return self.stats.stop_reason is not None
+
+    def predicted_scrolls(self) -> Optional[int]:
+        """Scrolls still needed to reach target_datetime at the current rate, None before there is a rate"""
+        rate = self.stats.feed_seconds_per_scroll
+        if self.oldest is None or not rate:
+            return None
+        remaining = (self.oldest - self.target_datetime).total_seconds()
+        return max(0, math.ceil(remaining / rate))
+
+    def next_batch(self) -> int:
+        predicted = self.predicted_scrolls()
+        if predicted is None:
+            return 1
+        return max(1, min(self.max_batch, predicted))
+
+    def observe(self, scrolls: int, oldest: Optional[datetime], posts_loaded: int, new_nodes: Optional[bool] = None) -> None:
+        """Update the estimate after scrolls scrolls. new_nodes is what the page's mutation observer saw, None without one"""
+        self.stats.scrolls += scrolls
+        self.stats.checks += 1
+        self.stats.seconds = time.time() - self.started
+
+        if oldest is not None and self.oldest is not None and scrolls and oldest < self.oldest:
+            covered = (self.oldest - oldest).total_seconds() / scrolls
+            rate = self.stats.feed_seconds_per_scroll
+            self.stats.feed_seconds_per_scroll = covered if rate is None else self.smoothing * covered + (1 - self.smoothing) * rate
+
+        grew = posts_loaded > self.stats.posts_loaded
+        self.stats.posts_loaded = max(posts_loaded, self.stats.posts_loaded)
+        if oldest is not None and (self.oldest is None or oldest < self.oldest):
+            self.oldest = oldest
+
+        if posts_loaded == 0:
+            self.stats.stop_reason = "no posts"
+        elif self.oldest is not None and self.oldest <= self.target_datetime:
+            self.stats.reached_target_date = True
+            self.stats.stop_reason = "reached target date"
+        elif scrolls and (new_nodes is False or (new_nodes is None and not grew)):
+            self.stats.stop_reason = "feed exhausted"
+        elif self.stats.seconds >= self.max_seconds:
+            self.stats.stop_reason = "time budget"
+
+
+class ScrollHistory:
+    """Per-ticker ScrollStats from earlier runs, saved as a joblib dict keyed by lowercase ticker"""
+
+    def __init__(self, path: Optional[str] = None, logger: Optional[logging.Logger] = None):
+        self.path = path
+        self.logger = logger or logging.getLogger(__name__)
+        self.tickers: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: Optional[str], logger: Optional[logging.Logger] = None) -> "ScrollHistory":
+        history = cls(path, logger)
+        if path and os.path.exists(path):
+            try:
+                import joblib
+                with open(path, 'rb') as f:
+                    history.tickers = joblib.load(f)
+            except Exception as e:
+                history.logger.warning(f"Could not load scroll history from {path}: {e}")
+        return history
+
+    def record(self, ticker: str, stats: ScrollStats) -> None:
+        entry = asdict(stats)
+        entry["updated"] = time.time()
+        with self._lock:
+            previous = self.tickers.get(ticker.lower(), {})
+            # A ticker that stopped before the rate could be measured keeps its last known rate
+            if entry["feed_seconds_per_scroll"] is None:
+                entry["feed_seconds_per_scroll"] = previous.get("feed_seconds_per_scroll")
+            self.tickers[ticker.lower()] = entry
+
+    def feed_seconds_per_scroll(self, ticker: str) -> Optional[float]:
+        return self.tickers.get(ticker.lower(), {}).get("feed_seconds_per_scroll")
+
+    def cost(self, ticker: str) -> Optional[float]:
+        """Seconds spent scrolling the ticker last time, None if it has not been scrolled"""
+        entry = self.tickers.get(ticker.lower())
+        return entry["seconds"] if entry else None
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        import joblib
+        with self._lock:
+            tickers = dict(self.tickers)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            joblib.dump(tickers, f)
+        os.replace(tmp_path, self.path)
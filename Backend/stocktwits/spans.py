@@ -0,0 +1,95 @@
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """The q-th percentile of values, linearly interpolated between the closest ranks"""
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class SpanRecorder:
+    """Times the phases of scraping a ticker (page load, scrolls, page source reads, parses, saves).
+
+    Every span is written to path as one JSON line: phase, ticker, start time, seconds and whatever sizes the
+    caller adds (HTML bytes, posts). Durations are also kept per phase for summary(), which gives the count,
+    total and p50/p95/p99 of each. Spans can nest, a page_load span contains its tab_switch.
+    Safe to share between the browsers of a pool.
+    """
+
+    def __init__(self, path: Optional[str] = None, logger: Optional[logging.Logger] = None):
+        self.path = path
+        self.logger = logger or logging.getLogger(__name__)
+        self.durations: Dict[str, List[float]] = {}
+        self._file = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, phase: str, ticker: Optional[str] = None, **attrs) -> Iterator[Dict[str, Any]]:
+        """Time the block as phase. The yielded dict is attrs, sizes known only at the end can be added to it"""
+        start = time.time()
+        try:
+            yield attrs
+        finally:
+            self.record(phase, time.time() - start, ticker, start=start, **attrs)
+
+    def record(self, phase: str, seconds: float, ticker: Optional[str] = None, start: Optional[float] = None, **attrs) -> None:
+        """Add a span measured elsewhere (the browser's page ready time, say)"""
+        entry = {"phase": phase, "ticker": ticker, "start": round(start if start is not None else time.time() - seconds, 3),
+                 "seconds": round(seconds, 4)}
+        entry.update(attrs)
+        with self._lock:
+            self.durations.setdefault(phase, []).append(seconds)
+            self._write(entry)
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        if not self.path:
+            return
+        try:
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(json.dumps(entry, default=str) + "\n")
+            self._file.flush()
+        except OSError as e:
+            # Timing is never worth failing a scrape over
+            self.logger.warning(f"Could not write span to {self.path}: {e}")
+            self.path = None
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            durations = {phase: list(values) for phase, values in self.durations.items()}
+        summary = {}
+        for phase, values in durations.items():
+            summary[phase] = {"count": len(values), "total": sum(values)}
+            for q in PERCENTILES:
+                summary[phase][f"p{q}"] = percentile(values, q)
+        return summary
+
+    def log_summary(self) -> Dict[str, Dict[str, float]]:
+        summary = self.summary()
+        if not summary:
+            return summary
+        lines = [f"{'phase':<12} {'count':>6} {'total s':>9} {'p50 s':>8} {'p95 s':>8} {'p99 s':>8}"]
+        # Where the time went, most first
+        for phase, stats in sorted(summary.items(), key=lambda item: -item[1]["total"]):
+            lines.append(f"{phase:<12} {stats['count']:>6} {stats['total']:>9.1f} "
+                         f"{stats['p50']:>8.3f} {stats['p95']:>8.3f} {stats['p99']:>8.3f}")
+        self.logger.info("Time per phase:\n" + "\n".join(lines))
+        return summary
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
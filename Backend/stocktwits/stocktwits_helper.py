@@ -29,7 +29,12 @@ from functools import reduce
 from selenium.webdriver import Edge
 from selenium.webdriver.edge.service import Service
 from selenium.webdriver.edge.options import Options
-import subprocess
+
+# Run from stocktwits/ as a script or imported as stocktwits.stocktwits_helper from Backend/
+try:
+    from browser_lifecycle import BrowserLifecycle
+except ImportError:
+    from stocktwits.browser_lifecycle import BrowserLifecycle
 
 # import undetected_chromedriver as webdriver
 
@@ -76,13 +81,21 @@ import subprocess
 #             # remove the experimental_options to avoid an error
 #             del options._experimental_options["prefs"]
 
-def kill_browser_processes():
+def quit_driver(driver):
+    """Quit the driver and kill whatever of its own msedgedriver/msedge processes survive, other browsers are left alone"""
+    lifecycle = BrowserLifecycle()
+    try:
+        lifecycle.track(driver.service.process.pid)
+    except Exception as e:
+        print(f"Error reading browser processes: {e}")
+
+    try:
+        driver.quit()
+    except Exception as e:
+        print(f"Error quitting driver: {e}")
 
     try:
-        subprocess.call(['pkill', '-f', 'msedgedriver'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        subprocess.call(['pkill', '-f', 'msedge'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        subprocess.call(['pkill', '-f', 'chromedriver'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        time.sleep(1)  # Give a moment for cleanup
+        lifecycle.kill_tracked()
     except Exception as e:
         print(f"Error killing browser processes: {e}")
 
@@ -107,8 +120,6 @@ def create_driver(arguments, DRIVER_PATH):
     # options.add_argument("--disable-dev-shm-usage")
     # options.add_argument("--disable-gpu")
     # driver = webdriver.Chrome(options=options)
-    kill_browser_processes()
-    print("CHROME PROCESSES KILLED")
     
     # Edge
     options = Options()
@@ -484,8 +495,7 @@ def perform_stocktwits_scrape(stop_event, restart_event):
     except Exception as e:
         twits_logger.error(f"Error occurred: {e}. Exiting...")
     finally:
-        kill_browser_processes()
-        driver.quit()
+        quit_driver(driver)
         twits_logger.info(f"Scraping ended. Total time: {time.time() - start_time:.2f} seconds.")
 
 
@@ -4,10 +4,18 @@ import logging
 from typing import List, Dict, Optional, Union, Callable
 from datetime import datetime, timedelta
 import pytz
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 
 from browser_manager import BrowserManager
-from html_parsing import StockTwitsHTMLParser, PostMetrics, PostData
+from resource_policy import ResourcePolicy
+from cookie_jar import CookieJar
+from heartbeat import HeartbeatReporter
+from result_log import ResultLog, log_path_for, completed_tickers
+from scroll_controller import ScrollController, ScrollHistory, ScrollStats
+from symbol_cache import NegativeSymbolCache
+from spans import SpanRecorder
+from stream_client import StockTwitsStreamClient, StreamError, STREAM_URL
+from html_parsing import StockTwitsHTMLParser, PostMetrics, PostData, PostRecord
 
 
 @dataclass
@@ -19,6 +27,25 @@ class ScrapingConfig:
     max_retries: int = 3
     timeout: int = 20
     save_intermediate: bool = True
+    ticker_delay: float = 1  # seconds to wait between tickers on the same browser
+    parser_backend: str = "lxml"  # HTML parser used on pages: "lxml" or "bs4" (BeautifulSoup html.parser)
+    extraction: str = "script"  # How posts are read while scrolling: "script" (compact records from execute_script) or "page_source"
+    scroll_mode: str = "adaptive"  # "adaptive" (ScrollController) or "fixed" (the [2, 4, 8, 16, max_scroll_time] schedule)
+    settle_timeout: float = 3  # seconds to wait for new posts after a scroll before the feed counts as exhausted
+    scroll_history_path: Optional[str] = None  # joblib file with each ticker's scroll cost from earlier runs
+    fetch_mode: str = "stream"  # "stream" (JSON message stream over HTTP, the browser only as fallback) or "browser"
+    stream_url: str = STREAM_URL
+    stream_max_failures: int = 3  # consecutive stream failures before the rest of the run uses the browser
+    resource_policy: str = "full"  # requests the browser blocks: "full", "trackers" or "none" (see ResourcePolicy.preset)
+    blocked_urls: List[str] = field(default_factory=list)  # extra URL patterns to block on top of the policy
+    profile_dir: Optional[str] = None  # persistent browser profile, so the login survives browser restarts
+    recycle_after_pages: Optional[int] = 200  # restart the browser after this many page loads
+    recycle_above_rss_mb: Optional[float] = 2000  # or once its processes use this much memory
+    scroll_budgets: Dict[str, float] = field(default_factory=dict)  # lowercase ticker -> seconds of adaptive scrolling (TickerScheduler)
+    cookie_jar_path: Optional[str] = None  # encrypted StockTwits session cookies, lets new browsers skip the login form
+    missing_symbols_path: Optional[str] = None  # joblib file of tickers with no symbol page, skipped until they expire
+    missing_symbol_ttl_days: float = 7  # first expiry of a missing symbol, doubled each time it is still missing
+    spans_path: Optional[str] = None  # JSON lines file with the timing of every phase of every ticker
 
 
 @dataclass
@@ -30,6 +57,9 @@ class ScrapingResult:
     processing_time: float = 0.0
     earliest_post_date: Optional[datetime] = None
     latest_post_date: Optional[datetime] = None
+    scroll_stats: Optional[ScrollStats] = None
+    bytes_transferred: Optional[int] = None  # by the page (or the stream requests) for this ticker
+    page_ready_seconds: Optional[float] = None  # from navigation until the page's readyState was complete
 
 
 class RetryStrategy:  
@@ -60,25 +90,64 @@ class StockTwitsScraper:
                  config: Optional[ScrapingConfig] = None,
                  browser_manager: Optional[BrowserManager] = None,
                  html_parser: Optional[StockTwitsHTMLParser] = None,
-                 logger: Optional[logging.Logger] = None):
+                 logger: Optional[logging.Logger] = None,
+                 heartbeat: Optional[HeartbeatReporter] = None,
+                 scroll_history: Optional[ScrollHistory] = None,
+                 stream_client: Optional[StockTwitsStreamClient] = None,
+                 symbol_cache: Optional[NegativeSymbolCache] = None,
+                 spans: Optional[SpanRecorder] = None):
         
         self.config = config or ScrapingConfig()
         self.logger = logger or logging.getLogger(__name__)
-        self.browser_manager = browser_manager or BrowserManager(headless = False, logger=self.logger)
-        self.html_parser = html_parser or StockTwitsHTMLParser(logger=self.logger)
+        self.heartbeat = heartbeat or HeartbeatReporter(logger=self.logger)
+        self.scroll_history = scroll_history or ScrollHistory.load(self.config.scroll_history_path, logger=self.logger)
+        # Checked against None, an empty cache is falsy
+        self.symbol_cache = symbol_cache if symbol_cache is not None else NegativeSymbolCache.load(
+            self.config.missing_symbols_path, logger=self.logger, ttl_days=self.config.missing_symbol_ttl_days)
+        self.spans = spans or SpanRecorder(self.config.spans_path, logger=self.logger)
+        self._ticker: Optional[str] = None  # the ticker spans are recorded for
+        self.browser_manager = browser_manager or BrowserManager(
+            headless = False,
+            logger=self.logger,
+            resource_policy=ResourcePolicy.preset(self.config.resource_policy, self.config.blocked_urls),
+            profile_dir=self.config.profile_dir,
+            max_pages=self.config.recycle_after_pages,
+            max_rss_mb=self.config.recycle_above_rss_mb
+        )
+        self.html_parser = html_parser or StockTwitsHTMLParser(logger=self.logger, backend=self.config.parser_backend)
         self.retry_strategy = RetryStrategy(max_retries=self.config.max_retries)
         
+        # Browser-free fast path, authenticated with the browser's cookies after login
+        self.stream_client = stream_client
+        if self.stream_client is None and self.config.fetch_mode == "stream":
+            self.stream_client = StockTwitsStreamClient(stream_url=self.config.stream_url, timeout=self.config.timeout,
+                                                        logger=self.logger)
+        self.stream_failures = 0
+        self.stream_tickers = 0
+        self.bytes_transferred = 0
+        self.page_ready_times: List[float] = []
+        
         # State tracking
         self.is_logged_in = False
+        self._credentials: Optional[tuple[str, str]] = None
         self.scraped_tickers: set = set()
         self.failed_tickers: set = set()
         
     def initialize(self, username: str, password: str) -> bool:
         try:
             self.browser_manager.start()
+            self._credentials = (username, password)
+            
+            # Keyed with STOCKTWITS_COOKIE_KEY if set, otherwise the password
+            if self.config.cookie_jar_path and getattr(self.browser_manager, "cookie_jar", None) is None:
+                self.browser_manager.cookie_jar = CookieJar(self.config.cookie_jar_path,
+                                                            secret=os.getenv("STOCKTWITS_COOKIE_KEY") or password,
+                                                            logger=self.logger)
             
             if self.browser_manager.login_stocktwits(username, password):
                 self.is_logged_in = True
+                if self.stream_client:
+                    self.stream_client.set_cookies(self.browser_manager.get_cookies())
                 self.logger.info("StockTwits scraper initialized successfully")
                 return True
             else:
@@ -100,22 +169,45 @@ class StockTwitsScraper:
                 error_message="Scraper not initialized"
             )
         
+        self.heartbeat.ticker_started(ticker)
+        self._ticker = ticker
+        
         try:
             # Calculate target datetime
             target_datetime = datetime.now(pytz.UTC) - timedelta(hours=self.config.hours_back)
             
+            if self.stream_client:
+                result = self._scrape_ticker_from_stream(ticker, target_datetime, return_posts, start_time)
+                if result is not None:
+                    return result
+            
+            # Long runs slowly bloat the browser, a recycled one is logged in again from its profile
+            if self.browser_manager.recycle_if_needed() and not self.browser_manager.login_stocktwits(*self._credentials):
+                return ScrapingResult(
+                    ticker=ticker,
+                    success=False,
+                    data=None,
+                    error_message="Login failed after browser recycle"
+                )
+            
             # Load the ticker page
             url = f"https://stocktwits.com/symbol/{ticker}"
-            if not self.browser_manager.get_page(url):
+            with self.spans.span("page_load", ticker) as span:
+                span["loaded"] = self.browser_manager.get_page(url)
+                span["ready_seconds"] = self.browser_manager.last_page_ready_seconds
+            if self.browser_manager.last_tab_switch_seconds is not None:
+                self.spans.record("tab_switch", self.browser_manager.last_tab_switch_seconds, ticker)
+            if not span["loaded"]:
                 return ScrapingResult(
                     ticker=ticker,
                     success=False,
                     data=None,
                     error_message="Failed to load page"
                 )
+            page_ready_seconds = self.browser_manager.last_page_ready_seconds
     
             # Validate page content
-            html = self.browser_manager.get_page_source()
+            html = self._get_page_source()
             if not html:
                 return ScrapingResult(
                     ticker=ticker,
@@ -124,7 +216,10 @@ class StockTwitsScraper:
                     error_message="Failed to get page source"
                 )
             
-            validation = self.html_parser.validate_page_content(html)
+            with self.spans.span("parse", ticker, step="validate", html_bytes=len(html)):
+                validation = self.html_parser.validate_page_content(html)
+            if validation["is_404"]:
+                self.symbol_cache.mark_missing(ticker, "404 page")
             if not validation["is_valid"]:
                 return ScrapingResult(
                     ticker=ticker,
@@ -133,23 +228,30 @@ class StockTwitsScraper:
                     error_message=validation["error_message"]
                 )
             
-            # Scroll to load more posts
-            reached_target_date = self._scroll_to_load_posts(target_datetime)
-            
-            # Get final HTML and parse
-            final_html = self.browser_manager.get_page_source()
+            # Scroll to load more posts. Metrics only need the compact records read in the browser,
+            # full posts (with messages) still come from the page source
+            use_script = self.config.extraction == "script" and not return_posts
+            reached_target_date, records, scroll_stats = self._scroll_to_load_posts(target_datetime, ticker, use_script)
             
-            if return_posts:
-                data = self.html_parser.parse_posts_to_list(final_html, ticker, target_datetime)
-                # Extract both earliest and latest post dates from the data
-                earliest_post_date, latest_post_date = self._extract_post_date_range(data, return_posts)
+            if records is not None:
+                with self.spans.span("parse", ticker, step="records", posts=len(records)):
+                    data = self.html_parser.metrics_from_records(records, ticker, target_datetime, reached_target_date)
+                    earliest_post_date, latest_post_date = self.html_parser.date_range(records, target_datetime)
             else:
-                data = self.html_parser.parse_posts_to_metrics(final_html, ticker, target_datetime, reached_target_date)
-                # For metrics, get both earliest and latest post dates directly from HTML
-                earliest_post_date, latest_post_date = self._get_post_date_range_from_html(final_html, ticker, target_datetime)
+                # Get final HTML and parse it once for the posts, metrics and date range
+                final_html = self._get_page_source()
+                with self.spans.span("parse", ticker, step="page", html_bytes=len(final_html or "")) as span:
+                    page = self.html_parser.parse_page(final_html, ticker, target_datetime, reached_target_date)
+                    span["posts"] = page.post_count
+                
+                data = page.posts if return_posts else page.metrics
+                earliest_post_date, latest_post_date = page.earliest_post_date, page.latest_post_date
             
+            bytes_transferred = self._record_transfer(ticker, page_ready_seconds)
             processing_time = time.time() - start_time
             self.scraped_tickers.add(ticker)
+            self.symbol_cache.mark_found(ticker)
+            self.browser_manager.ticker_finished()
             
             return ScrapingResult(
                 ticker=ticker,
@@ -157,7 +259,10 @@ class StockTwitsScraper:
                 data=data,
                 processing_time=processing_time,
                 earliest_post_date=earliest_post_date,
-                latest_post_date=latest_post_date
+                latest_post_date=latest_post_date,
+                scroll_stats=scroll_stats,
+                bytes_transferred=bytes_transferred,
+                page_ready_seconds=page_ready_seconds
             )
             
         except Exception as e:
@@ -172,6 +277,148 @@ class StockTwitsScraper:
                 processing_time=time.time() - start_time
             )
     
+    def _record_transfer(self, ticker: str, page_ready_seconds: Optional[float]) -> Optional[int]:
+        """Bytes the ticker's page transferred, added with its page ready time to the run totals"""
+        transfer = self.browser_manager.page_transfer_stats()
+        bytes_transferred = transfer["bytes"] if transfer else None
+        
+        if bytes_transferred is not None:
+            self.bytes_transferred += bytes_transferred
+        if page_ready_seconds is not None:
+            self.page_ready_times.append(page_ready_seconds)
+        
+        self.logger.info(f"{ticker}: page ready in {page_ready_seconds or 0:.2f}s, "
+                         f"{(bytes_transferred or 0) / 1e6:.2f}MB in {transfer['requests'] if transfer else 0} requests")
+        return bytes_transferred
+    
+    def _scrape_ticker_from_stream(self, ticker: str, target_datetime: datetime, return_posts: bool, start_time: float) -> Optional[ScrapingResult]:
+        """Scrape a ticker from its JSON message stream, None if the browser has to be used instead"""
+        bytes_before = self.stream_client.bytes_received
+        try:
+            with self.spans.span("stream", ticker) as span:
+                posts, reached_target_date, messages_seen = self._load_stream_posts(ticker, target_datetime)
+                span.update(messages=messages_seen, posts=len(posts), bytes=self.stream_client.bytes_received - bytes_before)
+        except StreamError as e:
+            if e.not_found:
+                self.symbol_cache.mark_missing(ticker, "stream 404")
+                return ScrapingResult(ticker=ticker, success=False, data=None, error_message=str(e),
+                                      processing_time=time.time() - start_time)
+            
+            self.stream_failures += 1
+            self.logger.warning(f"Stream failed for {ticker}, using the browser: {e}")
+            if self.stream_failures >= self.config.stream_max_failures:
+                self.logger.warning(f"Stream failed {self.stream_failures} times in a row, using the browser for the rest of the run")
+                self.stream_client.close()
+                self.stream_client = None
+            return None
+        
+        self.stream_failures = 0
+        if not messages_seen:
+            return ScrapingResult(ticker=ticker, success=False, data=None, error_message="No posts found",
+                                  processing_time=time.time() - start_time)
+        
+        with self.spans.span("parse", ticker, step="stream", posts=len(posts)):
+            metrics = self.html_parser.metrics_from_records(posts, ticker, target_datetime, reached_target_date)
+            earliest_post_date, latest_post_date = self.html_parser.date_range(posts)
+        bytes_transferred = self.stream_client.bytes_received - bytes_before
+        self.bytes_transferred += bytes_transferred
+        self.scraped_tickers.add(ticker)
+        self.symbol_cache.mark_found(ticker)
+        self.stream_tickers += 1
+        self.browser_manager.ticker_finished()
+        
+        return ScrapingResult(
+            ticker=ticker,
+            success=True,
+            data=posts if return_posts else metrics,
+            processing_time=time.time() - start_time,
+            earliest_post_date=earliest_post_date,
+            latest_post_date=latest_post_date,
+            bytes_transferred=bytes_transferred
+        )
+    
+    def _load_stream_posts(self, ticker: str, target_datetime: datetime) -> tuple[List[PostData], bool, int]:
+        """Posts within the timeframe, whether the stream reached target_datetime and how many messages were read"""
+        posts: List[PostData] = []
+        seen_ids: set = set()
+        reached_target_date = False
+        pages = 0
+        
+        for messages in self.stream_client.iter_pages(ticker):
+            pages += 1
+            for message in messages:
+                if message.get("id") in seen_ids:
+                    continue
+                seen_ids.add(message.get("id"))
+                
+                try:
+                    post = self.stream_client.post_from_message(message, ticker)
+                except (KeyError, TypeError, ValueError) as e:
+                    self.logger.error(f"Error extracting stream message: {e}")
+                    continue
+                
+                if not self.html_parser.is_within_timeframe(target_datetime, post.datetime_object):
+                    reached_target_date = True
+                    continue
+                posts.append(post)
+            
+            # Paging a busy ticker back 24 hours takes a while too
+            self.heartbeat.scroll_progress(ticker, pages, len(posts))
+            if reached_target_date:
+                break
+        
+        self.logger.info(f"Read {len(seen_ids)} stream messages for {ticker} in {pages} pages")
+        return posts, reached_target_date, len(seen_ids)
+    
+    def scrape_ticker_with_retry(self, ticker: str, return_posts: bool = False) -> ScrapingResult:
+        """Scrape a ticker with the retry strategy, returning a failed result once retries run out"""
+        with self.spans.span("ticker", ticker) as span:
+            success, result = self.retry_strategy.execute_with_retry(
+                self.scrape_ticker, ticker, return_posts
+            )
+            
+            if not success:
+                result = ScrapingResult(
+                    ticker=ticker,
+                    success=False,
+                    data=None,
+                    error_message=f"Failed after {self.config.max_retries} retries"
+                )
+            span.update(success=result.success, posts=self.count_posts(result))
+        return result
+    
+    def skip_missing_symbol(self, ticker: str) -> Optional[ScrapingResult]:
+        """A failed result without loading anything if the ticker is a known missing symbol, else None"""
+        if not self.symbol_cache.should_skip(ticker):
+            return None
+        self.logger.info(f"Skipping {ticker} - no StockTwits symbol page (cached)")
+        return ScrapingResult(
+            ticker=ticker,
+            success=False,
+            data=None,
+            error_message="Symbol not found (cached)"
+        )
+    
+    @staticmethod
+    def count_posts(result: ScrapingResult) -> int:
+        """Number of posts behind a result, for heartbeats and stats"""
+        if isinstance(result.data, PostMetrics):
+            return result.data.total_mentions
+        if isinstance(result.data, list):
+            return len(result.data)
+        return 0
+    
+    def load_completed_tickers(self, output_file: Optional[str]) -> set:
+        """Tickers already in output_file's result log, so a resumed run can skip them"""
+        completed = set()
+        if output_file:
+            try:
+                completed = completed_tickers(log_path_for(output_file))
+                self.logger.info(f"Found {len(completed)} completed tickers in {log_path_for(output_file)}")
+            except Exception as e:
+                self.logger.warning(f"Could not read result log: {e}")
+        return completed
+    
     def scrape_tickers(self, 
                       tickers: List[str], 
                       return_posts: bool = False,
@@ -183,133 +430,225 @@ class StockTwitsScraper:
         
         self.logger.info(f"Starting scraping for {total_tickers} tickers")
         
-        # Load existing results if output file exists
-        existing_results = {}
-        if output_file and os.path.exists(output_file):
-            try:
-                import joblib
-                with open(output_file, 'rb') as f:
-                    existing_results = joblib.load(f)
-                self.logger.info(f"Loaded {len(existing_results)} existing results from {output_file}")
-            except Exception as e:
-                self.logger.warning(f"Could not load existing results: {e}")
+        # Tickers saved by an earlier (crashed) run are in the result log
+        completed = self.load_completed_tickers(output_file)
+        result_log = ResultLog(log_path_for(output_file), logger=self.logger) if output_file else None
         
-        for i, ticker in enumerate(tickers):
-            # Skip if already completed
-            if ticker.lower() in existing_results:
-                self.logger.info(f"Skipping {ticker} - already completed ({i+1}/{total_tickers})")
-                # Create a dummy successful result for progress tracking
-                results.append(ScrapingResult(
-                    ticker=ticker,
-                    success=True,
-                    data=None,  # We don't need to load the data
-                    processing_time=0.0
-                ))
-                if progress_callback:
-                    progress_callback(i + 1, total_tickers, results[-1])
-                continue
-            
-            self.logger.info(f"Scraping {ticker} ({i+1}/{total_tickers})")
-            
-            success, result = self.retry_strategy.execute_with_retry(
-                self.scrape_ticker, ticker, return_posts
-            )
-            
-            if success:
+        try:
+            for i, ticker in enumerate(tickers):
+                # Skip if already completed
+                if ticker.lower() in completed:
+                    self.logger.info(f"Skipping {ticker} - already completed ({i+1}/{total_tickers})")
+                    # Create a dummy successful result for progress tracking
+                    results.append(ScrapingResult(
+                        ticker=ticker,
+                        success=True,
+                        data=None,  # We don't need to load the data
+                        processing_time=0.0
+                    ))
+                    self.heartbeat.ticker_finished(ticker, success=True, skipped=True)
+                    if progress_callback:
+                        progress_callback(i + 1, total_tickers, results[-1])
+                    continue
+                
+                self.logger.info(f"Scraping {ticker} ({i+1}/{total_tickers})")
+                
+                skipped = self.skip_missing_symbol(ticker)
+                result = skipped or self.scrape_ticker_with_retry(ticker, return_posts)
                 results.append(result)
                 
                 # Save immediately after successful scraping
-                if output_file and result.success and result.data:
-                    try:
-                        self._save_single_result_to_file(result, output_file, existing_results)
-                        self.logger.info(f"Saved {ticker} to {output_file}")
-                    except Exception as e:
-                        self.logger.error(f"Failed to save {ticker}: {e}")
-            else:
-                # Create failed result
-                results.append(ScrapingResult(
-                    ticker=ticker,
-                    success=False,
-                    data=None,
-                    error_message=f"Failed after {self.config.max_retries} retries"
-                ))
-            
-            # Progress callback
-            if progress_callback:
-                progress_callback(i + 1, total_tickers, results[-1])
-            
-            # Brief delay between tickers
-            time.sleep(1)
+                saved = result.success
+                if result_log and result.success and result.data:
+                    saved = self.save_result_to_log(result, result_log)
+                    if saved:
+                        self.logger.info(f"Saved {ticker} to {result_log.path}")
+                
+                # The supervisor counts the ticker as completed from this, not from the output file
+                self.heartbeat.ticker_finished(ticker, success=saved, posts=self.count_posts(result))
+                
+                # Progress callback
+                if progress_callback:
+                    progress_callback(i + 1, total_tickers, results[-1])
+                
+                # Brief delay between tickers, a cached missing symbol didn't request anything
+                if skipped is None:
+                    time.sleep(self.config.ticker_delay)
+        finally:
+            if result_log:
+                result_log.close()
+            self.save_scroll_history()
+            self.save_symbol_cache()
+            self.spans.log_summary()
         
         self.logger.info(f"Scraping completed. Success: {sum(1 for r in results if r.success)}/{total_tickers}")
         return results
     
-    def _extract_post_date_range(self, data: Optional[Union[PostMetrics, List[PostData]]], return_posts: bool) -> tuple[Optional[datetime], Optional[datetime]]:
-        """Extract both earliest (oldest) and latest (newest) post dates from the scraped data."""
-        if not data:
-            return None, None
+    def _load_new_post_records(self, records: List[PostRecord], seen_ids: set) -> Optional[int]:
+        """Append records for the post containers added since the last call, returns how many were new or None if the script failed"""
+        with self.spans.span("read_posts", self._ticker) as span:
+            raw = self.browser_manager.run_script(self.html_parser.post_records_script)
+            if not isinstance(raw, dict) or "records" not in raw:
+                span["failed"] = True
+                return None
             
-        try:
-            if return_posts and isinstance(data, list):
-                # When return_posts=True, data is List[PostData]
-                if not data:
-                    return None, None
-                # Find both earliest and latest post dates from all posts
-                post_dates = [post.datetime_object for post in data]
-                earliest_date = min(post_dates)
-                latest_date = max(post_dates)
-                return earliest_date, latest_date
-            else:
-                # When return_posts=False, data is PostMetrics
-                # We don't have individual post dates in PostMetrics, so we'll need to
-                # get this information from the HTML parsing process
-                return None, None
-        except Exception as e:
-            self.logger.warning(f"Error extracting post date range: {e}")
-            return None, None
+            new_records = 0
+            for record in self.html_parser.records_from_script(raw["records"]):
+                # React can re-render a post as a new node, its link tells them apart
+                if record.post_id:
+                    if record.post_id in seen_ids:
+                        continue
+                    seen_ids.add(record.post_id)
+                records.append(record)
+                new_records += 1
+            span.update(posts=new_records, total_posts=len(records))
+        return new_records
+    
+    def _get_page_source(self) -> Optional[str]:
+        """The page source, timed, large feeds make this one of the slower calls"""
+        with self.spans.span("page_source", self._ticker) as span:
+            html = self.browser_manager.get_page_source()
+            span["html_bytes"] = len(html) if html else 0
+        return html
     
-    def _get_post_date_range_from_html(self, html: str, ticker: str, target_datetime: datetime) -> tuple[Optional[datetime], Optional[datetime]]:
-        """Extract both earliest (oldest) and latest (newest) post dates directly from HTML."""
+    def _read_loaded_posts(self, records: Optional[List[PostRecord]], seen_ids: set) -> tuple[int, Optional[datetime], Optional[List[PostRecord]]]:
+        """Posts loaded so far and the oldest one's date. Falls back to the page source (returning records as None) if the record script fails"""
+        if records is not None:
+            if self._load_new_post_records(records, seen_ids) is not None:
+                oldest = min((record.datetime_object for record in records), default=None)
+                return len(records), oldest, records
+            self.logger.warning("Post record script failed, falling back to page source")
+        
+        html = self._get_page_source()
+        if not html:
+            return 0, None, None
         try:
-            # Parse posts to get the date range
-            posts = self.html_parser.parse_posts_to_list(html, ticker, target_datetime)
-            if posts:
-                # Return both earliest and latest dates among all posts
-                post_dates = [post.datetime_object for post in posts]
-                earliest_date = min(post_dates)
-                latest_date = max(post_dates)
-                return earliest_date, latest_date
-            return None, None
+            with self.spans.span("parse", self._ticker, step="oldest", html_bytes=len(html)):
+                oldest = self.html_parser.last_post_datetime(html)
         except Exception as e:
-            self.logger.warning(f"Error extracting post date range from HTML: {e}")
-            return None, None
+            self.logger.error(f"Error checking earliest post date: {e}")
+            oldest = None
+        return html.count(self.html_parser.post_container_class), oldest, None
     
-    def _scroll_to_load_posts(self, target_datetime: datetime) -> bool:
+    def _scroll_to_load_posts(self, target_datetime: datetime, ticker: Optional[str] = None, use_script: bool = False) -> tuple[bool, Optional[List[PostRecord]], Optional[ScrollStats]]:
         """
         Scroll to load posts until target date is reached or no more posts load.
-        Returns True if target date was reached, False otherwise.
+        Returns whether the target date was reached, with use_script the PostRecords of every post loaded
+        (None if the page source has to be parsed instead) and, in adaptive mode, what the scrolling cost.
         """
+        if self.config.scroll_mode == "adaptive":
+            return self._scroll_adaptively(target_datetime, ticker, use_script)
+        
+        reached_target_date, records = self._scroll_fixed_schedule(target_datetime, ticker, use_script)
+        return reached_target_date, records, None
+    
+    def _scroll_adaptively(self, target_datetime: datetime, ticker: Optional[str], use_script: bool) -> tuple[bool, Optional[List[PostRecord]], ScrollStats]:
+        records: Optional[List[PostRecord]] = [] if use_script else None
+        seen_ids: set = set()
+        
+        # Same total time as the fixed schedule unless the scheduler budgeted the ticker
+        max_seconds = 2 + 4 + 8 + 16 + self.config.max_scroll_time
+        if ticker:
+            max_seconds = self.config.scroll_budgets.get(ticker.lower(), max_seconds)
+        controller = ScrollController(
+            target_datetime,
+            max_seconds=max_seconds,
+            feed_seconds_per_scroll=self.scroll_history.feed_seconds_per_scroll(ticker) if ticker else None
+        )
+        added_nodes = self.browser_manager.watch_added_nodes(f"div.{self.html_parser.post_container_class}")
+        
+        # Quiet tickers can reach the target without scrolling at all
+        posts_loaded, oldest, records = self._read_loaded_posts(records, seen_ids)
+        controller.observe(0, oldest, posts_loaded)
+        
+        while not controller.done:
+            batch = controller.next_batch()
+            with self.spans.span("scroll", ticker, scrolls=batch) as span:
+                for _ in range(batch):
+                    self.browser_manager.scroll_page(pixels=self.config.scroll_increment, delay=0)
+                
+                # Move on as soon as posts appear instead of sleeping a fixed scroll_delay
+                new_nodes = None
+                if added_nodes is not None:
+                    new_nodes = self.browser_manager.wait_for_added_nodes(added_nodes, timeout=self.config.settle_timeout)
+                    added_nodes = self.browser_manager.watch_added_nodes(f"div.{self.html_parser.post_container_class}")
+                else:
+                    time.sleep(self.config.scroll_delay)
+                span["new_nodes"] = new_nodes
+            
+            posts_loaded, oldest, records = self._read_loaded_posts(records, seen_ids)
+            controller.observe(batch, oldest, posts_loaded, new_nodes)
+            
+            # Long scrolls on busy tickers keep the supervisor from seeing a stall
+            self.heartbeat.scroll_progress(ticker, controller.stats.scrolls, posts_loaded)
+            self.logger.info(f"Loaded {posts_loaded} posts after {controller.stats.scrolls} scrolls, "
+                             f"~{controller.predicted_scrolls()} to go")
+        
+        self.logger.info(f"Stopped scrolling {ticker}: {controller.stats.stop_reason} "
+                         f"({controller.stats.scrolls} scrolls, {controller.stats.seconds:.1f}s)")
+        if ticker:
+            self.scroll_history.record(ticker, controller.stats)
+        return controller.stats.reached_target_date, records, controller.stats
+    
+    def _scroll_fixed_schedule(self, target_datetime: datetime, ticker: Optional[str], use_script: bool) -> tuple[bool, Optional[List[PostRecord]]]:
         scroll_times = [2, 4, 8, 16, self.config.max_scroll_time]
         prev_posts_count = 0
+        scroll_depth = 0
         reached_target_date = False
+        records: Optional[List[PostRecord]] = [] if use_script else None
+        seen_ids: set = set()
         
         for scroll_duration in scroll_times:
             start_time = time.time()
-            print(scroll_duration)
-            while (time.time() - start_time) < scroll_duration:
-                self.browser_manager.scroll_page(
-                    pixels=self.config.scroll_increment,
-                    delay=self.config.scroll_delay
-                )
+            with self.spans.span("scroll", ticker, schedule_seconds=scroll_duration) as span:
+                span["scrolls"] = 0
+                while (time.time() - start_time) < scroll_duration:
+                    self.browser_manager.scroll_page(
+                        pixels=self.config.scroll_increment,
+                        delay=self.config.scroll_delay
+                    )
+                    scroll_depth += 1
+                    span["scrolls"] += 1
             
-            html = self.browser_manager.get_page_source()
+            if records is not None:
+                new_records = self._load_new_post_records(records, seen_ids)
+                if new_records is None:
+                    self.logger.warning("Post record script failed, falling back to page source")
+                    records = None
+                else:
+                    # Long scrolls on busy tickers keep the supervisor from seeing a stall
+                    self.heartbeat.scroll_progress(ticker, scroll_depth, len(records))
+                    
+                    if not records:
+                        self.logger.info("No posts on page, stopping scroll")
+                        break
+                    
+                    if not self.html_parser.is_within_timeframe(target_datetime, min(record.datetime_object for record in records)):
+                        self.logger.info("Reached target date, stopping scroll")
+                        reached_target_date = True
+                        break
+                    
+                    if new_records == 0:
+                        self.logger.info("No new posts loaded, stopping scroll")
+                        break
+                    
+                    self.logger.info(f"Loaded {len(records)} posts, continuing scroll...")
+                    continue
+            
+            html = self._get_page_source()
             if html:
-                if not self.html_parser.check_earliest_post_date(html, target_datetime):
+                current_posts = html.count(self.html_parser.post_container_class)
+                
+                # Long scrolls on busy tickers keep the supervisor from seeing a stall
+                self.heartbeat.scroll_progress(ticker, scroll_depth, current_posts)
+                
+                with self.spans.span("parse", ticker, step="oldest", html_bytes=len(html)):
+                    within_timeframe = self.html_parser.check_earliest_post_date(html, target_datetime)
+                if not within_timeframe:
                     self.logger.info("Reached target date, stopping scroll")
                     reached_target_date = True
                     break
                 
-                current_posts = html.count(self.html_parser.post_container_class)
                 if current_posts == prev_posts_count:
                     self.logger.info("No new posts loaded, stopping scroll")
                     break
@@ -318,13 +657,32 @@ class StockTwitsScraper:
                 self.logger.info(f"Loaded {current_posts} posts, continuing scroll...")
                 # self.logger.info(f"Loaded posts, continuing scroll...")
         
-        return reached_target_date
+        return reached_target_date, records
+    
+    def save_scroll_history(self) -> None:
+        try:
+            self.scroll_history.save()
+        except Exception as e:
+            self.logger.warning(f"Could not save scroll history: {e}")
+    
+    def save_symbol_cache(self) -> None:
+        self.logger.info(f"Missing symbol cache saved {self.symbol_cache.skipped} page loads this run, "
+                         f"{len(self.symbol_cache)} symbols cached")
+        try:
+            self.symbol_cache.save()
+        except Exception as e:
+            self.logger.warning(f"Could not save missing symbols: {e}")
     
     def get_scraping_stats(self) -> Dict[str, any]:
         return {
             "scraped_tickers": len(self.scraped_tickers),
             "failed_tickers": len(self.failed_tickers),
             "success_rate": len(self.scraped_tickers) / (len(self.scraped_tickers) + len(self.failed_tickers)) if (self.scraped_tickers or self.failed_tickers) else 0,
+            "stream_tickers": self.stream_tickers,
+            "bytes_transferred": self.bytes_transferred,
+            "mean_page_ready_seconds": sum(self.page_ready_times) / len(self.page_ready_times) if self.page_ready_times else None,
+            "missing_symbols": self.symbol_cache.stats(),
+            "spans": self.spans.summary(),
             "browser_health": self.browser_manager.get_health_status(),
             "is_logged_in": self.is_logged_in
         }
@@ -365,56 +723,50 @@ class StockTwitsScraper:
             self.logger.error(f"Error saving results: {e}")
             return False
     
-    def _save_single_result_to_file(self, result: ScrapingResult, filepath: str, existing_results: dict = None) -> bool:
-        """Save a single scraping result to a joblib file incrementally"""
+    @staticmethod
+    def result_to_record(result: ScrapingResult) -> Optional[dict]:
+        """The dict saved for a ticker, None if the result has nothing to save"""
+        if not (result.success and result.data):
+            return None
+        
+        if isinstance(result.data, PostMetrics):
+            return {
+                "hours": result.data.hours,
+                "likes": result.data.likes,
+                "total_mentions": result.data.total_mentions,
+                "total_likes": result.data.total_likes,
+                "reached_target_date": result.data.reached_target_date,
+                "earliest_post_date": result.earliest_post_date.isoformat() if result.earliest_post_date else None,
+                "latest_post_date": result.latest_post_date.isoformat() if result.latest_post_date else None
+            }
+        elif isinstance(result.data, list):
+            # Convert list of PostData to metrics
+            return {
+                "total_mentions": len(result.data),
+                "total_likes": sum(post.likes for post in result.data),
+                "earliest_post_date": result.earliest_post_date.isoformat() if result.earliest_post_date else None,
+                "latest_post_date": result.latest_post_date.isoformat() if result.latest_post_date else None
+            }
+        return None
+    
+    def save_result_to_log(self, result: ScrapingResult, result_log: ResultLog) -> bool:
+        """Append a single scraping result to the result log, compacted into the output file once the run ends"""
         try:
-            import joblib
-            
-            # Load existing results if not provided
-            if existing_results is None:
-                if os.path.exists(filepath):
-                    with open(filepath, 'rb') as f:
-                        existing_results = joblib.load(f)
-                else:
-                    existing_results = {}
-            
-            # Convert single result to serializable format
-            if result.success and result.data:
-                if isinstance(result.data, PostMetrics):
-                    existing_results[result.ticker.lower()] = {
-                        "hours": result.data.hours,
-                        "likes": result.data.likes,
-                        "total_mentions": result.data.total_mentions,
-                        "total_likes": result.data.total_likes,
-                        "reached_target_date": result.data.reached_target_date,
-                        "earliest_post_date": result.earliest_post_date.isoformat() if result.earliest_post_date else None,
-                        "latest_post_date": result.latest_post_date.isoformat() if result.latest_post_date else None
-                    }
-                elif isinstance(result.data, list):
-                    # Convert list of PostData to metrics
-                    total_mentions = len(result.data)
-                    total_likes = sum(post.likes for post in result.data)
-                    existing_results[result.ticker.lower()] = {
-                        "total_mentions": total_mentions,
-                        "total_likes": total_likes,
-                        "earliest_post_date": result.earliest_post_date.isoformat() if result.earliest_post_date else None,
-                        "latest_post_date": result.latest_post_date.isoformat() if result.latest_post_date else None
-                    }
-                
-                # Save back to file
-                with open(filepath, 'wb') as f:
-                    joblib.dump(existing_results, f)
-                
-                return True
-            
-            return False
-            
+            record = self.result_to_record(result)
+            if record is None:
+                return False
+            with self.spans.span("save", result.ticker):
+                result_log.append(result.ticker, record)
+            return True
         except Exception as e:
             self.logger.error(f"Failed to save single result for {result.ticker}: {e}")
             return False
     
     def cleanup(self) -> None:
         try:
+            if self.stream_client:
+                self.stream_client.close()
+            self.spans.close()
             self.browser_manager.stop()
             self.is_logged_in = False
             self.logger.info("Scraper cleanup completed")
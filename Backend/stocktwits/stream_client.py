@@ -0,0 +1,115 @@
+import logging
+from typing import Any, Dict, Iterator, List, Optional
+from datetime import datetime
+import pytz
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from html_parsing import PostData
+
+STREAM_URL = "https://api.stocktwits.com/api/2/streams/symbol/{ticker}.json"
+
+
+class StreamError(Exception):
+    """A symbol stream request that failed, status is the HTTP status (None for connection errors and bad JSON)"""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+    @property
+    def not_found(self) -> bool:
+        return self.status == 404
+
+
+class StockTwitsStreamClient:
+    """Reads StockTwits symbol message streams as JSON over one pooled, keep-alive HTTP session.
+
+    The session carries the cookies of a logged in browser (set_cookies), so it is authenticated once and
+    every ticker after that is a few small GETs instead of a page load and a scroll.
+    Messages come newest first, 30 a page, and the next page is the one with max=<cursor.max>.
+    """
+
+    def __init__(self,
+                 stream_url: str = STREAM_URL,
+                 timeout: float = 10,
+                 max_retries: int = 2,
+                 pool_size: int = 4,
+                 logger: Optional[logging.Logger] = None):
+        self.stream_url = stream_url
+        self.timeout = timeout
+        self.logger = logger or logging.getLogger(__name__)
+        self.requests_made = 0
+        self.bytes_received = 0
+
+        # Retries rate limits and server errors with backoff, anything else is left to the caller
+        retry = Retry(total=max_retries, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=("GET",), raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "Accept": "application/json",
+            "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36 Edg/124.0",
+        })
+
+    def set_cookies(self, cookies: List[Dict[str, Any]]) -> None:
+        """Copy cookies in the format WebDriver.get_cookies returns into the session"""
+        for cookie in cookies:
+            self.session.cookies.set(cookie["name"], cookie["value"],
+                                     domain=cookie.get("domain", ""), path=cookie.get("path", "/"))
+        self.logger.info(f"Stream session has {len(cookies)} browser cookies")
+
+    def fetch_page(self, ticker: str, max_id: Optional[int] = None) -> Dict[str, Any]:
+        params = {"max": max_id} if max_id is not None else None
+        url = self.stream_url.format(ticker=ticker.upper())
+        self.requests_made += 1
+
+        try:
+            response = self.session.get(url, params=params, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise StreamError(f"Stream request for {ticker} failed: {e}")
+        self.bytes_received += len(response.content)
+
+        if response.status_code == 404:
+            raise StreamError("Symbol not found", status=404)
+        if response.status_code != 200:
+            raise StreamError(f"Stream for {ticker} returned {response.status_code}", status=response.status_code)
+
+        try:
+            return response.json()
+        except ValueError as e:
+            raise StreamError(f"Stream for {ticker} returned invalid JSON: {e}", status=response.status_code)
+
+    def iter_pages(self, ticker: str, max_pages: int = 500) -> Iterator[List[Dict[str, Any]]]:
+        """Each page's messages, newest first, following the cursor until the stream has no more"""
+        max_id = None
+        for _ in range(max_pages):
+            page = self.fetch_page(ticker, max_id)
+            messages = page.get("messages") or []
+            yield messages
+
+            cursor = page.get("cursor") or {}
+            if not messages or not cursor.get("more") or cursor.get("max") is None:
+                return
+            max_id = cursor["max"]
+
+    @staticmethod
+    def post_from_message(message: Dict[str, Any], ticker: str) -> PostData:
+        """The PostData a stream message gives, dated like the page's <time datetime> attribute"""
+        date_info = message["created_at"]
+        datetime_object = pytz.UTC.localize(datetime.strptime(date_info, "%Y-%m-%dT%H:%M:%SZ"))
+        likes = (message.get("likes") or {}).get("total") or 0
+        return PostData(
+            message=message.get("body") or "",
+            date=date_info,
+            likes=int(likes),
+            datetime_object=datetime_object,
+            ticker=ticker
+        )
+
+    def close(self) -> None:
+        self.session.close()
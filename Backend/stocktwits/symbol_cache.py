@@ -0,0 +1,106 @@
+import os
+import time
+import logging
+import threading
+from typing import Dict, Optional
+
+DAY = 24 * 3600
+
+
+class NegativeSymbolCache:
+    """Tickers StockTwits has no symbol page for (a 404 page or a 404 from the stream), kept across runs.
+
+    A cached ticker is skipped without loading anything until its entry expires, then scraped once to
+    revalidate it: still missing and the entry is kept for twice as long (up to max_ttl_days), found and the
+    entry is dropped. So a newly listed ticker is picked up within ttl_days of its first miss, and
+    long dead ones cost a page load every max_ttl_days.
+    Saved as a joblib dict keyed by lowercase ticker, shared by every browser of a pool.
+    """
+
+    def __init__(self,
+                 path: Optional[str] = None,
+                 ttl_days: float = 7,
+                 max_ttl_days: float = 56,
+                 logger: Optional[logging.Logger] = None):
+        self.path = path
+        self.ttl_days = ttl_days
+        self.max_ttl_days = max_ttl_days
+        self.logger = logger or logging.getLogger(__name__)
+        self.tickers: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+        # This run's counts
+        self.skipped = 0  # page loads (or stream requests) saved
+        self.revalidated = 0
+        self.relisted = 0
+
+    @classmethod
+    def load(cls, path: Optional[str], logger: Optional[logging.Logger] = None, **kwargs) -> "NegativeSymbolCache":
+        cache = cls(path, logger=logger, **kwargs)
+        if path and os.path.exists(path):
+            try:
+                import joblib
+                with open(path, 'rb') as f:
+                    cache.tickers = joblib.load(f)
+                cache.logger.info(f"Loaded {len(cache.tickers)} missing symbols from {path}")
+            except Exception as e:
+                cache.logger.warning(f"Could not load missing symbols from {path}: {e}")
+        return cache
+
+    def ttl_seconds(self, entry: dict) -> float:
+        days = self.ttl_days * 2 ** (entry["misses"] - 1)
+        return min(days, self.max_ttl_days) * DAY
+
+    def should_skip(self, ticker: str, now: Optional[float] = None) -> bool:
+        """True while the ticker's entry is fresh. Past its TTL the ticker is let through once to revalidate"""
+        now = now if now is not None else time.time()
+        with self._lock:
+            entry = self.tickers.get(ticker.lower())
+            if entry is None:
+                return False
+            if now - entry["last_checked"] < self.ttl_seconds(entry):
+                self.skipped += 1
+                return True
+            self.revalidated += 1
+            return False
+
+    def mark_missing(self, ticker: str, reason: str = "404", now: Optional[float] = None) -> None:
+        now = now if now is not None else time.time()
+        with self._lock:
+            entry = self.tickers.setdefault(ticker.lower(), {"first_seen": now, "misses": 0})
+            entry["misses"] += 1
+            entry["last_checked"] = now
+            entry["reason"] = reason
+            self.logger.info(f"{ticker} not found on StockTwits ({reason}), skipping it for "
+                             f"{self.ttl_seconds(entry) / DAY:.0f} days")
+
+    def mark_found(self, ticker: str) -> None:
+        with self._lock:
+            if self.tickers.pop(ticker.lower(), None) is not None:
+                self.relisted += 1
+                self.logger.info(f"{ticker} is back on StockTwits, removed from the missing symbols")
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker.lower() in self.tickers
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "missing_symbols": len(self.tickers),
+            "page_loads_saved": self.skipped,
+            "revalidated": self.revalidated,
+            "relisted": self.relisted
+        }
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        import joblib
+        with self._lock:
+            tickers = {ticker: dict(entry) for ticker, entry in self.tickers.items()}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            joblib.dump(tickers, f)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,198 @@
+import os
+import json
+import math
+import logging
+import statistics
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+from dataclasses import dataclass, field
+
+from scroll_controller import ScrollHistory
+
+
+@dataclass
+class TickerHistory:
+    # What earlier runs saw for a ticker, newest day first
+    mentions: List[int] = field(default_factory=list)
+    scores: List[float] = field(default_factory=list)
+    last_scraped: Optional[str] = None  # ISO date of the last run that tried the ticker
+
+
+@dataclass
+class SchedulePlan:
+    tickers: List[str]  # in scrape order, highest priority first
+    scroll_budgets: Dict[str, float]  # lowercase ticker -> seconds of scrolling
+    priorities: Dict[str, float]
+    deferred: List[str]  # dead tickers left out of this run
+
+    def estimated_seconds(self, n: int, workers: int = 1, overhead: float = 15.0, default_budget: float = 2 + 4 + 8 + 16 + 48) -> float:
+        """Upper bound on the time until the first n tickers are done: their scroll budgets (default_budget without one,
+        the adaptive scroll's limit with the default max_scroll_time) plus page overhead"""
+        top = self.tickers[:n]
+        total = sum(self.scroll_budgets.get(ticker.lower(), default_budget) + overhead for ticker in top)
+        return total / max(1, workers)
+
+
+def fetch_history_rows(supabase_client, table: str = "full_data_with_accel", page_size: int = 1000) -> List[dict]:
+    """ticker, mentions_daily and daily_scores of every row, read a page at a time"""
+    rows = []
+    start = 0
+    while True:
+        response = supabase_client.table(table) \
+            .select("ticker,mentions_daily,daily_scores") \
+            .range(start, start + page_size - 1) \
+            .execute()
+        rows.extend(response.data or [])
+        if not response.data or len(response.data) < page_size:
+            return rows
+        start += page_size
+
+
+class TickerScheduler:
+    """Orders tickers so the busiest and most volatile are scraped first, and gives each a scroll budget.
+
+    Priority is log(1 + mean daily mentions) scaled up by the coefficient of variation of the daily scores,
+    over the last `window` days. Mentions and scores come from the full_data_with_accel rows when given
+    (seed_from_rows), otherwise from the local history this scheduler keeps at state_path.
+    A ticker with no posts (or no result) on each of its last dead_after_days runs is dead, and is only
+    scraped again once dead_interval_days have passed since its last try.
+    """
+
+    def __init__(self,
+                 state_path: Optional[str] = None,
+                 window: int = 7,
+                 volatility_weight: float = 1.0,
+                 dead_after_days: int = 5,
+                 dead_interval_days: int = 7,
+                 min_scroll_seconds: float = 10,
+                 max_scroll_seconds: float = 180,
+                 logger: Optional[logging.Logger] = None):
+        self.state_path = state_path
+        self.window = window
+        self.volatility_weight = volatility_weight
+        self.dead_after_days = dead_after_days
+        self.dead_interval_days = dead_interval_days
+        self.min_scroll_seconds = min_scroll_seconds
+        self.max_scroll_seconds = max_scroll_seconds
+        self.logger = logger or logging.getLogger(__name__)
+
+        self.history: Dict[str, TickerHistory] = {}  # observed by this scheduler, one entry per run day
+        self.table: Dict[str, TickerHistory] = {}  # from the database, used for priority when present
+
+    @classmethod
+    def load(cls, state_path: Optional[str], **kwargs) -> "TickerScheduler":
+        scheduler = cls(state_path, **kwargs)
+        if state_path and os.path.exists(state_path):
+            try:
+                import joblib
+                with open(state_path, 'rb') as f:
+                    scheduler.history = {ticker: TickerHistory(**entry) for ticker, entry in joblib.load(f).items()}
+            except Exception as e:
+                scheduler.logger.warning(f"Could not load ticker schedule from {state_path}: {e}")
+        return scheduler
+
+    def save(self) -> None:
+        if not self.state_path:
+            return
+        import joblib
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            joblib.dump({ticker: vars(entry) for ticker, entry in self.history.items()}, f)
+        os.replace(tmp_path, self.state_path)
+
+    def seed_from_rows(self, rows: Iterable[dict]) -> None:
+        """Use full_data_with_accel rows (mentions_daily and daily_scores as JSON lists, newest first) for priority"""
+        for row in rows:
+            try:
+                mentions = row.get("mentions_daily")
+                scores = row.get("daily_scores")
+                self.table[row["ticker"].lower()] = TickerHistory(
+                    mentions=[int(m) for m in (json.loads(mentions) if isinstance(mentions, str) else mentions or [])],
+                    scores=[float(s) for s in (json.loads(scores) if isinstance(scores, str) else scores or [])]
+                )
+            except (KeyError, TypeError, ValueError) as e:
+                self.logger.debug(f"Skipping history row {row.get('ticker')}: {e}")
+
+    def _source(self, ticker: str) -> Optional[TickerHistory]:
+        return self.table.get(ticker) or self.history.get(ticker)
+
+    def priority(self, ticker: str) -> float:
+        entry = self._source(ticker.lower())
+        if not entry or not entry.mentions:
+            return 0.0
+
+        mentions = entry.mentions[:self.window]
+        activity = math.log1p(sum(mentions) / len(mentions))
+
+        scores = entry.scores[:self.window]
+        volatility = 0.0
+        if len(scores) > 1:
+            mean = statistics.fmean(scores)
+            volatility = statistics.pstdev(scores) / abs(mean) if mean else 0.0
+        return activity * (1 + self.volatility_weight * min(volatility, 3.0))
+
+    def is_dead(self, ticker: str) -> bool:
+        entry = self.history.get(ticker.lower())
+        if not entry or len(entry.mentions) < self.dead_after_days:
+            return False
+        return not any(entry.mentions[:self.dead_after_days])
+
+    def is_due(self, ticker: str, today: Optional[date] = None) -> bool:
+        if not self.is_dead(ticker):
+            return True
+        last_scraped = self.history[ticker.lower()].last_scraped
+        if not last_scraped:
+            return True
+        return ((today or date.today()) - date.fromisoformat(last_scraped)).days >= self.dead_interval_days
+
+    def scroll_budget(self, ticker: str, scroll_history: Optional[ScrollHistory] = None) -> Optional[float]:
+        """Seconds of scrolling for the ticker: half again what it took last time, else sized from its mentions"""
+        cost = scroll_history.cost(ticker) if scroll_history else None
+        if cost:
+            budget = cost * 1.5
+        else:
+            entry = self._source(ticker.lower())
+            if not entry or not entry.mentions:
+                return None
+            # About 30 posts load per scroll and a scroll settles in around a second and a half
+            budget = self.min_scroll_seconds + max(entry.mentions[:self.window]) * 0.05
+        return min(self.max_scroll_seconds, max(self.min_scroll_seconds, budget))
+
+    def plan(self, tickers: List[str], today: Optional[date] = None, scroll_history: Optional[ScrollHistory] = None) -> SchedulePlan:
+        priorities = {ticker: self.priority(ticker) for ticker in tickers}
+        live, dead, deferred = [], [], []
+        for ticker in tickers:
+            if not self.is_dead(ticker):
+                live.append(ticker)
+            elif self.is_due(ticker, today):
+                dead.append(ticker)
+            else:
+                deferred.append(ticker)
+
+        # sorted is stable, so equal priorities (tickers with no history) keep the file order
+        ordered = sorted(live, key=lambda t: -priorities[t]) + sorted(dead, key=lambda t: -priorities[t])
+        budgets = {}
+        for ticker in ordered:
+            budget = self.scroll_budget(ticker, scroll_history)
+            if budget is not None:
+                budgets[ticker.lower()] = budget
+
+        self.logger.info(f"Scheduled {len(ordered)} tickers ({len(dead)} dead ones last), deferred {len(deferred)} dead tickers")
+        return SchedulePlan(tickers=ordered, scroll_budgets=budgets, priorities=priorities, deferred=deferred)
+
+    def record_run(self, results: Dict[str, dict], attempted: Iterable[str], today: Optional[date] = None) -> None:
+        """Add a day to the history of every ticker the run tried (completed or failed), 0 mentions without a result"""
+        today_iso = (today or date.today()).isoformat()
+        for ticker in attempted:
+            ticker = ticker.lower()
+            entry = self.history.setdefault(ticker, TickerHistory())
+            result = results.get(ticker)
+            mentions = int(result.get("total_mentions", 0)) if isinstance(result, dict) else 0
+
+            # A second run on the same day replaces that day instead of adding one
+            if entry.last_scraped == today_iso and entry.mentions:
+                entry.mentions[0] = mentions
+            else:
+                entry.mentions.insert(0, mentions)
+            del entry.mentions[30:]
+            entry.last_scraped = today_iso
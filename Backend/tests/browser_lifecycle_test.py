@@ -0,0 +1,116 @@
+# tests/browser_lifecycle_test.py tests BrowserLifecycle only kills its own browser processes and when browsers are recycled
+
+import os
+import sys
+import time
+import subprocess
+from datetime import datetime
+import pytz
+from browser_lifecycle import BrowserLifecycle, descendants, is_browser_process
+from stocktwits_scraper import StockTwitsScraper, ScrapingConfig
+from fake_stocktwits import FakeFeedBrowser
+import pytest
+
+
+@pytest.fixture
+def fake_browsers(tmp_path):
+    """Starts python under browser process names: msedgedriver with an msedge child, and an unrelated chrome"""
+    names = {}
+    for name in ("msedgedriver", "msedge", "chrome"):
+        names[name] = str(tmp_path / name)
+        os.symlink(sys.executable, names[name])
+
+    processes = []
+
+    def start(name, child=None):
+        code = "import time; time.sleep(60)"
+        if child:
+            code = f"import subprocess; subprocess.Popen([{names[child]!r}, '-c', 'import time; time.sleep(60)']); {code}"
+        process = subprocess.Popen([names[name], "-c", code])
+        processes.append(process)
+        return process
+
+    yield start
+    for process in processes:
+        process.kill()
+        process.wait()
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.05)
+    return condition()
+
+
+# Test only the tracked driver and its children are killed, another browser on the machine keeps running
+def test_kills_only_tracked(fake_browsers, tmp_path):
+    driver = fake_browsers("msedgedriver", child="msedge")
+    other = fake_browsers("chrome")
+    assert wait_for(lambda: descendants(driver.pid))
+    child = descendants(driver.pid).pop()
+
+    lifecycle = BrowserLifecycle(pid_file=str(tmp_path / "profile.pids"))
+    lifecycle.track(driver.pid)
+    assert lifecycle.pids == {driver.pid, child}
+
+    assert lifecycle.kill_tracked() == 2
+    driver.wait(timeout=5)
+    assert wait_for(lambda: not is_browser_process(child))
+    assert is_browser_process(other.pid)
+
+
+# Test a new run kills what the last one recorded in the pid file, but never a PID that is no longer a browser
+def test_kills_stale_from_pid_file(fake_browsers, tmp_path):
+    pid_file = str(tmp_path / "profile.pids")
+    driver = fake_browsers("msedgedriver")
+    BrowserLifecycle(pid_file=pid_file).track(driver.pid)
+
+    not_a_browser = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    with open(pid_file, "a") as f:
+        f.write(f"{not_a_browser.pid}\n")
+
+    try:
+        assert BrowserLifecycle(pid_file=pid_file).kill_stale() == 1
+        driver.wait(timeout=5)
+        assert not_a_browser.poll() is None
+    finally:
+        not_a_browser.kill()
+        not_a_browser.wait()
+
+
+# Test browsers are recycled by page count and memory, and only the first ticker after a start is timed
+def test_recycle_reason_and_first_ticker():
+    lifecycle = BrowserLifecycle(max_pages=3)
+    lifecycle.track(None)
+    for _ in range(2):
+        lifecycle.page_loaded()
+    assert lifecycle.recycle_reason() is None
+    lifecycle.page_loaded()
+    assert lifecycle.recycle_reason() == "3 pages loaded"
+
+    # The test process itself stands in for a browser using more than 1MB
+    lifecycle = BrowserLifecycle(max_rss_mb=1)
+    lifecycle.track(os.getpid())
+    assert lifecycle.recycle_reason().startswith("using")
+
+    assert lifecycle.ticker_finished() >= 0
+    assert lifecycle.ticker_finished() is None
+    lifecycle.pids = set()
+    lifecycle.track(None)
+    assert lifecycle.ticker_finished() is not None
+    assert len(lifecycle.first_ticker_latencies) == 2
+
+
+# Test the scraper logs a recycled browser back in and keeps scraping
+def test_scraper_recycles_browser():
+    browser = FakeFeedBrowser(num_posts=60, now=datetime.now(pytz.UTC), recycle_after=2)
+    config = ScrapingConfig(scroll_delay=0.1, fetch_mode="browser", ticker_delay=0)
+    scraper = StockTwitsScraper(config=config, browser_manager=browser)
+    assert scraper.initialize("user", "pass")
+
+    results = [scraper.scrape_ticker(ticker) for ticker in ["AAPL", "TSLA", "NKE", "AMD", "GME"]]
+    assert all(result.success for result in results)
+    assert browser.recycles == 2
+    assert browser.logins == 3
+    assert browser.first_tickers == 3
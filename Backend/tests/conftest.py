@@ -1,5 +1,6 @@
-# tests/conftest.py allows files from parent direct to be found
+# tests/conftest.py allows files from parent direct (and the sibling imports inside stocktwits/) to be found
 import sys
 import os
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "stocktwits")))
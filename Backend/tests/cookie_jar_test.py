@@ -0,0 +1,132 @@
+# tests/cookie_jar_test.py tests the encrypted cookie jar and how login_stocktwits uses it
+
+import os
+import time
+import pytest
+
+pytest.importorskip("cryptography")
+
+import cookie_jar
+import browser_manager
+from cookie_jar import CookieJar
+from browser_manager import BrowserManager
+from selenium.common.exceptions import NoSuchElementException
+
+SESSION = [
+    {"name": "access_token", "value": "secret-session-token", "domain": ".stocktwits.com", "path": "/",
+     "secure": True, "httpOnly": True, "expiry": int(time.time()) + 86400, "sameSite": "Lax"},
+    {"name": "theme", "value": "dark", "domain": "stocktwits.com", "path": "/"},
+]
+
+
+class FakeElement:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def send_keys(self, text):
+        pass
+
+    def is_displayed(self):
+        return True
+
+    def is_enabled(self):
+        return True
+
+    def click(self):
+        self.driver.form_logins += 1
+        self.driver.cookies = list(SESSION)
+        self.driver.current_url = "https://stocktwits.com/"
+
+
+class FakeDriver:
+    """The signin page redirects home when a valid access_token cookie is set, otherwise shows the form"""
+
+    def __init__(self):
+        self.cookies = []
+        self.current_url = "about:blank"
+        self.title = ""
+        self.form_logins = 0
+        self.navigations = []
+
+    def execute_cdp_cmd(self, command, params):
+        if command == "Network.setCookies":
+            assert not self.navigations, "cookies must be set before the first navigation"
+            self.cookies = [{**cookie, "expiry": cookie.get("expires")} for cookie in params["cookies"]]
+
+    def get(self, url):
+        self.navigations.append(url)
+        valid = any(c["name"] == "access_token" and c["value"] == "secret-session-token" for c in self.cookies)
+        self.current_url = "https://stocktwits.com/" if valid else url
+
+    def execute_script(self, script, *args):
+        return "complete"
+
+    def find_element(self, by, value):
+        if "log-in" in value:
+            return FakeElement(self)
+        raise NoSuchElementException(value)
+
+    def get_cookies(self):
+        return self.cookies
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(browser_manager.time, "sleep", lambda seconds: None)
+
+    def make(jar):
+        browser = BrowserManager(timeout=1, cookie_jar=jar)
+        browser.driver = FakeDriver()
+        return browser
+    return make
+
+
+# Test cookies survive a round trip, are not readable on disk and need the right secret
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "cookies.bin")
+    assert CookieJar(path, secret="hunter2").save(SESSION)
+    assert CookieJar(path, secret="hunter2").load() == SESSION
+
+    with open(path, "rb") as f:
+        assert b"secret-session-token" not in f.read()
+    assert os.stat(path).st_mode & 0o777 == 0o600
+    assert CookieJar(path, secret="wrong").load() is None
+
+
+# Test old jars and expired cookies are not used
+def test_expiry(tmp_path, monkeypatch):
+    path = str(tmp_path / "cookies.bin")
+    expired = {"name": "old", "value": "x", "expiry": int(time.time()) - 10}
+    CookieJar(path, secret="hunter2", max_age_hours=1).save(SESSION + [expired])
+    assert CookieJar(path, secret="hunter2", max_age_hours=1).load() == SESSION
+
+    later = time.time() + 2 * 3600
+    monkeypatch.setattr(cookie_jar.time, "time", lambda: later)
+    assert CookieJar(path, secret="hunter2", max_age_hours=1).load() is None
+
+
+# Test the first login uses the form and caches the session, the next browser restores it without the form
+def test_login_restores_session(tmp_path, manager):
+    jar = CookieJar(str(tmp_path / "cookies.bin"), secret="hunter2")
+    first = manager(jar)
+    assert first.login_stocktwits("user", "pass")
+    assert first.driver.form_logins == 1 and first.restored_sessions == 0
+
+    second = manager(jar)
+    assert second.login_stocktwits("user", "pass")
+    assert second.driver.form_logins == 0 and second.restored_sessions == 1
+    assert second.driver.navigations == ["https://stocktwits.com/signin"]
+
+
+# Test a session the site no longer accepts falls back to the form and replaces the cached one
+def test_invalid_session_falls_back(tmp_path, manager):
+    jar = CookieJar(str(tmp_path / "cookies.bin"), secret="hunter2")
+    jar.save([{**SESSION[0], "value": "revoked"}])
+
+    browser = manager(jar)
+    assert browser.login_stocktwits("user", "pass")
+    assert browser.driver.form_logins == 1 and browser.restored_sessions == 0
+    assert jar.load() == SESSION
@@ -0,0 +1,90 @@
+# tests/enrichment_test.py tests MarketDataEnricher's concurrency, failure isolation, timeouts, rate limit and circuit breaker
+
+import time
+import threading
+from enrichment import MarketDataEnricher, EnrichmentCall, RateLimiter, CircuitBreaker
+
+
+def slow(value, seconds=0.1):
+    def fetch(ticker):
+        time.sleep(seconds)
+        return value(ticker) if callable(value) else value
+    return fetch
+
+
+def enricher(calls, **kwargs):
+    kwargs.setdefault("requests_per_second", 1000)
+    return MarketDataEnricher(calls=calls, **kwargs)
+
+
+# Test calls run in parallel and every ticker gets a record with every field
+def test_parallel_records():
+    calls = {
+        "wiv": EnrichmentCall(slow(lambda t: len(t)), default=0),
+        "stock_price": EnrichmentCall(slow([1.0, 2.0]), default=[]),
+    }
+    start = time.time()
+    records = enricher(calls, max_workers=8).enrich(["a", "bb", "ccc", "dddd"])
+    assert time.time() - start < 0.4  # 8 calls of 0.1s, serially 0.8s
+
+    assert records["ccc"].values == {"wiv": 3, "stock_price": [1.0, 2.0]}
+    assert all(record.ok for record in records.values())
+
+
+# Test a ticker's failing call gets the default without touching other fields or tickers
+def test_failures_isolated():
+    def iv(ticker):
+        if ticker == "none":
+            raise ValueError("min() arg is an empty sequence")
+        return 5
+
+    calls = {"wiv": EnrichmentCall(iv, default=0), "stock_price": EnrichmentCall(lambda t: [1.0], default=[])}
+    records = enricher(calls, max_workers=2).enrich(["aapl", "none"])
+    assert records["none"].values == {"wiv": 0, "stock_price": [1.0]}
+    assert "ValueError" in records["none"].errors["wiv"]
+    assert records["aapl"].ok
+
+
+# Test a call that hangs is abandoned after call_timeout
+def test_timeout():
+    release = threading.Event()
+    calls = {"price": EnrichmentCall(lambda t: release.wait(5) and [] if t == "hang" else [1.0], default=[])}
+    start = time.time()
+    records = enricher(calls, max_workers=2, call_timeout=0.3).enrich(["hang", "aapl"])
+    release.set()
+
+    assert time.time() - start < 2
+    assert records["hang"].errors["price"].startswith("timed out") and records["hang"].values["price"] == []
+    assert records["aapl"].values["price"] == [1.0]
+
+
+# Test connection errors open the circuit so the remaining calls fail fast, data errors don't
+def test_circuit_breaker():
+    attempts = []
+
+    def down(ticker):
+        attempts.append(ticker)
+        raise ConnectionError("connection refused")
+
+    records = enricher({"price": EnrichmentCall(down, default=[])}, max_workers=1, breaker_threshold=3,
+                       breaker_cooldown=60).enrich([f"t{i}" for i in range(10)])
+    assert len(attempts) == 3
+    assert "circuit open" in records["t9"].errors["price"]
+
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=0.1)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert not breaker.allow()
+    time.sleep(0.15)
+    assert breaker.allow() and not breaker.allow()  # one trial call while half open
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+# Test the token bucket paces requests to the rate once the burst is spent
+def test_rate_limiter():
+    limiter = RateLimiter(rate=20, burst=2)
+    start = time.time()
+    for _ in range(6):
+        limiter.acquire()
+    assert 0.15 < time.time() - start < 0.5
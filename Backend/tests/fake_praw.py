@@ -0,0 +1,117 @@
+# tests/fake_praw.py is an offline stand-in for the parts of praw used by RedditAPI
+
+import time
+import itertools
+
+_ids = itertools.count()
+
+
+class FakeComment:
+    def __init__(self, body, score=1, id=None, parent_id=None, replies=()):
+        self.body = body
+        self.score = score
+        self.id = id if id is not None else f"c{next(_ids)}"
+        self.parent_id = parent_id
+        self.replies = FakeCommentForest(replies)
+
+    @property
+    def fullname(self):
+        return f"t1_{self.id}"
+
+
+class FakeMoreComments:
+    def __init__(self, parent_id, comments, delay=0.0):
+        self.parent_id = parent_id
+        self._comments = list(comments)
+        self.children = [comment.id for comment in self._comments]
+        self.count = len(self._comments)
+        self.delay = delay
+        self.calls = 0
+
+    def comments(self, update=True):
+        # Sleeps to stand in for the morechildren API call
+        self.calls += 1
+        time.sleep(self.delay)
+        return list(self._comments)
+
+
+class FakeCommentForest:
+    def __init__(self, comments, delay=0.0):
+        self._comments = list(comments)
+        self.delay = delay
+        self.replace_more_calls = 0
+
+    def replace_more(self, limit=32):
+        # Sleeps to stand in for the API calls made while expanding the tree, then swaps every MoreComments
+        # for the comments it stands for like praw does
+        self.replace_more_calls += 1
+        time.sleep(self.delay)
+        self._comments = self._expanded(self._comments)
+        return []
+
+    @classmethod
+    def _expanded(cls, items):
+        expanded = []
+        for item in items:
+            if isinstance(item, FakeMoreComments):
+                expanded.extend(cls._expanded(item.comments()))
+            else:
+                item.replies._comments = cls._expanded(item.replies._comments)
+                expanded.append(item)
+        return expanded
+
+    def list(self):
+        # Breadth first like praw, MoreComments are returned alongside comments
+        items = []
+        queue = list(self._comments)
+        while queue:
+            item = queue.pop(0)
+            items.append(item)
+            if isinstance(item, FakeComment):
+                queue.extend(item.replies._comments)
+        return items
+
+
+class FakePost:
+    def __init__(self, title, selftext="", ups=1, comments=(), id=None, created_utc=0.0, delay=0.0):
+        self.title = title
+        self.selftext = selftext
+        self.ups = ups
+        self.id = id
+        self.created_utc = created_utc
+        self.comments = FakeCommentForest(comments, delay)
+
+    @property
+    def score(self):
+        return self.ups
+
+    @property
+    def fullname(self):
+        return f"t3_{self.id}"
+
+
+class FakeSubreddit:
+    def __init__(self, name, posts):
+        self.display_name = name
+        self.posts = list(posts)
+
+    def _listing(self, limit=100):
+        return iter(self.posts[:limit])
+
+    hot = new = rising = top = _listing
+
+
+class FakeReddit:
+    def __init__(self, subreddits):
+        self.subreddits = {subreddit.display_name: subreddit for subreddit in subreddits}
+
+    def subreddit(self, name):
+        return self.subreddits[name]
+
+    def submission(self, id):
+        # The same post objects, so expanding them through another instance fills in the same comments
+        for subreddit in self.subreddits.values():
+            for post in subreddit.posts:
+                if post.id == id:
+                    return post
+        raise KeyError(id)
@@ -0,0 +1,71 @@
+# tests/html_parsing_test.py tests the lxml parser backend gives the same results as BeautifulSoup
+
+from datetime import datetime, timedelta
+import pytz
+from html_parsing import StockTwitsHTMLParser
+from fake_stocktwits import build_page, build_post, FEED
+import pytest
+
+now = datetime(2025, 6, 11, 18, 30, tzinfo=pytz.UTC)
+target = now - timedelta(hours=24)
+
+
+@pytest.fixture(params=["lxml", "bs4"])
+def parser(request):
+    return StockTwitsHTMLParser(backend=request.param)
+
+
+# Test both backends read the same posts, metrics and validation
+def test_backends_agree():
+    html = build_page(120, now=now)
+    lxml_parser = StockTwitsHTMLParser(backend="lxml")
+    soup_parser = StockTwitsHTMLParser(backend="bs4")
+
+    assert lxml_parser.parse_posts_to_list(html, "AAPL", target) == soup_parser.parse_posts_to_list(html, "AAPL", target)
+    assert lxml_parser.parse_posts_to_metrics(html, "AAPL", target) == soup_parser.parse_posts_to_metrics(html, "AAPL", target)
+    assert lxml_parser.validate_page_content(html) == soup_parser.validate_page_content(html)
+    assert lxml_parser.check_earliest_post_date(html, target) == soup_parser.check_earliest_post_date(html, target)
+
+
+# Test one parse_page call gives what the separate calls give
+def test_parse_page_matches_separate_calls(parser):
+    html = build_page(120, now=now)
+    page = parser.parse_page(html, "AAPL", target, reached_target_date=True)
+
+    posts = parser.parse_posts_to_list(html, "AAPL", target)
+    assert page.posts == posts
+    assert page.metrics == parser.parse_posts_to_metrics(html, "AAPL", target, reached_target_date=True)
+    assert page.validation == parser.validate_page_content(html)
+    assert page.earliest_post_date == min(post.datetime_object for post in posts)
+    assert page.latest_post_date == now
+    assert page.post_count == 120
+
+    # Posts are 20 minutes apart, so 72 are inside the last 24 hours
+    assert page.metrics.total_mentions == 72
+    assert page.posts[0].message == "post 0 going down$AAPL& more"
+    assert page.posts[-1].likes == (71 * 37) % 1500
+
+
+# Test the likes count is read from the third label with thousands separators
+def test_extracts_likes(parser):
+    html = f'<div class="{FEED}">{build_post("hi", now, likes=1234)}</div>'
+    assert parser.parse_posts_to_list(html, "AAPL", target)[0].likes == 1234
+
+
+# Test pages without a feed or with a 404 are invalid
+def test_validation(parser):
+    no_feed = parser.parse_page(build_page(0, now=now, feed=False), "AAPL", target).validation
+    assert not no_feed["has_feed"] and not no_feed["is_valid"]
+    assert no_feed["error_message"] == "Login required"
+    not_found = parser.validate_page_content(build_page(0, now=now, title="Page Not Found - 404 - Symbol Page"))
+    assert not_found["is_404"] and not not_found["is_valid"]
+    assert parser.validate_page_content("") == {
+        "is_valid": False, "is_404": False, "has_feed": False, "has_posts": False, "needs_login": False,
+        "error_message": "Feed container not found",
+    }
+
+
+# Test unknown backends are rejected
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        StockTwitsHTMLParser(backend="regex")
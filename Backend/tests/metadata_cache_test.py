@@ -0,0 +1,53 @@
+# tests/metadata_cache_test.py tests MetadataCache's per-field TTLs, persistence and bulk refresh
+
+from metadata_cache import MetadataCache, DAY
+
+
+# Test each field expires on its own TTL and None is cached like a value
+def test_ttls():
+    cache = MetadataCache(ttls={"shares_outstanding": 7 * DAY, "options": DAY})
+    cache.set("aapl", "shares_outstanding", 15_000_000_000, now=0)
+    cache.set("AAPL", "options", ["2025-07-18"], now=0)
+    cache.set("SPY", "shares_outstanding", None, now=0)
+
+    assert cache.lookup("AAPL", "shares_outstanding", now=6 * DAY) == (True, 15_000_000_000)
+    assert cache.lookup("aapl", "options", now=0.5 * DAY) == (True, ["2025-07-18"])
+    assert cache.lookup("AAPL", "options", now=DAY) == (False, None)
+    assert cache.lookup("spy", "shares_outstanding", now=DAY) == (True, None)
+    assert cache.lookup("MSFT", "options") == (False, None)
+
+
+# Test get_or_fetch only fetches on a miss and the cache survives a save and load
+def test_get_or_fetch_and_persistence(tmp_path):
+    path = str(tmp_path / "metadata.joblib")
+    cache = MetadataCache(path)
+    fetches = []
+    fetch = lambda: fetches.append(1) or 42
+
+    assert cache.get_or_fetch("AAPL", "shares_outstanding", fetch) == 42
+    assert cache.get_or_fetch("AAPL", "shares_outstanding", fetch) == 42
+    assert len(fetches) == 1 and (cache.hits, cache.misses) == (1, 1)
+
+    cache.save()
+    assert MetadataCache.load(path).get_or_fetch("AAPL", "shares_outstanding", fetch) == 42
+    assert len(fetches) == 1
+
+
+# Test refresh fetches only what is missing or expired unless forced, and a failing ticker doesn't stop the rest
+def test_refresh():
+    cache = MetadataCache()
+    cache.set("AAPL", "options", ["old"])
+    fetched = []
+
+    def options(ticker):
+        fetched.append(ticker)
+        if ticker == "BAD":
+            raise ConnectionError("reset")
+        return [ticker]
+
+    assert cache.refresh(["AAPL", "NKE", "BAD"], {"options": options}, max_workers=2) == {"refreshed": 1, "failed": 1}
+    assert sorted(fetched) == ["BAD", "NKE"]
+    assert cache.lookup("AAPL", "options")[1] == ["old"]
+
+    assert cache.refresh(["AAPL"], {"options": options}, force=True) == {"refreshed": 1, "failed": 0}
+    assert cache.lookup("AAPL", "options")[1] == ["AAPL"]
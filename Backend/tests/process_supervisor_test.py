@@ -0,0 +1,105 @@
+# tests/process_supervisor_test.py tests ProcessSupervisor tracks progress from worker heartbeats
+
+import time
+import multiprocessing
+from datetime import datetime, timedelta
+from process_supervisor import ProcessSupervisor, MonitoringConfig
+from heartbeat import HeartbeatReporter
+
+
+def heartbeat_worker(stop_event, restart_event, heartbeat_queue):
+    heartbeat = HeartbeatReporter(heartbeat_queue)
+    for ticker in ["AAPL", "TSLA", "NKE"]:
+        heartbeat.ticker_started(ticker)
+        heartbeat.scroll_progress(ticker, scroll_depth=3, posts=40)
+        heartbeat.ticker_finished(ticker, success=ticker != "NKE", posts=40)
+    time.sleep(5)
+
+
+def make_supervisor(**config):
+    return ProcessSupervisor(config=MonitoringConfig(check_interval=0.1, min_runtime=0, **config))
+
+
+# Test heartbeats update completion, failures and the current ticker without any output file
+def test_heartbeats_track_progress():
+    supervisor = make_supervisor()
+    supervisor.target_tickers = {"aapl", "tsla", "nke", "amd"}
+    supervisor.heartbeat_queue = multiprocessing.Queue()
+    heartbeat = HeartbeatReporter(supervisor.heartbeat_queue)
+
+    heartbeat.ticker_finished("AMD", success=True, skipped=True)
+    heartbeat.ticker_started("AAPL")
+    heartbeat.scroll_progress("AAPL", scroll_depth=12, posts=300)
+    heartbeat.ticker_finished("AAPL", success=True, posts=310)
+    heartbeat.ticker_started("TSLA")
+    heartbeat.scroll_progress("TSLA", scroll_depth=4, posts=90)
+    time.sleep(0.2)
+
+    health = supervisor._check_process_health()
+    assert supervisor.completed_tickers == {"amd", "aapl"}
+    assert health.current_ticker == "tsla"
+    assert health.scroll_depth == 4
+    assert health.posts_parsed == 310
+    assert health.completion_rate == 0.5
+    assert (datetime.now() - health.last_heartbeat).total_seconds() < 5
+
+    heartbeat.ticker_finished("TSLA", success=False)
+    time.sleep(0.2)
+    supervisor._check_process_health()
+    assert supervisor.failed_tickers == {"tsla"}
+    assert supervisor.get_remaining_tickers() == {"tsla", "nke"}
+
+
+# Test a process whose heartbeats stop is restarted
+def test_missing_heartbeats_trigger_restart():
+    supervisor = make_supervisor(max_heartbeat_age=10)
+    supervisor.process = multiprocessing.Process(target=time.sleep, args=(5,))
+    supervisor.process.start()
+    try:
+        supervisor.start_time = datetime.now()
+        supervisor.last_progress_time = datetime.now()
+        supervisor.last_heartbeat_time = datetime.now()
+        assert not supervisor._should_restart(supervisor._check_process_health())
+
+        supervisor.last_heartbeat_time = datetime.now() - timedelta(seconds=11)
+        assert supervisor._should_restart(supervisor._check_process_health())
+    finally:
+        supervisor.process.terminate()
+        supervisor.process.join()
+
+
+# Test the supervisor runs the worker and reads its heartbeats from the other process
+def test_supervised_worker_heartbeats():
+    supervisor = make_supervisor()
+    assert supervisor.start_monitoring(heartbeat_worker, target_tickers=["AAPL", "TSLA", "NKE"])
+    try:
+        deadline = time.time() + 10
+        while time.time() < deadline and len(supervisor.completed_tickers) < 2:
+            time.sleep(0.1)
+        status = supervisor.get_status()
+        assert supervisor.completed_tickers == {"aapl", "tsla"}
+        assert status["failed_tickers"] == 1
+        assert status["posts_parsed"] == 120
+        assert not status["all_completed"]
+    finally:
+        supervisor.stop_monitoring(timeout=1)
+
+
+# Test the time from a process start to its first finished ticker is recorded once per start
+def test_restart_to_first_ticker():
+    supervisor = make_supervisor()
+    supervisor.heartbeat_queue = multiprocessing.Queue()
+    supervisor.start_time = datetime.now() - timedelta(seconds=30)
+    supervisor._awaiting_first_ticker = True
+    heartbeat = HeartbeatReporter(supervisor.heartbeat_queue)
+
+    heartbeat.ticker_finished("AMD", success=True, skipped=True)
+    heartbeat.ticker_finished("NKE", success=False)
+    heartbeat.ticker_finished("AAPL", success=True, posts=10)
+    heartbeat.ticker_finished("TSLA", success=True, posts=10)
+    time.sleep(0.2)
+
+    health = supervisor._check_process_health()
+    assert len(supervisor.first_ticker_latencies) == 1
+    assert 30 <= health.restart_to_first_ticker < 35
+    assert supervisor.get_status()["restart_to_first_ticker_seconds"] == supervisor.first_ticker_latencies
@@ -0,0 +1,264 @@
+# tests/reddit_fetch_test.py tests fetching Reddit data against the fake praw in tests/fake_praw.py
+
+import time
+import threading
+import RedditAPI
+from RedditAPI import get_data, get_data_pipelined, setup_matcher, setup_logger, RedditScrapeState, expand_comments_budgeted
+from fake_praw import FakeComment, FakeCommentForest, FakeMoreComments, FakePost, FakeSubreddit, FakeReddit
+import pytest
+
+company_to_ticker = {"apple": "aapl", "nvidia": "nvda"}
+tickers = ["aapl", "nvda", "tsla"]
+
+
+def make_reddit(delay=0.0):
+    stocks = FakeSubreddit("stocks", [
+        FakePost("AAPL to the moon", "apple earnings", ups=10, id="a1",
+                 comments=[FakeComment("nvda too"), FakeMoreComments("t3_a1", [FakeComment("sold my TSLA")], delay)]),
+        FakePost("Thoughts on Nvidia?", ups=5, id="a2",
+                 comments=[FakeMoreComments("t3_a2", [FakeComment("nvda is fine")], delay)]),
+    ])
+    investing = FakeSubreddit("investing", [
+        FakePost("Apple", ups=3, id="b1", comments=[FakeMoreComments("t3_b1", [FakeComment("buy aapl")], delay)]),
+        FakePost("nothing here", ups=100, id="b2", comments=[FakeMoreComments("t3_b2", [], delay)]),
+    ])
+    return FakeReddit([stocks, investing])
+
+
+@pytest.fixture(autouse=True)
+def logger(monkeypatch):
+    setup_logger()
+    monkeypatch.setattr(RedditAPI, "MoreComments", FakeMoreComments)
+
+
+@pytest.fixture
+def matcher():
+    return setup_matcher(tickers, company_to_ticker.keys(), engine="token")
+
+
+# Test the pipelined fetcher gives the same counts as the serial one
+def test_pipelined_matches_serial(matcher):
+    serial = {ticker: [0, 0] for ticker in tickers}
+    for name in ["stocks", "investing"]:
+        get_data(name, make_reddit(), serial, matcher, company_to_ticker)
+
+    pipelined = {ticker: [0, 0] for ticker in tickers}
+    stats = get_data_pipelined(["stocks", "investing"], make_reddit(), pipelined, matcher, company_to_ticker, max_workers=3)
+
+    assert pipelined == serial
+    assert pipelined["aapl"] == [4, 13]
+    assert stats["posts"] == 4
+    assert stats["failed_posts"] == 0
+    assert stats["posts_per_sec"] > 0
+
+
+# Test comment trees are expanded concurrently
+def test_pipelined_overlaps_expansion(matcher):
+    reddit = make_reddit(delay=0.2)
+    data_dict = {ticker: [0, 0] for ticker in tickers}
+    start = time.time()
+    get_data_pipelined(["stocks", "investing"], reddit, data_dict, matcher, company_to_ticker, max_workers=4,
+                       reddit_factory=lambda: FakeReddit(reddit.subreddits.values()))
+    assert time.time() - start < 0.6
+
+
+# Test every worker thread expands posts through a Reddit instance of its own, never the shared one
+def test_pipelined_reddit_per_thread(matcher, monkeypatch):
+    reddit = make_reddit(delay=0.05)
+    instances = {}
+
+    def reddit_factory():
+        instance = FakeReddit(reddit.subreddits.values())
+        instances.setdefault(threading.get_ident(), []).append(instance)
+        return instance
+
+    expanded_by = {}
+    expand_comments = RedditAPI.expand_comments
+    monkeypatch.setattr(reddit, "submission", lambda id: pytest.fail("shared Reddit instance used by a worker"))
+
+    def recording_expand(post):
+        expanded_by[post.id] = threading.get_ident()
+        return expand_comments(post)
+
+    monkeypatch.setattr(RedditAPI, "expand_comments", recording_expand)
+    data_dict = {ticker: [0, 0] for ticker in tickers}
+    stats = get_data_pipelined(["stocks", "investing"], reddit, data_dict, matcher, company_to_ticker, max_workers=2,
+                               reddit_factory=reddit_factory)
+
+    assert stats["posts"] == 4 and data_dict["aapl"] == [4, 13]
+    assert all(len(built) == 1 for built in instances.values())
+    assert set(expanded_by.values()) <= set(instances) and threading.get_ident() not in instances
+
+
+# Test a failing post doesn't stop the others
+def test_pipelined_isolates_failures(matcher, monkeypatch):
+    expand_comments = RedditAPI.expand_comments
+
+    def flaky_expand(post):
+        if post.id == "a2":
+            raise RuntimeError("boom")
+        return expand_comments(post)
+
+    monkeypatch.setattr(RedditAPI, "expand_comments", flaky_expand)
+    data_dict = {ticker: [0, 0] for ticker in tickers}
+    stats = get_data_pipelined(["stocks", "investing"], make_reddit(), data_dict, matcher, company_to_ticker)
+    assert stats["posts"] == 3
+    assert stats["failed_posts"] == 1
+
+
+# Test a second run only counts new comments and the change in upvotes
+def test_incremental_runs(matcher, tmp_path):
+    path = str(tmp_path / "state.joblib")
+    now = time.time()
+    post = FakePost("AAPL", ups=10, id="p1", created_utc=now, comments=[FakeComment("tsla", id="c1")])
+    reddit = FakeReddit([FakeSubreddit("stocks", [post])])
+
+    first = {ticker: [0, 0] for ticker in tickers}
+    state = RedditScrapeState.load(path)
+    get_data_pipelined(["stocks"], reddit, first, matcher, company_to_ticker, state=state)
+    state.save()
+    assert first["aapl"] == [1, 10]
+    assert first["tsla"] == [1, 10]
+
+    post.ups = 15
+    post.comments = FakeCommentForest([FakeComment("tsla", id="c1"), FakeComment("nvda", id="c2")])
+    second = {ticker: [0, 0] for ticker in tickers}
+    state = RedditScrapeState.load(path)
+    get_data_pipelined(["stocks"], reddit, second, matcher, company_to_ticker, state=state)
+    state.save()
+    assert second["aapl"] == [0, 5]
+    assert second["tsla"] == [0, 5]
+    assert second["nvda"] == [1, 15]
+    assert state.subreddits["stocks"]["last_post_id"] == "p1"
+
+
+# Test counted posts older than the revisit window are not fetched again, and a "new" listing stops at them
+def test_incremental_skips_stale_posts(matcher, monkeypatch):
+    monkeypatch.setattr(RedditAPI.config, "POST_TYPE", "new")
+    now = time.time()
+    fresh = FakePost("AAPL", ups=10, id="fresh", created_utc=now - 3600)
+    stale = FakePost("AAPL", ups=10, id="stale", created_utc=now - 48 * 3600)
+    older = FakePost("AAPL", ups=10, id="older", created_utc=now - 72 * 3600)
+    state = RedditScrapeState(revisit_hours=24)
+    state.subreddits["stocks"] = {"last_post_id": "stale", "last_post_created_utc": stale.created_utc}
+
+    data_dict = {ticker: [0, 0] for ticker in tickers}
+    stats = get_data_pipelined(["stocks"], FakeReddit([FakeSubreddit("stocks", [fresh, stale, older])]), data_dict,
+                               matcher, company_to_ticker, state=state)
+    assert stats["posts"] == 1
+    assert data_dict["aapl"] == [1, 10]
+    assert stale.comments.replace_more_calls == 0 and older.comments.replace_more_calls == 0
+
+
+# Test a post no run has counted is counted however old it is, on the first run and after a long gap
+def test_incremental_counts_unseen_old_posts(matcher, tmp_path):
+    path = str(tmp_path / "state.joblib")
+    old = FakePost("AAPL", ups=10, id="old", created_utc=time.time() - 72 * 3600, comments=[FakeComment("tsla", id="c1")])
+    reddit = FakeReddit([FakeSubreddit("stocks", [old])])
+
+    first = {ticker: [0, 0] for ticker in tickers}
+    state = RedditScrapeState.load(path, revisit_hours=24)
+    get_data_pipelined(["stocks"], reddit, first, matcher, company_to_ticker, state=state)
+    state.save()
+    assert first["aapl"] == [1, 10] and first["tsla"] == [1, 10]
+    assert state.subreddits["stocks"]["last_post_id"] == "old"
+
+    # Dropped from the saved posts as too old to revisit, the high-water mark still says it was counted
+    second = {ticker: [0, 0] for ticker in tickers}
+    state = RedditScrapeState.load(path, revisit_hours=24)
+    assert "old" not in state.posts
+    stats = get_data_pipelined(["stocks"], reddit, second, matcher, company_to_ticker, state=state)
+    assert stats["posts"] == 0 and second["aapl"] == [0, 0]
+
+
+# Test a "hot" listing counts an older post that shows up after a newer one was counted, and only once
+def test_incremental_hot_listing_counts_older_posts(matcher, tmp_path, monkeypatch):
+    monkeypatch.setattr(RedditAPI.config, "POST_TYPE", "hot")
+    path = str(tmp_path / "state.joblib")
+    now = time.time()
+    newer = FakePost("AAPL", ups=10, id="newer", created_utc=now - 3600)
+    older = FakePost("NVDA", ups=7, id="older", created_utc=now - 48 * 3600)
+    subreddit = FakeSubreddit("stocks", [newer])
+    reddit = FakeReddit([subreddit])
+
+    first = {ticker: [0, 0] for ticker in tickers}
+    state = RedditScrapeState.load(path)
+    get_data_pipelined(["stocks"], reddit, first, matcher, company_to_ticker, state=state)
+    state.save()
+    assert first["aapl"] == [1, 10] and first["nvda"] == [0, 0]
+
+    subreddit.posts = [older, newer]
+    for run in range(2):
+        data_dict = {ticker: [0, 0] for ticker in tickers}
+        state = RedditScrapeState.load(path)
+        get_data_pipelined(["stocks"], reddit, data_dict, matcher, company_to_ticker, state=state)
+        state.save()
+        # Too old to revisit, so the next run knows it only by its ID
+        assert data_dict["nvda"] == ([1, 7] if run == 0 else [0, 0])
+    assert "older" in state.counted
+
+
+# Test the budget caps expansions and picks the highest scored branches first
+def test_budgeted_expansion_prioritizes_scores():
+    low = FakeMoreComments("t1_low", [FakeComment("aapl")])
+    high = FakeMoreComments("t1_high", [FakeComment("nvda"), FakeComment("tsla")])
+    post = FakePost("title", id="p1", comments=[
+        FakeComment("low", score=1, id="low", replies=[low]),
+        FakeComment("high", score=50, id="high", replies=[high]),
+    ])
+
+    comments, coverage = expand_comments_budgeted(post, max_expansions=1, max_seconds=10)
+    assert [comment.body for comment in comments] == ["low", "high", "nvda", "tsla"]
+    assert high.calls == 1 and low.calls == 0
+    assert coverage == {"partial": True, "expansions": 1, "skipped": 1, "calls_saved": 1}
+
+
+# Test nested MoreComments are expanded until the tree is complete
+def test_budgeted_expansion_full_coverage():
+    nested = FakeMoreComments("t1_c2", [FakeComment("deep")])
+    post = FakePost("title", id="p1", comments=[
+        FakeMoreComments("t3_p1", [FakeComment("c2", id="c2", replies=[nested])]),
+    ])
+    comments, coverage = expand_comments_budgeted(post, max_expansions=10, max_seconds=10)
+    assert [comment.body for comment in comments] == ["c2", "deep"]
+    assert coverage["partial"] is False
+    assert coverage["expansions"] == 2
+
+
+# Test the run summary adds up skipped expansions
+def test_pipelined_reports_saved_calls(matcher, monkeypatch):
+    monkeypatch.setattr(RedditAPI.config, "REDDIT_EXPANSION_MODE", "budgeted")
+    monkeypatch.setattr(RedditAPI.config, "REDDIT_MAX_EXPANSIONS", 0)
+    data_dict = {ticker: [0, 0] for ticker in tickers}
+    stats = get_data_pipelined(["stocks", "investing"], make_reddit(), data_dict, matcher, company_to_ticker)
+    assert stats["partial_posts"] == 4
+    assert stats["calls_saved"] == 4
+    assert stats["coverage"]["a1"]["partial"] is True
+
+
+# Test comment attribution credits each comment's own score
+def test_comment_attribution(matcher, monkeypatch):
+    monkeypatch.setattr(RedditAPI.config, "REDDIT_ATTRIBUTION_MODE", "comment")
+    post = FakePost("AAPL", ups=10, id="p1", comments=[
+        FakeComment("aapl and nvda", score=3), FakeComment("nvda nvda", score=7), FakeComment("tsla", score=-2),
+    ])
+    data_dict = {ticker: [0, 0] for ticker in tickers}
+    get_data_pipelined(["stocks"], FakeReddit([FakeSubreddit("stocks", [post])]), data_dict, matcher, company_to_ticker)
+    assert data_dict == {"aapl": [2, 13], "nvda": [3, 10], "tsla": [1, -2]}
+
+
+# Test batches matched in the process pool add up to the same counts
+def test_comment_batches_in_process_pool(matcher):
+    from concurrent.futures import ProcessPoolExecutor
+    comments = [FakeComment(f"aapl {'nvda' if i % 3 else 'apple'}", score=i) for i in range(50)]
+
+    serial = {ticker: [0, 0] for ticker in tickers}
+    RedditAPI.count_comment_mentions(comments, serial, matcher, company_to_ticker, batch_size=7)
+
+    pooled = {ticker: [0, 0] for ticker in tickers}
+    with ProcessPoolExecutor(max_workers=2, initializer=RedditAPI.init_match_worker, initargs=(matcher, company_to_ticker)) as pool:
+        mentioned = RedditAPI.count_comment_mentions(comments, pooled, matcher, company_to_ticker, pool=pool, batch_size=7)
+
+    assert pooled == serial
+    assert mentioned == {"aapl", "nvda"}
+    assert pooled["aapl"] == [67, sum(range(50))]
@@ -0,0 +1,125 @@
+# tests/reddit_matcher_test.py tests the ticker matchers used by RedditAPI
+
+from RedditAPI import Trie, AhoCorasick, TokenMatcher, setup_automaton, setup_matcher, search_and_count_chunks
+import pytest
+from collections import defaultdict
+
+company_to_ticker = {"apple": "aapl", "bank of america": "bac", "america movil": "amx", "t-mobile us": "tmus"}
+tickers = ["aapl", "bac", "amx", "tmus", "a", "$meta"]
+patterns = tickers + list(company_to_ticker.keys())
+
+texts = [
+    "apple and aapl are up, $meta is down",
+    "a bank of america movil merger? t-mobile us",
+    "snapple applesauce pineapple aapl2 xaapl",
+    "apple",
+    "apple’s aapl — caféaapl éaapl bank of america… 🚀$meta",
+    "",
+]
+
+
+def count(matcher, text):
+    data_dict = {ticker: [0, 0] for ticker in tickers}
+    mentioned = matcher.search_and_count(text, data_dict, company_to_ticker)
+    return mentioned, data_dict
+
+
+@pytest.fixture
+def trie():
+    trie = Trie()
+    for pattern in patterns:
+        trie.insert(pattern)
+    return trie
+
+
+# Test that the automaton gives the same counts as the trie
+@pytest.mark.parametrize("text", texts)
+def test_automaton_matches_trie(trie, text):
+    assert count(AhoCorasick(patterns), text) == count(trie, text)
+
+
+# Test word boundaries and the company to ticker remapping
+def test_automaton_word_boundaries():
+    mentioned, data_dict = count(AhoCorasick(patterns), "snapple apple. aapl, xaapl $meta")
+    assert mentioned == {"aapl", "$meta"}
+    assert data_dict["aapl"][0] == 2
+    assert data_dict["$meta"][0] == 1
+
+
+# Test overlapping company names are all counted
+def test_automaton_overlapping_companies():
+    mentioned, data_dict = count(AhoCorasick(patterns), "bank of america movil")
+    assert mentioned == {"bac", "amx"}
+
+
+# Test the automaton is cached to disk and reused
+def test_setup_automaton_cache(tmp_path):
+    cache_path = str(tmp_path / "automaton.pkl")
+    automaton = setup_automaton(tickers, company_to_ticker.keys(), cache_path=cache_path)
+    cached = setup_automaton(tickers, company_to_ticker.keys(), cache_path=cache_path)
+    assert cached.goto == automaton.goto
+
+    rebuilt = setup_automaton(tickers + ["msft"], company_to_ticker.keys(), cache_path=cache_path)
+    assert "msft" in rebuilt.patterns
+
+
+# Test that the token matcher gives the same counts as the trie
+@pytest.mark.parametrize("text", texts)
+def test_token_matcher_matches_trie(trie, text):
+    assert count(TokenMatcher(patterns), text) == count(trie, text)
+
+
+# Test patterns are split between the single token set, the affix table and the n-gram table
+def test_token_matcher_tables():
+    matcher = TokenMatcher(patterns)
+    assert "aapl" in matcher.single_tokens
+    assert "meta" in matcher.cashtags
+    assert (0, "bank of america") in matcher.ngram_table["bank", "of"]
+    punctuated = TokenMatcher(["guess?", "wang & lee", "#meta", "&"])
+    assert punctuated.ngram_table == {("guess", ""): ((0, "guess?"),), ("wang", ""): ((0, "wang & lee"),)}
+    assert punctuated.affix_table == {"meta": ("#meta",)}
+    assert punctuated.separator_patterns == ("&",)
+
+
+# Test patterns with other punctuation around a token or without any token are counted like the trie counts them
+@pytest.mark.parametrize("text", [
+    "guess? guess?x guess?! $$meta x$meta #meta x#meta",
+    "wang & lee wang &lee wang  & lee guess?",
+    "a & b && c&d --- x--y -- &",
+    "&",
+    "",
+])
+def test_token_matcher_punctuation_patterns(text):
+    punctuation_patterns = patterns + ["guess?", "&", "--", "wang & lee", "#meta"]
+    trie = Trie()
+    for pattern in punctuation_patterns:
+        trie.insert(pattern)
+    counts = [defaultdict(lambda: [0, 0]) for _ in range(2)]
+    mentioned = [matcher.search_and_count(text, data_dict, company_to_ticker)
+                 for matcher, data_dict in zip((TokenMatcher(punctuation_patterns), trie), counts)]
+    assert mentioned[0] == mentioned[1]
+    assert dict(counts[0]) == dict(counts[1])
+
+
+# Test the engine can be picked by name
+def test_setup_matcher_engines():
+    assert isinstance(setup_matcher(tickers, [], engine="trie"), Trie)
+    assert isinstance(setup_matcher(tickers, [], engine="token"), TokenMatcher)
+    with pytest.raises(ValueError):
+        setup_matcher(tickers, [], engine="regex")
+
+
+# Test streaming chunks gives the same counts as matching the joined text, including names split across chunks
+@pytest.mark.parametrize("engine", ["trie", "automaton", "token"])
+@pytest.mark.parametrize("chunks", [
+    ["AAPL up", "", "Bank of", "America movil", "apple"],
+    ["bank", "of america", "x" * 40 + " t-mobile", "us"],
+    ["apple"],
+    [],
+])
+def test_search_and_count_chunks(engine, chunks, tmp_path):
+    matcher = setup_matcher(tickers, company_to_ticker.keys(), engine=engine) if engine != "automaton" else \
+        setup_automaton(tickers, company_to_ticker.keys(), cache_path=str(tmp_path / "automaton.pkl"))
+    data_dict = {ticker: [0, 0] for ticker in tickers}
+    mentioned = search_and_count_chunks(matcher, iter(chunks), data_dict, company_to_ticker)
+    assert (mentioned, data_dict) == count(matcher, " ".join(chunks).lower())
@@ -0,0 +1,81 @@
+# tests/resource_policy_test.py tests ResourcePolicy presets, how BrowserManager applies them and the per ticker transfer stats
+
+from datetime import datetime
+import pytz
+from selenium.common.exceptions import WebDriverException
+from resource_policy import ResourcePolicy, IMAGE_PATTERNS, TRACKER_PATTERNS
+from browser_manager import BrowserManager, TIMING_BUFFER_SCRIPT
+from stocktwits_scraper import StockTwitsScraper, ScrapingConfig
+from fake_stocktwits import FakeFeedBrowser, StreamStubServer
+import pytest
+
+
+class FakeDriver:
+    def __init__(self, fail=False):
+        self.commands = []
+        self.fail = fail
+
+    def execute_cdp_cmd(self, command, params):
+        if self.fail:
+            raise WebDriverException("CDP not available")
+        self.commands.append((command, params))
+
+
+# Test the presets block what they say and extra patterns are added on top
+def test_presets():
+    full = ResourcePolicy.preset("full", ["*stocktwits.com/ads/*"])
+    assert set(IMAGE_PATTERNS + TRACKER_PATTERNS) <= set(full.blocked_url_patterns())
+    assert full.blocked_url_patterns()[-1] == "*stocktwits.com/ads/*"
+    assert full.prefs() == {"profile.managed_default_content_settings.images": 2}
+
+    trackers = ResourcePolicy.preset("trackers")
+    assert trackers.blocked_url_patterns() == TRACKER_PATTERNS and trackers.prefs() == {}
+    assert ResourcePolicy.preset("none").blocked_url_patterns() == []
+
+    with pytest.raises(ValueError):
+        ResourcePolicy.preset("everything")
+
+
+# Test the image pref is only set when images are blocked
+def test_options_prefs():
+    blocking = BrowserManager(resource_policy=ResourcePolicy.preset("full")).create_options()
+    assert blocking.experimental_options["prefs"] == {"profile.managed_default_content_settings.images": 2}
+    assert "prefs" not in BrowserManager(resource_policy=ResourcePolicy.preset("none")).create_options().experimental_options
+
+
+# Test the blocked URLs are sent over CDP, and a driver without CDP still starts
+def test_apply_resource_policy():
+    policy = ResourcePolicy.preset("trackers", ["*.svg"])
+    driver = FakeDriver()
+    BrowserManager(resource_policy=policy).apply_resource_policy(driver)
+    assert driver.commands == [
+        ("Network.enable", {}),
+        ("Network.setBlockedURLs", {"urls": TRACKER_PATTERNS + ["*.svg"]}),
+        ("Page.addScriptToEvaluateOnNewDocument", {"source": TIMING_BUFFER_SCRIPT}),
+    ]
+
+    BrowserManager(resource_policy=policy).apply_resource_policy(FakeDriver(fail=True))
+
+
+# Test results carry the bytes transferred and page ready time, and the run totals add them up
+def test_transfer_stats():
+    now = datetime.now(pytz.UTC).replace(microsecond=0)
+    browser = FakeFeedBrowser(now=now)
+    scraper = StockTwitsScraper(config=ScrapingConfig(scroll_delay=0.1, fetch_mode="browser"), browser_manager=browser)
+    assert scraper.initialize("user", "pass")
+    result = scraper.scrape_ticker("AAPL")
+
+    assert result.page_ready_seconds == 0.5
+    assert result.bytes_transferred == 2000 * browser.loaded
+    stats = scraper.get_scraping_stats()
+    assert stats["bytes_transferred"] == result.bytes_transferred
+    assert stats["mean_page_ready_seconds"] == 0.5
+
+    with StreamStubServer(now=now) as stub:
+        config = ScrapingConfig(stream_url=stub.stream_url)
+        scraper = StockTwitsScraper(config=config, browser_manager=FakeFeedBrowser(now=now))
+        assert scraper.initialize("user", "pass")
+        result = scraper.scrape_ticker("AAPL")
+
+    assert result.bytes_transferred == scraper.stream_client.bytes_received > 0
+    assert result.page_ready_seconds is None
@@ -0,0 +1,66 @@
+# tests/result_log_test.py tests the append-only StockTwits result log and its compaction into the joblib snapshot
+
+import os
+import joblib
+from result_log import ResultLog, log_path_for, read_records, load_results, completed_tickers, compact
+
+
+# Test records are read back in order and a later record for a ticker replaces the earlier one
+def test_append_and_read(tmp_path):
+    path = str(tmp_path / "results.joblib.log")
+    with ResultLog(path) as log:
+        log.append("AAPL", {"total_mentions": 1})
+        log.append("tsla", {"total_mentions": 2})
+        log.append("aapl", {"total_mentions": 3})
+
+    assert [ticker for ticker, _ in read_records(path)] == ["aapl", "tsla", "aapl"]
+    assert load_results(path) == {"aapl": {"total_mentions": 3}, "tsla": {"total_mentions": 2}}
+    assert completed_tickers(path) == {"aapl", "tsla"}
+
+
+# Test a record torn by a crash is ignored and cut off when the log is opened again
+def test_torn_record_is_truncated(tmp_path):
+    path = str(tmp_path / "results.joblib.log")
+    with ResultLog(path) as log:
+        log.append("aapl", {"total_mentions": 1})
+        log.append("tsla", {"total_mentions": 2})
+    size = os.path.getsize(path)
+    with open(path, "r+b") as f:
+        f.truncate(size - 3)
+
+    assert completed_tickers(path) == {"aapl"}
+    with ResultLog(path) as log:
+        log.append("nke", {"total_mentions": 4})
+    assert completed_tickers(path) == {"aapl", "nke"}
+
+
+# Test fsyncs are batched rather than made for every record
+def test_fsync_batching(tmp_path):
+    log = ResultLog(str(tmp_path / "results.joblib.log"), fsync_every=10, fsync_interval=3600)
+    for i in range(25):
+        log.append(f"t{i}", {})
+    assert log.fsyncs == 2
+    log.close()
+    assert log.fsyncs == 3
+
+
+# Test compaction replaces the snapshot with the log's results and only removes the log when asked
+def test_compact(tmp_path):
+    output_file = str(tmp_path / "results.joblib")
+    with open(output_file, "wb") as f:
+        joblib.dump({"old": {}}, f)
+    with ResultLog(log_path_for(output_file)) as log:
+        log.append("aapl", {"total_mentions": 5})
+
+    assert compact(output_file, remove_log=False) == 1
+    assert os.path.exists(log_path_for(output_file))
+    assert compact(output_file) == 1
+    assert not os.path.exists(log_path_for(output_file))
+    assert not os.path.exists(output_file + ".tmp")
+    with open(output_file, "rb") as f:
+        assert joblib.load(f) == {"aapl": {"total_mentions": 5}}
+
+    # Nothing to compact leaves the snapshot alone
+    assert compact(output_file) == 0
+    with open(output_file, "rb") as f:
+        assert joblib.load(f) == {"aapl": {"total_mentions": 5}}
@@ -0,0 +1,117 @@
+# tests/scroll_controller_test.py tests ScrollController's predictions and stop reasons and the adaptive scroll in StockTwitsScraper
+
+from datetime import datetime, timedelta
+import pytz
+from scroll_controller import ScrollController, ScrollHistory, ScrollStats
+from stocktwits_scraper import StockTwitsScraper, ScrapingConfig
+from fake_stocktwits import FakeFeedBrowser
+
+now = datetime.now(pytz.UTC).replace(microsecond=0)
+target = now - timedelta(hours=24)
+
+
+def scrape(scroll_mode, history=None, **browser_args):
+    browser = FakeFeedBrowser(now=now, **browser_args)
+    config = ScrapingConfig(scroll_delay=0.1, scroll_mode=scroll_mode, settle_timeout=0.1, fetch_mode="browser")
+    scraper = StockTwitsScraper(config=config, browser_manager=browser, scroll_history=history)
+    assert scraper.initialize("user", "pass")
+    return scraper.scrape_ticker("AAPL"), browser
+
+
+# Test the rate is measured from the oldest post's date and the remaining scrolls predicted from it
+def test_predicts_remaining_scrolls():
+    controller = ScrollController(target, max_seconds=60, max_batch=8)
+    controller.observe(0, now - timedelta(hours=2), 30)
+    assert controller.predicted_scrolls() is None and controller.next_batch() == 1
+
+    # One scroll reached 2 hours further back, 20 hours to go
+    controller.observe(1, now - timedelta(hours=4), 60)
+    assert controller.stats.feed_seconds_per_scroll == 7200
+    assert controller.predicted_scrolls() == 10
+    assert controller.next_batch() == 8
+
+    controller.observe(8, now - timedelta(hours=22), 300)
+    assert controller.predicted_scrolls() == 1 and controller.next_batch() == 1
+    assert not controller.done
+
+    controller.observe(1, now - timedelta(hours=25), 330)
+    assert controller.done and controller.stats.reached_target_date
+    assert controller.stats.stop_reason == "reached target date"
+    assert (controller.stats.scrolls, controller.stats.checks) == (10, 4)
+
+
+# Test a rate from history is used before the first scroll
+def test_seeded_rate():
+    controller = ScrollController(target, max_seconds=60, feed_seconds_per_scroll=3600)
+    controller.observe(0, now - timedelta(hours=1), 30)
+    assert controller.predicted_scrolls() == 23
+    assert controller.next_batch() == 8
+
+
+# Test scrolling stops when the feed stops growing, has no posts or runs out of time
+def test_stop_reasons():
+    controller = ScrollController(target, max_seconds=60)
+    controller.observe(0, now, 30)
+    controller.observe(1, now - timedelta(hours=1), 60, new_nodes=False)
+    assert controller.stats.stop_reason == "feed exhausted" and not controller.stats.reached_target_date
+
+    controller = ScrollController(target, max_seconds=60)
+    controller.observe(0, now, 30)
+    controller.observe(1, now, 30)
+    assert controller.stats.stop_reason == "feed exhausted"
+
+    controller = ScrollController(target, max_seconds=60)
+    controller.observe(0, None, 0)
+    assert controller.stats.stop_reason == "no posts"
+
+    controller = ScrollController(target, max_seconds=0)
+    controller.observe(0, now, 30)
+    controller.observe(1, now - timedelta(hours=1), 60, new_nodes=True)
+    assert controller.stats.stop_reason == "time budget"
+
+
+# Test scroll costs are saved and a missing rate keeps the previous one
+def test_history_persists(tmp_path):
+    path = str(tmp_path / "scroll_history.joblib")
+    history = ScrollHistory(path)
+    history.record("AAPL", ScrollStats(scrolls=10, seconds=4.5, feed_seconds_per_scroll=1800))
+    history.record("aapl", ScrollStats(scrolls=0, seconds=0.5))
+    history.save()
+
+    loaded = ScrollHistory.load(path)
+    assert loaded.feed_seconds_per_scroll("AAPL") == 1800
+    assert loaded.cost("AAPL") == 0.5
+    assert loaded.cost("TSLA") is None
+    assert ScrollHistory.load(str(tmp_path / "missing.joblib")).tickers == {}
+
+
+# Test adaptive scrolling gives the fixed schedule's result with fewer reads and records the ticker's cost
+def test_adaptive_matches_fixed():
+    # A busy ticker: a post a minute, so 48 scrolls of 30 posts reach back 24 hours
+    busy = dict(num_posts=2000, minutes_apart=1)
+    fixed, fixed_browser = scrape("fixed", **busy)
+    history = ScrollHistory()
+    adaptive, adaptive_browser = scrape("adaptive", history=history, **busy)
+
+    assert adaptive.success and fixed.success
+    assert adaptive.data == fixed.data
+    assert adaptive.data.reached_target_date
+    assert adaptive.earliest_post_date == fixed.earliest_post_date
+    assert adaptive.scroll_stats.stop_reason == "reached target date"
+    assert adaptive.scroll_stats.checks < adaptive.scroll_stats.scrolls
+    assert adaptive_browser.scrolls < fixed_browser.scrolls
+    assert adaptive.data.total_mentions == 1440
+    assert history.feed_seconds_per_scroll("AAPL") == 30 * 60
+
+    # The next run starts batching straight away
+    again, _ = scrape("adaptive", history=history, **busy)
+    assert again.data == adaptive.data
+    assert again.scroll_stats.checks < adaptive.scroll_stats.checks
+
+
+# Test a feed shorter than the target stops once nothing new loads
+def test_adaptive_stops_on_exhausted_feed():
+    result, browser = scrape("adaptive", num_posts=50)
+    assert result.success and not result.data.reached_target_date
+    assert result.scroll_stats.stop_reason == "feed exhausted"
+    assert result.data.total_mentions == 50
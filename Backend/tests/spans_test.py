@@ -0,0 +1,54 @@
+# tests/spans_test.py tests SpanRecorder's JSON lines and percentiles and the spans a scrape records
+
+import json
+from datetime import datetime
+import pytz
+from spans import SpanRecorder, percentile
+from stocktwits_scraper import StockTwitsScraper, ScrapingConfig
+from fake_stocktwits import FakeFeedBrowser
+
+now = datetime.now(pytz.UTC).replace(microsecond=0)
+
+
+# Test percentiles interpolate between ranks
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50.5
+    assert percentile(values, 99) == 99.01
+    assert percentile([3.0], 95) == 3.0
+
+
+# Test each span is one JSON line with its sizes, and the summary has p50/p95/p99 per phase
+def test_json_lines_and_summary(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    spans = SpanRecorder(str(path))
+    with spans.span("page_source", "AAPL") as span:
+        span["html_bytes"] = 1234
+    for seconds in (1.0, 2.0, 3.0, 4.0):
+        spans.record("scroll", seconds, "AAPL", scrolls=2)
+    spans.close()
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(lines) == 5
+    assert lines[0]["phase"] == "page_source" and lines[0]["ticker"] == "AAPL" and lines[0]["html_bytes"] == 1234
+    assert lines[1]["seconds"] == 1.0 and lines[1]["scrolls"] == 2
+
+    summary = spans.log_summary()
+    assert summary["scroll"]["count"] == 4 and summary["scroll"]["total"] == 10.0
+    assert summary["scroll"]["p50"] == 2.5 and summary["scroll"]["p99"] == 3.97
+
+
+# Test a browser scrape records every phase and saving a result records a save span
+def test_scrape_records_phases(tmp_path):
+    config = ScrapingConfig(scroll_delay=0.1, settle_timeout=0.1, ticker_delay=0, fetch_mode="browser",
+                            spans_path=str(tmp_path / "spans.jsonl"))
+    scraper = StockTwitsScraper(config=config, browser_manager=FakeFeedBrowser(now=now, num_posts=200))
+    assert scraper.initialize("user", "pass")
+    scraper.scrape_tickers(["AAPL"], output_file=str(tmp_path / "results.joblib"))
+    scraper.cleanup()
+
+    phases = {line["phase"] for line in map(json.loads, open(tmp_path / "spans.jsonl"))}
+    assert {"ticker", "page_load", "tab_switch", "page_source", "parse", "read_posts", "scroll", "save"} <= phases
+    summary = scraper.spans.summary()
+    assert summary["ticker"]["count"] == 1
+    assert summary["tab_switch"]["p50"] == 0.1
@@ -0,0 +1,102 @@
+# tests/stocktwits_pool_test.py tests the multi-browser StockTwits pool with fake scrapers instead of real browsers
+
+import time
+import threading
+import result_log
+from scraper_pool import WorkStealingQueue, StockTwitsScraperPool
+from stocktwits_scraper import StockTwitsScraper, ScrapingConfig, ScrapingResult
+from html_parsing import PostMetrics
+
+
+class FakeBrowserManager:
+    def start(self):
+        return True
+
+    def stop(self):
+        pass
+
+    def login_stocktwits(self, username, password):
+        return True
+
+    def get_health_status(self):
+        return {}
+
+
+class FakeScraper(StockTwitsScraper):
+    """Scraper whose tickers take the given number of seconds instead of loading a page"""
+
+    def __init__(self, worker_id, durations, config):
+        super().__init__(config=config, browser_manager=FakeBrowserManager())
+        self.worker_id = worker_id
+        self.durations = durations
+        self.scraped = []
+
+    def scrape_ticker(self, ticker, return_posts=False):
+        time.sleep(self.durations.get(ticker, 0.0))
+        self.scraped.append(ticker)
+        metrics = PostMetrics(hours=[1] * 24, likes=[0] * 24, total_mentions=24, total_likes=0, ticker=ticker,
+                              reached_target_date=True)
+        return ScrapingResult(ticker=ticker, success=True, data=metrics)
+
+
+def make_pool(num_browsers, durations=None):
+    config = ScrapingConfig(ticker_delay=0, fetch_mode="browser")
+    pool = StockTwitsScraperPool(num_browsers=num_browsers, config=config,
+                                 scraper_factory=lambda i: FakeScraper(i, durations or {}, config))
+    assert pool.initialize("user", "pass")
+    return pool
+
+
+# Test tickers are dealt round robin and an idle worker steals from the back of the longest deque
+def test_work_stealing_queue():
+    queue = WorkStealingQueue(["a", "b", "c", "d", "e"], 2)
+    assert queue.get(0) == "a"
+    assert queue.get(0) == "c"
+    assert queue.get(0) == "e"
+    assert queue.get(0) == "d"
+    assert queue.steals == 1
+    assert queue.get(1) == "b"
+    assert queue.get(1) is None
+    assert len(queue) == 0
+
+
+# Test every ticker is scraped exactly once and saved to the shared result log
+def test_pool_writes_shared_output(tmp_path):
+    output_file = str(tmp_path / "results.joblib")
+    tickers = [f"T{i}" for i in range(12)]
+    with make_pool(3) as pool:
+        results = pool.scrape_tickers(tickers, output_file=output_file)
+        scraped = sorted(t for scraper in pool.scrapers for t in scraper.scraped)
+
+    assert scraped == sorted(tickers)
+    assert all(result.success for result in results)
+    assert sorted(result_log.load_results(result_log.log_path_for(output_file))) == sorted(t.lower() for t in tickers)
+
+
+# Test idle browsers take over the tickers queued behind a slow one
+def test_pool_steals_from_slow_worker():
+    tickers = ["AAPL"] + [f"T{i}" for i in range(7)]
+    with make_pool(2, durations={"AAPL": 0.5}) as pool:
+        start = time.time()
+        pool.scrape_tickers(tickers)
+        elapsed = time.time() - start
+        assert pool.scrapers[0].scraped == ["AAPL"]
+        assert pool.get_scraping_stats()["steals"] > 0
+    assert elapsed < 0.8
+
+
+# Test tickers already in the result log are skipped and the stop event is honoured
+def test_pool_resume_and_stop(tmp_path):
+    output_file = str(tmp_path / "results.joblib")
+    with result_log.ResultLog(result_log.log_path_for(output_file)) as log:
+        log.append("T0", {})
+        log.append("T1", {})
+
+    with make_pool(2) as pool:
+        results = pool.scrape_tickers(["T0", "T1", "T2"], output_file=output_file)
+        assert [t for scraper in pool.scrapers for t in scraper.scraped] == ["T2"]
+        assert len(results) == 3
+
+        stop_event = threading.Event()
+        stop_event.set()
+        assert pool.scrape_tickers(["T3", "T4"], stop_event=stop_event) == []
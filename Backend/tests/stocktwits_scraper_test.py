@@ -0,0 +1,39 @@
+# tests/stocktwits_scraper_test.py tests StockTwitsScraper against the fake feed in tests/fake_stocktwits.py
+
+from datetime import datetime
+import pytz
+from stocktwits_scraper import StockTwitsScraper, ScrapingConfig
+from fake_stocktwits import FakeFeedBrowser
+
+# Shared so both scrapes of a test see the same feed
+now = datetime.now(pytz.UTC).replace(microsecond=0)
+
+
+def scrape(extraction, **browser_args):
+    browser = FakeFeedBrowser(now=now, **browser_args)
+    scraper = StockTwitsScraper(config=ScrapingConfig(scroll_delay=1, extraction=extraction, fetch_mode="browser"), browser_manager=browser)
+    assert scraper.initialize("user", "pass")
+    return scraper.scrape_ticker("AAPL"), browser
+
+
+# Test metrics from in-browser records match parsing the page source, with one page source for validation
+def test_script_extraction_matches_page_source():
+    from_source, source_browser = scrape("page_source")
+    from_script, script_browser = scrape("script")
+
+    assert from_script.success and from_source.success
+    assert from_script.data == from_source.data
+    assert from_script.data.total_mentions == 72
+    assert from_script.data.reached_target_date
+    assert (from_script.earliest_post_date, from_script.latest_post_date) == \
+           (from_source.earliest_post_date, from_source.latest_post_date)
+    assert script_browser.page_source_calls == 1
+    assert source_browser.page_source_calls > 2
+
+
+# Test a failing script falls back to the page source
+def test_script_failure_falls_back():
+    from_source, _ = scrape("page_source")
+    from_script, browser = scrape("script", script_works=False)
+    assert from_script.data == from_source.data
+    assert browser.page_source_calls > 2
@@ -0,0 +1,94 @@
+# tests/stream_client_test.py tests the JSON stream fast path against recorded stream pages served by StreamStubServer
+
+from datetime import datetime
+import pytz
+from stocktwits_scraper import StockTwitsScraper, ScrapingConfig
+from stream_client import StockTwitsStreamClient, StreamError
+from fake_stocktwits import FakeFeedBrowser, StreamStubServer
+import pytest
+
+# Shared by the stub and the fake browser so both feeds hold the same posts
+now = datetime.now(pytz.UTC).replace(microsecond=0)
+
+
+def make_scraper(stub, fetch_mode="stream", **config_args):
+    browser = FakeFeedBrowser(num_posts=100, now=now)
+    config = ScrapingConfig(scroll_delay=0.1, fetch_mode=fetch_mode, stream_url=stub.stream_url if stub else "", **config_args)
+    scraper = StockTwitsScraper(config=config, browser_manager=browser)
+    assert scraper.initialize("user", "pass")
+    return scraper, browser
+
+
+# Test the stream gives the same metrics as scrolling the page, without touching the browser
+def test_stream_matches_browser():
+    browser_scraper, _ = make_scraper(None, fetch_mode="browser")
+    from_browser = browser_scraper.scrape_ticker("AAPL")
+
+    with StreamStubServer(now=now) as stub:
+        scraper, browser = make_scraper(stub)
+        from_stream = scraper.scrape_ticker("AAPL")
+
+    assert from_stream.success and from_stream.data == from_browser.data
+    assert from_stream.data.total_mentions == 72 and from_stream.data.reached_target_date
+    assert (from_stream.earliest_post_date, from_stream.latest_post_date) == \
+           (from_browser.earliest_post_date, from_browser.latest_post_date)
+    assert browser.page_source_calls == 0 and browser.scrolls == 0
+
+    # 72 posts are in the first 3 pages of 30, each page asks for messages older than the last one
+    assert [max_id for _, max_id, _, _ in stub.requests] == [None, "619999797", "619999587"]
+    assert all(cookie == "access_token=fake-token" for _, _, cookie, _ in stub.requests)
+
+
+# Test full posts come from the stream when return_posts is set
+def test_stream_posts():
+    with StreamStubServer(now=now) as stub:
+        scraper, _ = make_scraper(stub)
+        result = scraper.scrape_ticker("AAPL", return_posts=True)
+
+    assert len(result.data) == 72
+    assert result.data[0].message == "post 0 $AAPL"
+    assert result.data[0].datetime_object == now
+    assert result.data[3].likes == 3 * 37
+    assert all(post.ticker == "AAPL" for post in result.data)
+
+
+# Test one kept alive connection serves every page of every ticker
+def test_session_reuses_connection():
+    with StreamStubServer(now=now) as stub:
+        scraper, _ = make_scraper(stub)
+        aapl = scraper.scrape_ticker("AAPL")
+        quiet = scraper.scrape_ticker("QUIET")
+
+    assert aapl.success and quiet.success
+    # The quiet feed ends before the target date
+    assert quiet.data.total_mentions == 4 and not quiet.data.reached_target_date
+    assert len(stub.requests) == 4
+    assert len({port for _, _, _, port in stub.requests}) == 1
+
+
+# Test an unknown symbol fails without falling back to the browser
+def test_symbol_not_found():
+    with StreamStubServer(now=now) as stub:
+        scraper, browser = make_scraper(stub)
+        result = scraper.scrape_ticker("ZZZZ")
+        with pytest.raises(StreamError) as error:
+            StockTwitsStreamClient(stream_url=stub.stream_url).fetch_page("ZZZZ")
+
+    assert not result.success and result.error_message == "Symbol not found"
+    assert error.value.not_found
+    assert browser.page_source_calls == 0
+
+
+# Test a blocked stream falls back to the browser, and stops being tried after stream_max_failures
+def test_falls_back_to_browser():
+    with StreamStubServer(now=now, fail_with=403) as stub:
+        scraper, browser = make_scraper(stub, stream_max_failures=2)
+        first = scraper.scrape_ticker("AAPL")
+        second = scraper.scrape_ticker("AAPL")
+        third = scraper.scrape_ticker("AAPL")
+
+    assert first.success and first.data.total_mentions == 72
+    assert second.data == first.data and third.data == first.data
+    assert browser.page_source_calls > 0
+    assert len(stub.requests) == 2
+    assert scraper.stream_client is None
@@ -0,0 +1,88 @@
+# tests/symbol_cache_test.py tests NegativeSymbolCache's expiry and revalidation and the scraper skipping missing symbols
+
+from datetime import datetime
+import pytz
+from symbol_cache import NegativeSymbolCache, DAY
+from stocktwits_scraper import StockTwitsScraper, ScrapingConfig
+from fake_stocktwits import FakeFeedBrowser, StreamStubServer
+
+now = datetime.now(pytz.UTC).replace(microsecond=0)
+
+
+# Test a missing symbol is skipped until its TTL, let through once, and kept twice as long if still missing
+def test_ttl_and_revalidation(tmp_path):
+    path = str(tmp_path / "missing.joblib")
+    cache = NegativeSymbolCache(path, ttl_days=7, max_ttl_days=20)
+    cache.mark_missing("DEAD", now=0)
+    assert cache.should_skip("dead", now=6 * DAY)
+    assert not cache.should_skip("DEAD", now=7 * DAY)
+    assert not cache.should_skip("AAPL", now=0)
+
+    cache.mark_missing("DEAD", now=7 * DAY)
+    assert cache.should_skip("DEAD", now=20 * DAY)
+    assert not cache.should_skip("DEAD", now=21 * DAY)
+    # Capped at max_ttl_days
+    cache.mark_missing("DEAD", now=21 * DAY)
+    assert not cache.should_skip("DEAD", now=41 * DAY)
+    assert cache.stats() == {"missing_symbols": 1, "page_loads_saved": 2, "revalidated": 3, "relisted": 0}
+
+    cache.save()
+    loaded = NegativeSymbolCache.load(path)
+    assert "dead" in loaded and loaded.tickers["dead"]["misses"] == 3
+
+    loaded.mark_found("DEAD")
+    assert "dead" not in loaded and loaded.relisted == 1
+
+
+# Test a 404 symbol page is loaded once, then skipped on the next run without a page load
+def test_scraper_skips_cached_404(tmp_path):
+    config = ScrapingConfig(scroll_delay=0.1, settle_timeout=0.1, ticker_delay=0, fetch_mode="browser",
+                            missing_symbols_path=str(tmp_path / "missing.joblib"))
+
+    for run in range(2):
+        browser = FakeFeedBrowser(now=now, missing=["GONE"])
+        scraper = StockTwitsScraper(config=config, browser_manager=browser)
+        assert scraper.initialize("user", "pass")
+        results = scraper.scrape_tickers(["GONE", "AAPL"])
+
+        assert not results[0].success and results[1].success
+        if run == 0:
+            assert results[0].error_message == "Page not found (404)"
+            assert len(browser.urls) == 2
+        else:
+            assert results[0].error_message == "Symbol not found (cached)"
+            assert browser.urls == ["https://stocktwits.com/symbol/AAPL"]
+            assert scraper.get_scraping_stats()["missing_symbols"]["page_loads_saved"] == 1
+
+
+# Test the delay between tickers is only slept after a ticker that loaded a page
+def test_no_delay_after_cached_skip(tmp_path, monkeypatch):
+    import time
+    config = ScrapingConfig(scroll_delay=0.1, settle_timeout=0.1, ticker_delay=0.37, fetch_mode="browser",
+                            missing_symbols_path=str(tmp_path / "missing.joblib"))
+    sleep = time.sleep
+    delays = []
+    monkeypatch.setattr(time, "sleep", lambda seconds: delays.append(seconds) if seconds == 0.37 else sleep(seconds))
+
+    for run in range(2):
+        scraper = StockTwitsScraper(config=config, browser_manager=FakeFeedBrowser(now=now, missing=["GONE"]))
+        assert scraper.initialize("user", "pass")
+        scraper.scrape_tickers(["GONE", "AAPL"])
+    # Both tickers on the first run, only AAPL on the second
+    assert delays == [0.37] * 3
+
+
+# Test a 404 from the stream is cached too, and a found ticker leaves the cache
+def test_stream_404_cached():
+    cache = NegativeSymbolCache()
+    cache.mark_missing("AAPL", now=0)
+    with StreamStubServer(now=now) as server:
+        config = ScrapingConfig(stream_url=server.stream_url)
+        scraper = StockTwitsScraper(config=config, browser_manager=FakeFeedBrowser(now=now), symbol_cache=cache)
+        assert scraper.initialize("user", "pass")
+
+        assert not scraper.scrape_ticker("NOSUCH").success
+        assert scraper.scrape_ticker("AAPL").success
+
+    assert "nosuch" in cache and cache.tickers["nosuch"]["reason"] == "stream 404"
+    assert "aapl" not in cache
@@ -0,0 +1,101 @@
+# tests/ticker_scheduler_test.py tests TickerScheduler's ordering, scroll budgets and dead ticker handling
+
+import json
+from datetime import date, timedelta
+from ticker_scheduler import TickerScheduler, fetch_history_rows
+from scroll_controller import ScrollHistory, ScrollStats
+
+today = date(2025, 6, 11)
+
+
+class FakeQuery:
+    def __init__(self, rows):
+        self.rows = rows
+        self.ranges = []
+
+    def table(self, name):
+        return self
+
+    def select(self, columns):
+        return self
+
+    def range(self, start, end):
+        self.ranges.append((start, end))
+        self.window = self.rows[start:end + 1]
+        return self
+
+    def execute(self):
+        return type("Response", (), {"data": self.window})()
+
+
+def row(ticker, mentions, scores):
+    return {"ticker": ticker, "mentions_daily": json.dumps(mentions), "daily_scores": json.dumps(scores)}
+
+
+# Test busy and volatile tickers go first and tickers without history keep the file order
+def test_orders_by_activity_and_volatility():
+    scheduler = TickerScheduler()
+    scheduler.seed_from_rows([
+        row("AAPL", [900] * 7, [50] * 7),
+        row("GME", [300] * 7, [10, 80, 5, 90, 20, 70, 1]),
+        row("NKE", [300] * 7, [40] * 7),
+        row("XYZ", [2] * 7, [1] * 7),
+    ])
+    plan = scheduler.plan(["xyz", "new1", "nke", "gme", "new2", "aapl"], today=today)
+
+    # GME's swings put it ahead of AAPL's higher but flat volume
+    assert plan.tickers == ["gme", "aapl", "nke", "xyz", "new1", "new2"]
+    assert plan.priorities["new1"] == 0
+
+
+# Test scroll budgets come from the last scroll cost, else from mentions, within the limits
+def test_scroll_budgets():
+    scheduler = TickerScheduler(min_scroll_seconds=10, max_scroll_seconds=180)
+    scheduler.seed_from_rows([row("AAPL", [5000], [1]), row("NKE", [100], [1]), row("TSLA", [900], [1])])
+    history = ScrollHistory()
+    history.record("TSLA", ScrollStats(seconds=20))
+
+    plan = scheduler.plan(["AAPL", "NKE", "TSLA", "NEW"], today=today, scroll_history=history)
+    assert plan.scroll_budgets == {"aapl": 180, "nke": 15, "tsla": 30}
+    assert plan.estimated_seconds(2, workers=2, overhead=10) == (180 + 10 + 30 + 10) / 2
+
+
+# Test tickers with no posts for dead_after_days runs go last, and only every dead_interval_days
+def test_dead_tickers(tmp_path):
+    state_path = str(tmp_path / "schedule.joblib")
+    scheduler = TickerScheduler(state_path, dead_after_days=3, dead_interval_days=7)
+    for days_ago in range(3, 0, -1):
+        day = today - timedelta(days=days_ago)
+        # DEAD 404s (no result at all), QUIET has no posts, LIVE has some
+        scheduler.record_run({"quiet": {"total_mentions": 0}, "live": {"total_mentions": 4}}, ["DEAD", "QUIET", "LIVE"], today=day)
+    scheduler.save()
+
+    scheduler = TickerScheduler.load(state_path, dead_after_days=3, dead_interval_days=7)
+    assert scheduler.is_dead("DEAD") and scheduler.is_dead("quiet") and not scheduler.is_dead("LIVE")
+    # Last tried yesterday, so not due for another 6 days
+    plan = scheduler.plan(["DEAD", "QUIET", "LIVE", "NEW"], today=today)
+    assert plan.tickers == ["LIVE", "NEW"]
+    assert plan.deferred == ["DEAD", "QUIET"]
+
+    plan = scheduler.plan(["DEAD", "QUIET", "LIVE", "NEW"], today=today + timedelta(days=6))
+    assert plan.tickers == ["LIVE", "NEW", "DEAD", "QUIET"]
+
+    # A post brings it back
+    scheduler.record_run({"dead": {"total_mentions": 1}}, ["DEAD"], today=today)
+    assert not scheduler.is_dead("DEAD")
+
+
+# Test a second run on the same day replaces that day's count
+def test_same_day_run():
+    scheduler = TickerScheduler()
+    scheduler.record_run({"aapl": {"total_mentions": 10}}, ["AAPL"], today=today)
+    scheduler.record_run({"aapl": {"total_mentions": 12}}, ["AAPL"], today=today)
+    assert scheduler.history["aapl"].mentions == [12]
+
+
+# Test every page of the history table is read
+def test_fetch_history_rows():
+    rows = [row(f"T{i}", [i], [i]) for i in range(25)]
+    client = FakeQuery(rows)
+    assert fetch_history_rows(client, page_size=10) == rows
+    assert client.ranges == [(0, 9), (10, 19), (20, 29)]
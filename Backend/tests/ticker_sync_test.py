@@ -0,0 +1,115 @@
+# tests/ticker_sync_test.py tests TickerSync's paged prefetch, rolling arrays, chunked upserts and retries against a fake client
+
+import json
+import pytest
+from ticker_sync import TickerSync, build_row, ROLLING_DAYS
+from DataProcessing import calculate_accels
+
+
+class FakeQuery:
+    def __init__(self, client, table):
+        self.client = client
+        self.table_name = table
+        self.tickers = None
+        self.rows = None
+
+    def select(self, columns):
+        self.columns = columns
+        return self
+
+    def in_(self, column, values):
+        self.tickers = list(values)
+        return self
+
+    def upsert(self, rows, on_conflict=None):
+        self.rows = rows
+        self.on_conflict = on_conflict
+        return self
+
+    def execute(self):
+        table = self.client.tables.setdefault(self.table_name, {})
+        if self.rows is None:
+            self.client.selects.append(self.tickers)
+            return type("Response", (), {"data": [table[t] for t in self.tickers if t in table]})()
+
+        self.client.upserts.append(len(self.rows))
+        if self.client.fail_upserts:
+            self.client.fail_upserts -= 1
+            raise ConnectionError("connection reset")
+        # PostgREST needs every row of a bulk upsert to have the same columns
+        assert len({tuple(sorted(row)) for row in self.rows}) == 1 and self.on_conflict == "ticker"
+        for row in self.rows:
+            table[row["ticker"]] = row
+        return type("Response", (), {"data": self.rows})()
+
+
+class FakeSupabase:
+    def __init__(self, rows=(), fail_upserts=0):
+        self.tables = {"full_data_with_accel": {row["ticker"]: row for row in rows}}
+        self.selects = []
+        self.upserts = []
+        self.fail_upserts = fail_upserts
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+def results(ticker, mentions=10, score=5.0):
+    return {"hours": [1] * 24, "likes": [0] * 24, "total_mentions": mentions, "total_likes": 3, "wiv": 7,
+            "daily_score": score, "stock_price": [100.0], "market_cap": [1e9]}
+
+
+# Test a new ticker starts its rolling arrays and an existing one is rolled forward a day
+def test_build_row():
+    row = build_row("aapl", results("aapl", mentions=10, score=5.0))
+    assert json.loads(row["mentions_daily"]) == [10] + [0] * (ROLLING_DAYS - 1)
+    assert json.loads(row["daily_scores_acceleration"]) == [0] * ROLLING_DAYS
+
+    scores = [float(i + 1) for i in range(ROLLING_DAYS)]
+    existing = {"ticker": "aapl", "mentions_daily": json.dumps(list(range(ROLLING_DAYS))), "likes_daily": json.dumps([1] * ROLLING_DAYS),
+                "wiv": json.dumps([2] * ROLLING_DAYS), "daily_scores": json.dumps(scores)}
+    row = build_row("aapl", results("aapl", mentions=99, score=0.5), existing)
+    assert json.loads(row["mentions_daily"]) == [99] + list(range(ROLLING_DAYS - 1))
+    assert json.loads(row["daily_scores"]) == [0.5] + scores[:-1]
+    assert json.loads(row["daily_scores_acceleration"]) == calculate_accels([0.5] + scores[:-1])
+    assert json.loads(row["daily_score"]) == 0.5
+
+
+# Test existing rows are read in pages and written in chunks, with a report of what happened
+def test_sync_batches():
+    existing = [build_row(f"t{i}", results(f"t{i}", mentions=1)) for i in range(0, 10, 2)]
+    client = FakeSupabase(existing)
+    sync = TickerSync(client, batch_size=4, fetch_page_size=3, retry_delay=0)
+    run = {f"t{i}": results(f"t{i}", mentions=2) for i in range(10)}
+    run["bad"] = None
+
+    report = sync.sync(run)
+    assert [len(page) for page in client.selects] == [3, 3, 3, 1]
+    assert client.upserts == [4, 4, 2]
+    assert (report.rows, report.inserted, report.updated, report.skipped, report.batches) == (10, 5, 5, 1, 3)
+    assert report.rows_per_second > 0
+
+    table = client.tables["full_data_with_accel"]
+    assert json.loads(table["t0"]["mentions_daily"])[:2] == [2, 1]
+    assert json.loads(table["t1"]["mentions_daily"])[:2] == [2, 0]
+
+
+# Test a failing batch is retried, and one that keeps failing is reported without stopping the rest
+def test_sync_retries():
+    client = FakeSupabase(fail_upserts=1)
+    report = TickerSync(client, batch_size=2, retry_delay=0).sync({f"t{i}": results(f"t{i}") for i in range(4)})
+    assert report.retries == 1 and report.rows == 4 and not report.failed_tickers
+
+    client = FakeSupabase(fail_upserts=3)
+    report = TickerSync(client, batch_size=2, max_retries=2, retry_delay=0).sync({f"t{i}": results(f"t{i}") for i in range(4)})
+    assert report.failed_tickers == ["t0", "t1"] and report.rows == 2
+    assert set(client.tables["full_data_with_accel"]) == {"t2", "t3"}
+
+
+# Test Exec.update_ticker goes through the same path for a single ticker
+def test_update_ticker():
+    Exec = pytest.importorskip("Exec")
+    client = FakeSupabase()
+    Exec.update_ticker("aapl", results("aapl"), client)
+    Exec.update_ticker("aapl", results("aapl", mentions=4), client)
+    assert json.loads(client.tables["full_data_with_accel"]["aapl"]["mentions_daily"])[:2] == [4, 10]
@@ -0,0 +1,165 @@
+# tests/wiv_test.py tests the bulk hourly download in wiv.py and the price and market cap lookups on top of it,
+# and the IV weighting against option chains in tests/fixtures/option_chains
+
+import os
+import json
+import time
+import threading
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+import pytest
+import wiv
+
+CHAINS = os.path.join(os.path.dirname(__file__), "fixtures", "option_chains")
+INDEX = pd.date_range("2025-06-11 09:30", periods=4, freq="h", tz="America/New_York", name="Datetime")
+
+
+class FakeTicker:
+    def __init__(self, yf, symbol):
+        self.yf = yf
+        self.symbol = symbol.upper()
+
+    def history(self, period="1d", interval="1d", auto_adjust=True):
+        self.yf.history_calls.append(self.symbol)
+        time.sleep(self.yf.history_delay)
+        return pd.DataFrame({"Close": [50.0, 51.0]}, index=INDEX[:2])
+
+    def option_chain(self, date):
+        calls, puts = self.yf.chains[self.symbol]
+        return SimpleNamespace(calls=calls, puts=puts)
+
+    @property
+    def info(self):
+        return {"sharesOutstanding": self.yf.shares.get(self.symbol)}
+
+
+class FakeYFinance:
+    """Returns multi-ticker downloads shaped like yfinance's: (Ticker, Price) columns over a shared index"""
+
+    def __init__(self, bars, shares=None):
+        self.bars = bars  # symbol -> closes, shorter lists are missing the later bars, None is unknown to Yahoo
+        self.shares = shares or {}
+        self.downloads = []
+        self.history_calls = []
+        self.history_delay = 0.0
+        self.chains = {}  # symbol -> (calls, puts)
+
+    def download(self, tickers, period, interval, group_by, progress, auto_adjust, threads):
+        assert group_by == "ticker"
+        self.downloads.append(list(tickers))
+        frames = {}
+        for symbol in tickers:
+            closes = self.bars.get(symbol) or []
+            closes = closes + [np.nan] * (len(INDEX) - len(closes))
+            frames[symbol] = pd.DataFrame({"Open": closes, "Close": closes, "Volume": [0] * len(INDEX)}, index=INDEX)
+        return pd.concat(frames.values(), axis=1, keys=frames.keys(), names=["Ticker", "Price"])
+
+    def Ticker(self, symbol):
+        return FakeTicker(self, symbol)
+
+
+@pytest.fixture
+def yf(monkeypatch):
+    fake = FakeYFinance({"AAPL": [1.0, 2.0, 3.0, 4.0], "NKE": [5.0, 6.0], "GONE": None, "TSLA": [7.0, 8.0, 9.0, 10.0]},
+                        shares={"AAPL": 10, "NKE": 100})
+    monkeypatch.setattr(wiv, "yf", fake)
+    yield fake
+    wiv._hourly_bars.clear()
+
+
+# Test tickers are downloaded in chunks and split into a frame per ticker without the other tickers' bars
+def test_download_hourly_bars(yf):
+    bars = wiv.download_hourly_bars(["aapl", "nke", "gone", "tsla", "AAPL"], chunk_size=3)
+    assert yf.downloads == [["AAPL", "GONE", "NKE"], ["TSLA"]]
+    assert bars["NKE"]["Close"].tolist() == [5.0, 6.0]
+    assert bars["TSLA"]["Close"].tolist() == [7.0, 8.0, 9.0, 10.0]
+    assert bars["GONE"].empty
+
+
+# Test price and market cap are lookups into the batch, a ticker outside it is fetched on its own
+def test_lookups(yf):
+    wiv.load_hourly_bars(["aapl", "nke", "gone"])
+    assert len(yf.downloads) == 1
+
+    assert wiv.get_stockprice_last_day("aapl") == [1.0, 2.0, 3.0, 4.0]
+    assert wiv.get_marketcap_last_day("nke") == [500.0, 600.0]
+    assert wiv.get_stockprice_last_day("gone") == [] and wiv.get_marketcap_last_day("gone") == []
+    assert wiv.get_marketcap_last_day("aapl") == [10.0, 20.0, 30.0, 40.0]
+    assert yf.history_calls == []
+
+    assert wiv.get_stockprice_last_day("msft") == [50.0, 51.0]
+    assert yf.history_calls == ["MSFT"]
+
+
+# Test a ticker missing from the batch is fetched once for both its price and market cap calls, even at the same time,
+# and the fetch is charged against the rate limiter
+def test_fallback_fetched_once(yf, monkeypatch):
+    from enrichment import RateLimiter
+    limiter = RateLimiter(100)
+    acquired = []
+    monkeypatch.setattr(limiter, "acquire", lambda cost=1: acquired.append(cost) or 0.0)
+    monkeypatch.setattr(wiv, "hourly_limiter", limiter)
+    yf.shares["MSFT"] = 2
+    yf.history_delay = 0.1
+    wiv.load_hourly_bars(["aapl"])
+
+    results = {}
+    threads = [threading.Thread(target=lambda name=name, call=call: results.update({name: call("msft")}))
+               for name, call in [("stock_price", wiv.get_stockprice_last_day), ("market_cap", wiv.get_marketcap_last_day)]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {"stock_price": [50.0, 51.0], "market_cap": [100.0, 102.0]}
+    assert yf.history_calls == ["MSFT"]
+    assert acquired == [1]
+
+
+# Test shares outstanding and option expiries come from the metadata cache first, expired expiry dates dropped
+def test_metadata_cache(yf, monkeypatch):
+    from metadata_cache import MetadataCache
+    cache = MetadataCache()
+    cache.set("NKE", "shares_outstanding", 1000)
+    cache.set("AAPL", "options", ["2000-01-21", "2999-01-15"])
+    monkeypatch.setattr(wiv, "metadata_cache", cache)
+    wiv.load_hourly_bars(["nke", "aapl"])
+
+    assert wiv.get_marketcap_last_day("nke") == [5000.0, 6000.0]
+    assert wiv.get_option_expiries("aapl") == ["2999-01-15"]
+    # AAPL's share count wasn't cached, so it is fetched once and cached
+    assert wiv.get_marketcap_last_day("aapl")[0] == 10.0
+    assert cache.lookup("aapl", "shares_outstanding") == (True, 10)
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def load_chain(name):
+    return (pd.read_csv(os.path.join(CHAINS, f"{name}_calls.csv")),
+            pd.read_csv(os.path.join(CHAINS, f"{name}_puts.csv")))
+
+
+with open(os.path.join(CHAINS, "expected.json")) as f:
+    EXPECTED_IV = json.load(f)
+
+
+# Test the weighted IV of each fixture chain matches what the per-strike loop gave (ties in distance, duplicate
+# strikes, strikes missing a put, NaN IVs, no open interest at the nearest strikes or at all)
+@pytest.mark.parametrize("name", sorted(EXPECTED_IV))
+def test_weighted_iv(name):
+    calls, puts = load_chain(name)
+    expected = EXPECTED_IV[name]
+    assert wiv.weighted_iv(calls, puts, expected["current_price"]) == pytest.approx(expected["weighted_iv"], rel=1e-12)
+
+
+# Test calculate_iv_sum weights the chain of the expiry nearest 30 days out at today's price and leaves the chain as it was
+def test_calculate_iv_sum(yf, monkeypatch):
+    from metadata_cache import MetadataCache
+    cache = MetadataCache()
+    cache.set("AAPL", "options", ["2999-01-15"])
+    monkeypatch.setattr(wiv, "metadata_cache", cache)
+    calls, puts = load_chain("aapl")
+    yf.chains["AAPL"] = (calls, puts)
+
+    assert wiv.calculate_iv_sum("aapl") == wiv.weighted_iv(calls, puts, 50.0) > 0
+    assert "strike_diff" not in calls and "strike_diff" not in puts
@@ -0,0 +1,174 @@
+# ticker_sync.py writes a run's per-ticker results to full_data_with_accel in bulk: existing rows are read with a few
+# paged in_() queries, the rolling 30 day arrays are updated in memory and everything goes back in chunked upserts
+
+import json
+import time
+import logging
+from typing import Dict, List, Optional
+from dataclasses import dataclass, field
+
+from DataProcessing import calculate_accels
+
+ROLLING_DAYS = 30
+# Columns the rolling arrays are built from, the rest of a row is replaced
+EXISTING_COLUMNS = "ticker,mentions_daily,likes_daily,wiv,daily_scores"
+
+
+def _roll(previous, value) -> list:
+    """previous (a JSON list) with value pushed on the front and the oldest day dropped"""
+    values = json.loads(previous) if isinstance(previous, str) else list(previous or [])
+    if not values:
+        values = [0] * ROLLING_DAYS
+    return [value] + values[:-1]
+
+
+def build_row(ticker: str, datas: dict, existing: Optional[dict] = None) -> dict:
+    """The full_data_with_accel row for a ticker's results, rolled forward from its existing row if it has one"""
+    if existing is None:
+        mentions_daily = [datas["total_mentions"]] + [0] * (ROLLING_DAYS - 1)
+        likes_daily = [datas["total_likes"]] + [0] * (ROLLING_DAYS - 1)
+        wiv_daily = [datas["wiv"]] + [0] * (ROLLING_DAYS - 1)
+        daily_scores = [datas["daily_score"]] + [0] * (ROLLING_DAYS - 1)
+        accels = [0] * ROLLING_DAYS
+    else:
+        mentions_daily = _roll(existing.get("mentions_daily"), datas["total_mentions"])
+        likes_daily = _roll(existing.get("likes_daily"), datas["total_likes"])
+        wiv_daily = _roll(existing.get("wiv"), datas["wiv"])
+        daily_scores = _roll(existing.get("daily_scores"), datas["daily_score"])
+        accels = calculate_accels(daily_scores)
+
+    return {
+        "ticker": ticker,
+        "mentions_hourly": json.dumps(datas["hours"]),
+        "likes_hourly": json.dumps(datas["likes"]),
+        "mentions_daily": json.dumps(mentions_daily),
+        "likes_daily": json.dumps(likes_daily),
+        "stock_price": json.dumps(datas["stock_price"]),
+        "market_cap": json.dumps(datas["market_cap"]),
+        "wiv": json.dumps(wiv_daily),
+        "daily_score": json.dumps(datas["daily_score"]),
+        "daily_scores": json.dumps(daily_scores),
+        "daily_scores_acceleration": json.dumps(accels)
+    }
+
+
+@dataclass
+class SyncReport:
+    rows: int = 0  # written
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0  # results that weren't a dict
+    batches: int = 0
+    retries: int = 0
+    failed_tickers: List[str] = field(default_factory=list)
+    fetch_seconds: float = 0.0
+    write_seconds: float = 0.0
+
+    @property
+    def seconds(self) -> float:
+        return self.fetch_seconds + self.write_seconds
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+class TickerSync:
+    """Bulk replacement for calling Exec.update_ticker (a select plus an insert or update) once per ticker.
+
+    Existing rows are fetched fetch_page_size tickers per in_() query (the tickers go in the URL, so pages are kept
+    short), then rows are written batch_size per upsert on the ticker column. A failed request is retried up to
+    max_retries times with doubling delays; a batch that still fails is reported in failed_tickers and the rest
+    of the run carries on. Works with anything shaped like a supabase client, a local PostgREST included.
+    """
+
+    def __init__(self,
+                 supabase_client,
+                 table: str = "full_data_with_accel",
+                 batch_size: int = 500,
+                 fetch_page_size: int = 200,
+                 max_retries: int = 3,
+                 retry_delay: float = 1.0,
+                 logger: Optional[logging.Logger] = None):
+        self.client = supabase_client
+        self.table = table
+        self.batch_size = batch_size
+        self.fetch_page_size = fetch_page_size
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.logger = logger or logging.getLogger(__name__)
+
+    def _execute(self, request, description: str, report: SyncReport):
+        """request() retried with backoff, the last error is raised once retries run out"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return request()
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                report.retries += 1
+                delay = self.retry_delay * 2 ** attempt
+                self.logger.warning(f"{description} failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def fetch_existing(self, tickers: List[str], report: Optional[SyncReport] = None) -> Dict[str, dict]:
+        """Existing rows by ticker, for the columns the rolling arrays need"""
+        report = report or SyncReport()
+        existing = {}
+        for start in range(0, len(tickers), self.fetch_page_size):
+            page = tickers[start:start + self.fetch_page_size]
+            response = self._execute(
+                lambda: self.client.table(self.table).select(EXISTING_COLUMNS).in_("ticker", page).execute(),
+                f"Fetching rows {start}-{start + len(page)}", report
+            )
+            for row in response.data or []:
+                existing[row["ticker"]] = row
+        return existing
+
+    def sync(self, results: Dict[str, dict]) -> SyncReport:
+        """Write every ticker's results (map2 in Exec.run) and report how it went"""
+        report = SyncReport()
+        valid = {}
+        for ticker, datas in results.items():
+            if isinstance(datas, dict):
+                valid[ticker] = datas
+            else:
+                self.logger.warning(f"Skipping {ticker} as it is not a dictionary")
+                report.skipped += 1
+
+        start = time.time()
+        existing = self.fetch_existing(list(valid), report)
+        report.fetch_seconds = time.time() - start
+
+        rows = []
+        for ticker, datas in valid.items():
+            try:
+                rows.append(build_row(ticker, datas, existing.get(ticker)))
+            except (KeyError, TypeError, ValueError) as e:
+                self.logger.error(f"Could not build row for {ticker}: {e}")
+                report.failed_tickers.append(ticker)
+
+        start = time.time()
+        for first in range(0, len(rows), self.batch_size):
+            batch = rows[first:first + self.batch_size]
+            try:
+                self._execute(
+                    lambda: self.client.table(self.table).upsert(batch, on_conflict="ticker").execute(),
+                    f"Upserting rows {first}-{first + len(batch)}", report
+                )
+            except Exception as e:
+                self.logger.error(f"Upserting rows {first}-{first + len(batch)} failed after {self.max_retries} retries: {e}")
+                report.failed_tickers.extend(row["ticker"] for row in batch)
+                continue
+
+            report.batches += 1
+            report.rows += len(batch)
+            updated = sum(1 for row in batch if row["ticker"] in existing)
+            report.updated += updated
+            report.inserted += len(batch) - updated
+        report.write_seconds = time.time() - start
+
+        self.logger.info(f"Synced {report.rows} rows to {self.table} ({report.inserted} new, {report.updated} updated) "
+                         f"in {report.batches} batches, {report.seconds:.1f}s, {report.rows_per_second:.0f} rows/s, "
+                         f"{report.retries} retries, {len(report.failed_tickers)} failed")
+        return report
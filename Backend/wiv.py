@@ -5,10 +5,79 @@ import yfinance as yf
 import pandas as pd
 from datetime import datetime, timedelta
 import numpy as np
+import threading
+
+# MetadataCache (metadata_cache.py) read before asking yfinance for shares outstanding and option expiries, set by Exec
+metadata_cache = None
+
+def _fetch_shares_outstanding(stock: str):
+    return yf.Ticker(stock).info.get("sharesOutstanding", None)
+
+def _fetch_option_expiries(stock: str):
+    return list(yf.Ticker(stock).options)
+
+# What metadata_cache.py refreshes, by cache field
+METADATA_FETCHERS = {
+    "shares_outstanding": _fetch_shares_outstanding,
+    "options": _fetch_option_expiries,
+}
+
+def _metadata(stock: str, field: str):
+    if metadata_cache is None:
+        return METADATA_FETCHERS[field](stock)
+    return metadata_cache.get_or_fetch(stock, field, lambda: METADATA_FETCHERS[field](stock))
+
+def get_shares_outstanding(stock: str):
+    return _metadata(stock, "shares_outstanding")
+
+def get_option_expiries(stock: str):
+    # A cached list can hold dates that have passed since
+    today = datetime.today().strftime('%Y-%m-%d')
+    return [date for date in _metadata(stock, "options") if date >= today]
+
+def _first_rows(chain_strikes, strikes):
+    """Row each of strikes first appears on in chain_strikes, -1 where it isn't listed"""
+    unique, first = np.unique(chain_strikes, return_index=True)
+    if len(unique) == 0:
+        return np.full(len(strikes), -1)
+    positions = np.minimum(np.searchsorted(unique, strikes), len(unique) - 1)
+    return np.where(unique[positions] == strikes, first[positions], -1)
+
+def weighted_iv(calls, puts, current_price, strikes=5):
+    """Open interest weighted IV of the strikes closest to current_price that have a call and a put with IVs.
+    Same result as checking the strikes one at a time in a loop, without filtering the whole chain per strike"""
+    call_strikes = calls['strike'].to_numpy(dtype=float)
+    put_strikes = puts['strike'].to_numpy(dtype=float)
+
+    # Closest first, a strike listed twice counts where it first appears and uses its first row
+    nearest = call_strikes[np.argsort(np.abs(call_strikes - current_price), kind='quicksort')]
+    _, first_seen = np.unique(nearest, return_index=True)
+    order = nearest[np.sort(first_seen)]
+    call_rows = _first_rows(call_strikes, order)
+    put_rows = _first_rows(put_strikes, order)
+
+    call_iv = calls['impliedVolatility'].to_numpy(dtype=float)[call_rows]
+    put_iv = puts['impliedVolatility'].to_numpy(dtype=float)[put_rows]
+    # Strikes missing a side and NaN IVs not included
+    keep = np.flatnonzero((call_rows >= 0) & (put_rows >= 0) & ~np.isnan(call_iv) & ~np.isnan(put_iv))[:strikes]
+    if len(keep) == 0:
+        return 0
+
+    call_iv = np.abs(call_iv[keep])
+    put_iv = np.abs(put_iv[keep])
+    call_oi = calls['openInterest'].to_numpy(dtype=float)[call_rows[keep]]
+    put_oi = puts['openInterest'].to_numpy(dtype=float)[put_rows[keep]]
+
+    # A strike's IVs go in unweighted while no open interest has been seen up to it
+    total_oi = np.cumsum(call_oi + put_oi)
+    weighted = np.where(total_oi > 0, call_iv * call_oi + put_iv * put_oi, call_iv + put_iv)
+    if total_oi[-1] == 0:
+        return 0
+    return weighted.sum() / total_oi[-1]
 
 def calculate_iv_sum(stock):
     ticker = yf.Ticker(stock)
-    expiration_dates = ticker.options
+    expiration_dates = get_option_expiries(stock)
 
     today = datetime.today()
     target_date = today + timedelta(days=30)
@@ -20,89 +89,91 @@ def calculate_iv_sum(stock):
     options_chain = ticker.option_chain(closest_expiration_str)
     current_price = ticker.history(period='1d')['Close'].iloc[0]
 
-    options_chain.calls['strike_diff'] = abs(options_chain.calls['strike'] - current_price)
-    options_chain.puts['strike_diff'] = abs(options_chain.puts['strike'] - current_price)
-
-    # Sorted by 'strike_diff'
-    sorted_calls = options_chain.calls.sort_values('strike_diff')
-    sorted_puts = options_chain.puts.sort_values('strike_diff')
-
-    top_strikes = sorted_calls['strike'].unique()
-
-    sum_weighted_avg_iv = 0
-    count = 0  # strikes processed?
-    total_oi = 0
-
-    # print(type(top_strikes[0]))
-
-    for strike in top_strikes:
-        call_option = options_chain.calls[options_chain.calls['strike'] == strike]
-        put_option = options_chain.puts[options_chain.puts['strike'] == strike]
-
-        if call_option.empty or put_option.empty:
+    return weighted_iv(options_chain.calls, options_chain.puts, current_price)
+
+# Hourly bars from the last download_hourly_bars batch, by upper case ticker, plus the ones fetched on their own since
+_hourly_bars = {}
+_hourly_bars_lock = threading.Lock()
+# One lock per ticker fetched on its own, so its price and market cap calls share a single Ticker.history
+_hourly_fetch_locks = {}
+# RateLimiter (enrichment.py) a ticker fetched on its own is charged against, set by Exec
+hourly_limiter = None
+
+def download_hourly_bars(tickers, chunk_size=200):
+    """Last day of hourly bars for every ticker, one multi-ticker yf.download per chunk_size tickers,
+    split into a frame per ticker (upper case, as yfinance returns them)"""
+    bars = {}
+    symbols = sorted({ticker.upper() for ticker in tickers})
+    for start in range(0, len(symbols), chunk_size):
+        chunk = symbols[start:start + chunk_size]
+        data = yf.download(tickers=chunk, period="1d", interval="60m", group_by="ticker",
+                           progress=False, auto_adjust=True, threads=True)
+        if data is None or data.empty:
             continue
 
-        call_option = call_option.iloc[0]
-        put_option = put_option.iloc[0]
-
-        call_iv = call_option['impliedVolatility']
-        put_iv = put_option['impliedVolatility']
-
-        # NaN IVs not included
-        if np.isnan(call_iv) or np.isnan(put_iv):
-            continue
-
-        call_iv = abs(call_iv)
-        put_iv = abs(put_iv)
-
-        call_oi = call_option['openInterest']
-        put_oi = put_option['openInterest']
-
-        total_oi += call_oi + put_oi
-
-        if total_oi > 0:
-            weighted_avg_iv = (call_iv * call_oi + put_iv * put_oi)
-        else:
-            weighted_avg_iv = (call_iv + put_iv)
-
-        sum_weighted_avg_iv += weighted_avg_iv
-        count += 1
-
-        if count >= 5:
-            break
-
-    if total_oi == 0:
-        return 0
-    return sum_weighted_avg_iv / total_oi
+        for symbol in chunk:
+            if isinstance(data.columns, pd.MultiIndex):
+                if symbol not in data.columns.get_level_values(0):
+                    continue
+                frame = data[symbol]
+            elif len(chunk) == 1:
+                # Older yfinance returns a flat frame for a single ticker
+                frame = data
+            else:
+                continue
+            # The shared index has a row for every bar any ticker in the chunk had
+            bars[symbol] = frame.dropna(subset=["Close"]) if "Close" in frame.columns else frame.dropna(how="all")
+    return bars
+
+def load_hourly_bars(tickers, chunk_size=200):
+    """Download the batch the per-ticker price and market cap functions below read from"""
+    bars = download_hourly_bars(tickers, chunk_size)
+    with _hourly_bars_lock:
+        _hourly_bars.clear()
+        _hourly_bars.update(bars)
+        _hourly_fetch_locks.clear()
+    return _hourly_bars
+
+def _hourly_bars_for(stock: str):
+    symbol = stock.upper()
+    with _hourly_bars_lock:
+        bars = _hourly_bars.get(symbol)
+        if bars is not None:
+            return bars
+        fetch_lock = _hourly_fetch_locks.setdefault(symbol, threading.Lock())
+
+    with fetch_lock:
+        # The other call for this ticker may have fetched it while this one waited
+        with _hourly_bars_lock:
+            bars = _hourly_bars.get(symbol)
+        if bars is None:
+            # Not in the batch (a failed chunk, a symbol yfinance dropped), fetched on its own and kept for the next
+            # call. Ticker.history rather than yf.download, which keeps its results in module level dicts and mixes
+            # them up when several threads download at once (see enrichment.py)
+            if hourly_limiter is not None:
+                hourly_limiter.acquire()
+            bars = yf.Ticker(stock).history(period="1d", interval="60m", auto_adjust=True)
+            with _hourly_bars_lock:
+                _hourly_bars[symbol] = bars
+    return bars
 
 def get_stockprice_last_day(stock: str):
-
-    # Download data: 1-day period, hourly interval
-    data = yf.download(tickers=stock, period="1d", interval="60m", progress=False, auto_adjust=True)
-
-    # Reset index to make the timestamp a column
-    data = data.reset_index()
-
-    # Print the result
-    # Keep only timestamp and close price
-
-    # Print the result
+    # Hourly close from market open to close
+    data = _hourly_bars_for(stock)
     if data.empty or "Close" not in data.columns:
         return []
     return data["Close"].values.flatten().tolist()
 
 def get_marketcap_last_day(stock: str):
-    # Download data: 1-day period, hourly interval
-    data = yf.download(tickers=stock, period="1d", interval="60m", progress=False, auto_adjust=True)
-    data = data.reset_index()
-
-    ticker = yf.Ticker(stock)
-    info = ticker.info
-    shares_outstanding = info.get("sharesOutstanding", None)
+    # Hourly close from the same bars as the price, times the shares outstanding
+    data = _hourly_bars_for(stock)
+    if data.empty or "Close" not in data.columns:
+        return []
 
-    if data.empty or "Close" not in data.columns or shares_outstanding is None:
+    shares_outstanding = get_shares_outstanding(stock)
+    if shares_outstanding is None:
         return []
 
     # Calculate market cap for each hour
     market_caps = (data["Close"] * shares_outstanding).values.flatten().tolist()
-    return market_caps
\ No newline at end of file
+    return market_caps